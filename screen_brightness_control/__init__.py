@@ -1,16 +1,19 @@
+import functools
 import logging
 import platform
-import threading
 import time
 import traceback
 from dataclasses import dataclass, field
-from typing import Callable, Any, Dict, List, Optional, Tuple, Type, Union, FrozenSet, ClassVar
+from typing import Callable, Any, Dict, Hashable, List, Optional, Tuple, Type, Union
 from ._version import __author__, __version__  # noqa: F401
 from .exceptions import NoValidDisplayError, format_exc
-from .helpers import (BrightnessMethod, ScreenBrightnessError,
-                      logarithmic_range, percentage)
-from .types import DisplayIdentifier, IntPercentage, Percentage
-from . import config
+from .helpers import (BrightnessMethod, Fade, ScreenBrightnessError,
+                      adjustments, discovery_context, fade_engine, fan_out,
+                      percentage, shadow)
+from .helpers import logarithmic_range  # noqa: F401
+from .types import DisplayIdentifier, FloatPercentage, IntPercentage, Percentage
+from .curves import CurveLike
+from . import calibration, config, curves
 
 
 _logger = logging.getLogger(__name__)
@@ -92,7 +95,12 @@ def set_brightness(
     Returns:
         If `no_return` is set to `True` (the default) then this function returns nothing.
         Otherwise, a list of `.types.IntPercentage` is returned, each item being the new
-        brightness of each adjusted display (invalid displays may return None)
+        brightness of each adjusted display (invalid displays may return None).
+
+        For relative values (eg: `'+25'`), the new brightness is the value that was worked out
+        and written, rather than read back from the display. Displays that are calibrated
+        (see `calibration`) or that have coarse brightness steps may report a slightly
+        different value afterwards. See `Display.adjust_brightness`
 
     Example:
         ```python
@@ -116,11 +124,12 @@ def set_brightness(
     '''
     if isinstance(value, str) and ('+' in value or '-' in value):
         output: List[Union[IntPercentage, None]] = []
-        for monitor in filter_monitors(display=display, method=method, allow_duplicates=allow_duplicates):
-            # `filter_monitors()` will raise an error if no valid displays are found
-            display_instance = Display.from_dict(monitor)
-            display_instance.set_brightness(value=value, force=force)
-            output.append(None if no_return else display_instance.get_brightness())
+        with discovery_context():
+            for monitor in filter_monitors(display=display, method=method, allow_duplicates=allow_duplicates):
+                # `filter_monitors()` will raise an error if no valid displays are found
+                display_instance = Display.from_dict(monitor)
+                # adjustments already know the new brightness, so there is no need to read it back
+                output.append(display_instance.adjust_brightness(int(float(value)), force=force))
 
         return None if no_return else output
 
@@ -139,18 +148,94 @@ def set_brightness(
     )
 
 
+@config.default_params
+def get_brightness_raw(
+    display: Optional[DisplayIdentifier] = None,
+    method: Optional[str] = None,
+    allow_duplicates: Optional[bool] = None,
+    verbose_error: bool = False
+) -> List[Union[int, None]]:
+    '''
+    Returns the current brightness of one or more displays in native units, rather than
+    as a percentage. Calibration (see `calibration`) is not applied.
+    See `Display.get_max_brightness` for the range of each display.
+
+    Args:
+        display (.types.DisplayIdentifier): the specific display to query
+        method: the method to use to get the brightness. See `get_methods`
+        allow_duplicates: controls whether to filter out duplicate displays or not
+        verbose_error: controls the level of detail in the error messages
+
+    Returns:
+        A list with the brightness of each display. Displays that failed return None
+
+    Example:
+        ```python
+        import screen_brightness_control as sbc
+
+        display = sbc.Display.from_dict(sbc.list_monitors_info()[0])
+        raw = sbc.get_brightness_raw(display=0)[0]
+        print(f'{raw} / {display.get_max_brightness()}')
+        ```
+    '''
+    return __per_display(
+        lambda d: d.get_brightness_raw(), display=display, method=method,
+        allow_duplicates=allow_duplicates, verbose_error=verbose_error
+    )
+
+
+@config.default_params
+def set_brightness_raw(
+    value: int,
+    display: Optional[DisplayIdentifier] = None,
+    method: Optional[str] = None,
+    allow_duplicates: Optional[bool] = None,
+    verbose_error: bool = False,
+    no_return: bool = True
+) -> Optional[List[Union[int, None]]]:
+    '''
+    Sets the brightness of one or more displays in native units, rather than as a percentage.
+    Calibration (see `calibration`) is not applied and the value is clamped to the range
+    of each display (see `Display.get_max_brightness`).
+
+    Args:
+        value: the new brightness
+        display (.types.DisplayIdentifier): the specific display to adjust
+        method: the method to use to set the brightness. See `get_methods`
+        allow_duplicates: controls whether to filter out duplicate displays or not
+        verbose_error: controls the level of detail in the error messages
+        no_return: don't return the new brightness level(s)
+
+    Returns:
+        If `no_return` is `False`, the new brightness of each display in native units
+    '''
+    def set_raw(display_instance: 'Display') -> Optional[int]:
+        display_instance.set_brightness_raw(value)
+        return None if no_return else display_instance.get_brightness_raw()
+
+    result = __per_display(
+        set_raw, display=display, method=method, allow_duplicates=allow_duplicates,
+        verbose_error=verbose_error, allow_none=no_return
+    )
+    return None if no_return else result
+
+
 @config.default_params
 def fade_brightness(
     finish: Percentage,
     start: Optional[Percentage] = None,
     interval: float = 0.01,
-    increment: int = 1,
+    increment: float = 1,
     blocking: bool = True,
     force: bool = False,
     logarithmic: bool = True,
     stoppable: bool = True,
+    duration: Optional[float] = None,
+    synchronized: bool = False,
+    curve: Optional[CurveLike] = None,
+    native: bool = False,
     **kwargs
-) -> Union[List[threading.Thread], List[Union[IntPercentage, None]]]:
+) -> Union[List[Fade], List[Union[IntPercentage, None]]]:
     '''
     Gradually change the brightness of one or more displays
 
@@ -160,22 +245,37 @@ def fade_brightness(
             If this arg is not specified, the fade will be started from the
             current brightness.
         interval: the time delay between each step in brightness
-        increment: the amount to change the brightness by per step
-        blocking: whether this should occur in the main thread (`True`) or a new daemonic thread (`False`)
+        increment: the amount to change the brightness by per step.
+            Can only be a fraction of a percent if `native` is set and the display has more than
+            100 steps of brightness. Otherwise it is rounded to a whole percentage (at least 1)
+        blocking: whether to wait for the fades to complete (`True`) or return straight away (`False`)
         force: [*Linux Only*] if False the brightness will never be set lower than 1.
             This is because on most displays a brightness of 0 will turn off the backlight.
             If True, this check is bypassed
         logarithmic: follow a logarithmic brightness curve when adjusting the brightness
         stoppable: whether the fade can be stopped by starting a new fade on the same display
+        duration: how long the fade should take, in seconds. Rather than stepping through every
+            value, each display skips values when it can't keep up, so slow displays still finish
+            on time. `interval` is ignored if this is given
+        synchronized: step every display at the same moments, waiting for the slowest display to
+            finish each step before starting the next, so that they stay in line with each other
+            throughout the fade (see `helpers.FadeEngine.start_group`)
+        curve (.curves.CurveLike): the brightness curve to follow, by name (eg: `'cie_lstar'`)
+            or as a custom function. Overrides `logarithmic`. See `curves`
+        native: on displays with more than 100 steps of brightness (eg: laptop backlights),
+            step through fractional percentages rather than whole ones. See `Display.set_brightness_float`
         **kwargs: passed through to `filter_monitors` for display selection.
             Will also be passed to `get_brightness` if `blocking is True`
 
     Returns:
         By default, this function calls `get_brightness()` to return the new
-        brightness of any adjusted displays.
+        brightness of any adjusted displays. Displays whose fade failed return None.
 
-        If `blocking` is set to `False`, then a list of threads are
-        returned, one for each display being faded.
+        If `blocking` is set to `False`, then a list of `helpers.Fade` handles are
+        returned, one for each display being faded. Check `helpers.Fade.error` for failures.
+
+    Raises:
+        ScreenBrightnessError: if `blocking` is `True` and every display's fade failed
 
     Example:
         ```python
@@ -193,7 +293,19 @@ def fade_brightness(
         # fade the brightness from 100% to 90% with time intervals of 0.1 seconds
         sbc.fade_brightness(90, start=100, interval=0.1)
 
-        # fade the brightness to 100% in a new thread
+        # fade the brightness to 0% over half a second, however slow the displays are
+        sbc.fade_brightness(0, duration=0.5)
+
+        # fade all displays to 50% over a second, keeping them in step with each other
+        sbc.fade_brightness(50, duration=1, synchronized=True)
+
+        # fade the brightness to 100% along a gamma curve
+        sbc.fade_brightness(100, curve='gamma-2.2')
+
+        # fade the brightness to 10% in steps of a tenth of a percent, on displays that allow it
+        sbc.fade_brightness(10, increment=0.1, native=True)
+
+        # fade the brightness to 100% in the background
         sbc.fade_brightness(100, blocking=False)
         ```
     '''
@@ -204,27 +316,53 @@ def fade_brightness(
         )}
     )
 
-    threads = []
-    for i in available_monitors:
-        display = Display.from_dict(i)
-
-        thread = threading.Thread(target=display._fade_brightness, args=(finish,), kwargs={
-            'start': start,
-            'interval': interval,
-            'increment': increment,
-            'force': force,
-            'logarithmic': logarithmic,
-            'stoppable': stoppable
-        })
-        thread.start()
-        threads.append(thread)
+    def plan(monitor: dict) -> Union[Tuple[Hashable, Callable[[float], Any], List[float]], Exception]:
+        # a display that can't be read shouldn't stop the others from fading
+        try:
+            return Display.from_dict(monitor)._fade_plan(
+                finish, start, increment, force, logarithmic, stoppable, curve, native)
+        except Exception as e:
+            return e
+
+    # working out each fade involves reading the display's brightness, which is done in parallel
+    # for displays on different buses if `config.PARALLEL` is enabled
+    with discovery_context():
+        plans = fan_out([(i['method'].bus(i), functools.partial(plan, i)) for i in available_monitors])
+
+    valid = [p for p in plans if not isinstance(p, Exception)]
+    started: List[Fade]
+    if synchronized:
+        started = fade_engine.start_group(valid, interval, stoppable=stoppable, duration=duration) if valid else []
+    else:
+        started = [fade_engine.start(*p, interval, stoppable=stoppable, duration=duration) for p in valid]
+
+    # displays whose plan failed get a fade that has already finished with the error, so that
+    # there is still one fade per display
+    fades: List[Fade] = []
+    for p in plans:
+        if isinstance(p, Exception):
+            fade = Fade(fade_engine)
+            fade._finish(error=p)
+            fades.append(fade)
+        else:
+            fades.append(started.pop(0))
 
     if not blocking:
-        return threads
+        return fades
+
+    for fade in fades:
+        fade.join()
+    failed = [(monitor, fade.error) for monitor, fade in zip(available_monitors, fades) if fade.error is not None]
+    if failed and len(failed) == len(fades):
+        raise __brightness_error(failed, kwargs.get('verbose_error', False))
 
-    for t in threads:
-        t.join()
-    return get_brightness(**kwargs)
+    output = get_brightness(**kwargs)
+    if failed and len(output) == len(fades):
+        # as with `set_brightness`, displays that failed are reported as None
+        for position, fade in enumerate(fades):
+            if fade.error is not None:
+                output[position] = None
+    return output
 
 
 @config.default_params
@@ -294,6 +432,37 @@ def list_monitors(method: Optional[str] = None, allow_duplicates: Optional[bool]
     return [i['name'] for i in list_monitors_info(method=method, allow_duplicates=allow_duplicates)]
 
 
+def cache_stats(reset: bool = False) -> Dict[str, Dict[str, float]]:
+    '''
+    Returns statistics for the library's internal cache, to help judge how effective it is.
+
+    Statistics are grouped by cache region (eg: `i2c_display_info` or `ddcutil_brightness`).
+    Each region has the following keys:
+    - hits (`int`): lookups that returned a cached value
+    - misses (`int`): lookups that found nothing, or an expired or invalidated value
+    - expirations (`int`): values that were removed because they outlived their TTL
+    - invalidations (`int`): explicit invalidations, eg: after the brightness is set
+    - evictions (`int`): values removed to keep the cache within its size limit
+    - mean_age (`float`): the mean age, in seconds, of the values returned by hits
+    - max_age (`float`): the age, in seconds, of the oldest value returned by a hit
+
+    Args:
+        reset: reset the statistics after reading them. This is atomic, so nothing
+            is missed between reading and resetting
+
+    Example:
+        ```python
+        import screen_brightness_control as sbc
+
+        sbc.list_monitors()
+        sbc.list_monitors()
+        for region, stats in sbc.cache_stats(reset=True).items():
+            print(region, stats['hits'], stats['misses'])
+        ```
+    '''
+    return _OS_MODULE.__cache__.stats(reset=reset)
+
+
 def get_methods(name: Optional[str] = None) -> Dict[str, Type[BrightnessMethod]]:
     '''
     Returns all available brightness method names and their associated classes.
@@ -362,119 +531,178 @@ class Display():
     '''The serial number of the display or (if serial is not available) an ID assigned by the OS'''
 
     _logger: logging.Logger = field(init=False, repr=False)
-    _fade_thread_dict: ClassVar[Dict[FrozenSet[Any], threading.Thread]] = {}
-    '''A dictionary mapping display identifiers to latest fade threads for stopping fades.'''
+    _max_brightness: Optional[int] = field(init=False, default=None, repr=False, compare=False)
 
     def __post_init__(self):
         self._logger = _logger.getChild(self.__class__.__name__).getChild(
             str(self.get_identifier()[1])[:20])
 
+    def _fade_plan(
+        self,
+        finish: Percentage,
+        start: Optional[Percentage],
+        increment: float,
+        force: bool,
+        logarithmic: bool,
+        stoppable: bool,
+        curve: Optional[CurveLike] = None,
+        native: bool = False
+    ) -> Tuple[Hashable, Callable[[float], Any], List[float]]:
+        '''
+        Work out the values a fade on this display steps through.
+        See `Display.fade_brightness` for the args
+
+        Returns:
+            The key identifying this display in the `helpers.FadeEngine`, the function
+            that sets each value and the values themselves
+        '''
+        # minimum brightness value
+        if platform.system() == 'Linux' and not force:
+            lower_bound = 1
+        else:
+            lower_bound = 0
+
+        # fractional percentages are only worth it if the display has more than 100 steps
+        native = native and self.get_max_brightness() > 100
+
+        # a fade that is already running knows where the brightness is, which saves a round trip
+        display_key = frozenset((self.method, self.index))
+        position = fade_engine.position(display_key) if stoppable else None
+        if position is None:
+            position = self.get_brightness_float() if native else self.get_brightness()
+        current = int(position)
+
+        finish = percentage(finish, current, lower_bound)
+        values: List[float]
+        if native:
+            begin = max(lower_bound, position) if start is None else percentage(start, current, lower_bound)
+            step = abs(increment) if begin <= finish else -abs(increment)
+            chosen = curves.get_curve(curve) if curve is not None else (
+                curves.LOGARITHMIC if logarithmic else curves.LINEAR)
+            self._logger.debug(f'fade {begin}->{finish}:{step}:curve={chosen.name}:native')
+            values = list(chosen.float_range(begin, finish, step))
+            setter = functools.partial(self.set_brightness_float, force=force)
+        else:
+            start = percentage(
+                current if start is None else start, current, lower_bound)
+
+            range_func: Callable
+            if curve is not None or logarithmic:
+                # the values are looked up in a precomputed table and cached
+                range_func = curves.get_curve('logarithmic' if curve is None else curve).range
+            else:
+                range_func = range
+            # a fractional increment (eg: with `native` on a display with only 100 steps)
+            # is rounded to the nearest whole percentage that still makes progress
+            step = max(1, round(abs(increment)))
+            if start > finish:
+                step = -step
+
+            self._logger.debug(
+                f'fade {start}->{finish}:{step}:logarithmic={logarithmic}:curve={curve}')
+            values = list(range_func(start, finish, step))
+            setter = functools.partial(self.set_brightness, force=force)
+
+        # `finish` isn't always produced by the range, so it is explicitly added as the final step
+        if not values or values[-1] != finish:
+            values.append(finish)
+        return display_key, setter, values
+
+    def adjust_brightness(self, delta: int, force: bool = False) -> IntPercentage:
+        '''
+        Change the brightness of this display by a relative amount, eg: in response to a hotkey.
+        Concurrent adjustments to the same display are applied one after another, and any that pile up
+        while the display is busy are combined into a single write. See `.helpers.AdjustmentQueue`
+
+        Args:
+            delta: how much to change the brightness by, as a percentage
+            force: allow the brightness to be set to 0 on Linux. See `Display.set_brightness`
+
+        Returns:
+            The new brightness of the display. See `.types.IntPercentage`.
+            This is the value that was written rather than one read back from the display,
+            so a calibrated display or one with coarse steps may report something slightly different
+
+        Example:
+            ```python
+            import screen_brightness_control as sbc
+
+            display = sbc.Display.from_dict(sbc.list_monitors_info()[0])
+            # safe to call from several threads at once
+            print(display.adjust_brightness(+5))
+            ```
+        '''
+        lower_bound = 1 if platform.system() == 'Linux' and not force else 0
+        return adjustments.adjust(
+            # the index tells apart identical displays, which can share an EDID
+            (shadow.key(vars(self)), self.index), int(delta), self.get_brightness,
+            # the lower bound has already been applied
+            lambda value: self.set_brightness(value, force=True),
+            lower_bound=lower_bound
+        )
+
     def fade_brightness(
         self,
         finish: Percentage,
         start: Optional[Percentage] = None,
         interval: float = 0.01,
-        increment: int = 1,
+        increment: float = 1,
         force: bool = False,
         logarithmic: bool = True,
         blocking: bool = True,
-        stoppable: bool = True
-    ) -> Optional[threading.Thread]:
+        stoppable: bool = True,
+        duration: Optional[float] = None,
+        curve: Optional[CurveLike] = None,
+        native: bool = False
+    ) -> Optional[Fade]:
         '''
         Gradually change the brightness of this display to a set value.
-        Can execute in the current thread, blocking until completion,
-        or in a separate thread, allowing concurrent operations.
-        When set as non-blocking and stoppable, a new fade can halt the this operation.
+        Fades are driven by a single background thread (see `helpers.FadeEngine`).
+        This function can either block until the fade completes or return straight away.
+        When stoppable, a new fade on this display takes over this one.
 
         Args:
             finish (.types.Percentage): the brightness level to end up on
             start (.types.Percentage): where the fade should start from. Defaults
                 to whatever the current brightness level for the display is
             interval: time delay between each change in brightness
-            increment: amount to change the brightness by each time (as a percentage)
+            increment: amount to change the brightness by each time (as a percentage).
+                Can only be a fraction of a percent if `native` is set
             force: [*Linux only*] allow the brightness to be set to 0. By default,
                 brightness values will never be set lower than 1, since setting them to 0
                 often turns off the backlight
             logarithmic: follow a logarithmic curve when setting brightness values.
                 See `logarithmic_range` for rationale
-            blocking: run this function in the current thread and block until it completes
-            stoppable: whether this fade will be stopped by starting a new fade on the same display
+            blocking: block until the fade completes
+            stoppable: whether this fade will be stopped by starting a new fade on the same display.
+                A new stoppable fade carries on from wherever this one has reached
+            duration: how long the fade should take, in seconds. Values are picked from the time
+                elapsed and how long writes to this display are taking, skipping any that the
+                display can't keep up with. `interval` is ignored if this is given
+            curve (.curves.CurveLike): the brightness curve to follow, by name (eg: `'cie_lstar'`)
+                or as a custom function. Overrides `logarithmic`. See `curves`
+            native: step through fractional percentages (see `Display.set_brightness_float`) on displays
+                with more than 100 steps of brightness, so that `increment` can be a fraction of a percent.
+                On other displays the increment is rounded to a whole percentage (at least 1)
 
         Returns:
-            If `blocking` is `False`, returns a `threading.Thread` object representing the
-            thread in which the fade operation is running.
-            Otherwise, it returns None.
+            If `blocking` is `False`, returns a `helpers.Fade` handle, which can be used to
+            wait for or cancel the fade. Otherwise, it returns None.
+
+        Raises:
+            Exception: if `blocking` is `True`, whatever stopped the fade early
         '''
-        thread = threading.Thread(target=self._fade_brightness, args=(finish,), kwargs={
-            'start': start,
-            'interval': interval,
-            'increment': increment,
-            'force': force,
-            'logarithmic': logarithmic,
-            'stoppable': stoppable
-        })
-        thread.start()
+        fade = fade_engine.start(
+            *self._fade_plan(finish, start, increment, force, logarithmic, stoppable, curve, native),
+            interval, stoppable=stoppable, duration=duration
+        )
 
         if not blocking:
-            return thread
-        else:
-            thread.join()
-            return None
-
-    def _fade_brightness(
-        self,
-        finish: Percentage,
-        start: Optional[Percentage] = None,
-        interval: float = 0.01,
-        increment: int = 1,
-        force: bool = False,
-        logarithmic: bool = True,
-        stoppable: bool = True
-    ) -> None:
-        # Record the latest thread for this display so that other stoppable threads can be stopped
-        display_key = frozenset((self.method, self.index))
-        self._fade_thread_dict[display_key] = threading.current_thread()
-        # minimum brightness value
-        if platform.system() == 'Linux' and not force:
-            lower_bound = 1
-        else:
-            lower_bound = 0
-
-        current = self.get_brightness()
-
-        finish = percentage(finish, current, lower_bound)
-        start = percentage(
-            current if start is None else start, current, lower_bound)
-
-        # mypy says "object is not callable" but range is. Ignore this
-        range_func: Callable = logarithmic_range if logarithmic else range  # type: ignore[assignment]
-        increment = abs(increment)
-        if start > finish:
-            increment = -increment
-
-        self._logger.debug(
-            f'fade {start}->{finish}:{increment}:logarithmic={logarithmic}')
-
-        # Record the time when the next brightness change should start
-        next_change_start_time = time.time()
-        for value in range_func(start, finish, increment):
-            if stoppable and threading.current_thread() != self._fade_thread_dict[display_key]:
-                # If the current thread is stoppable and it's not the latest thread, stop fading
-                break
-            # `value` is ensured not to hit `finish` in loop, this will be handled in the final step.
-            self.set_brightness(value, force=force)
-
-            # `interval` is the intended time between the start of each brightness change.
-            next_change_start_time += interval
-            sleep_time = next_change_start_time - time.time()
-            # Skip sleep if the scheduled time has already passed
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-        else:
-            # As `value` doesn't hit `finish` in loop, we explicitly set brightness to `finish`.
-            # This also avoids an unnecessary sleep in the last iteration.
-            if not stoppable or threading.current_thread() == self._fade_thread_dict[display_key]:
-                self.set_brightness(finish, force=force)
+            return fade
+        fade.join()
+        if fade.error is not None:
+            raise fade.error
+        return None
 
     @classmethod
     def from_dict(cls, display: dict) -> 'Display':
@@ -502,7 +730,40 @@ class Display():
             The brightness value of the display, as a percentage.
             See `.types.IntPercentage`
         '''
-        return self.method.get_brightness(display=self.index)[0]
+        key = shadow.key(vars(self))
+        value = shadow.get(key, self.index)
+        if value is None:
+            value = self.method.get_brightness(display=self.index)[0]
+            shadow.record(key, self.index, value, 'read')
+        return calibration.to_logical(self.edid, value)
+
+    def get_brightness_float(self) -> FloatPercentage:
+        '''
+        Returns the brightness of this display as a fractional percentage, which is more precise
+        than `Display.get_brightness` for displays with more than 100 steps of brightness.
+
+        Returns:
+            See `.types.FloatPercentage`
+        '''
+        native = self.get_brightness_raw() * 100 / self.get_max_brightness()
+        return calibration.to_logical_float(self.edid, native)
+
+    def get_brightness_raw(self) -> int:
+        '''
+        Returns the brightness of this display in native units, between 0 and `Display.get_max_brightness`.
+        Calibration (see `calibration`) is not applied.
+        '''
+        return self.method.get_brightness_raw(display=self.index)[0]
+
+    def get_max_brightness(self) -> int:
+        '''
+        Returns the native brightness value of this display at full brightness, ie: how many steps
+        of brightness it has. This is 100 for displays that can only be set to whole percentages.
+        The value is remembered for the lifetime of this `Display`.
+        '''
+        if self._max_brightness is None:
+            self._max_brightness = self.method.get_max_brightness(display=self.index)[0]
+        return self._max_brightness
 
     def get_identifier(self) -> Tuple[str, DisplayIdentifier]:
         '''
@@ -544,6 +805,10 @@ class Display():
             force: allow the brightness to be set to 0 on Linux. This is disabled by default
                 because setting the brightness of 0 will often turn off the backlight
         '''
+        if isinstance(value, str) and ('+' in value or '-' in value):
+            self.adjust_brightness(int(float(value)), force=force)
+            return
+
         # convert brightness value to percentage
         if platform.system() == 'Linux' and not force:
             lower_bound = 1
@@ -556,7 +821,44 @@ class Display():
             lower_bound=lower_bound
         )
 
-        self.method.set_brightness(value, display=self.index)
+        native = calibration.to_native(self.edid, value)
+        key = shadow.key(vars(self))
+        if shadow.is_current(key, self.index, native):
+            self._logger.debug(f'already at {native}, skipping write')
+            return
+        try:
+            self.method.set_brightness(native, display=self.index)
+        except Exception:
+            shadow.invalidate(key)
+            raise
+        shadow.record(key, self.index, native, 'write')
+
+    def set_brightness_float(self, value: FloatPercentage, force: bool = False):
+        '''
+        Sets the brightness of this display to a fractional percentage. On displays with more than
+        100 steps of brightness this is more precise than `Display.set_brightness`.
+
+        Args:
+            value (.types.FloatPercentage): the brightness percentage to set the display to
+            force: allow the brightness to be set to 0 on Linux. See `Display.set_brightness`
+        '''
+        lower_bound = 1 if platform.system() == 'Linux' and not force else 0
+        value = calibration.to_native_float(self.edid, min(100.0, max(lower_bound, float(value))))
+        self.method.set_brightness_raw(round(value * self.get_max_brightness() / 100), display=self.index)
+        # the display may now be between two whole percentages
+        shadow.invalidate(shadow.key(vars(self)))
+
+    def set_brightness_raw(self, value: int):
+        '''
+        Sets the brightness of this display in native units. Calibration (see `calibration`)
+        is not applied and nor is the lower bound that `Display.set_brightness` has on Linux.
+
+        Args:
+            value: the new brightness, between 0 and `Display.get_max_brightness`.
+                Values outside of this range are clamped
+        '''
+        self.method.set_brightness_raw(min(self.get_max_brightness(), max(0, int(value))), display=self.index)
+        shadow.invalidate(shadow.key(vars(self)))
 
 
 @config.default_params
@@ -668,12 +970,16 @@ def filter_monitors(
         return list(filtered_displays.values())
 
     duplicates = []
-    for _ in range(3):
-        duplicates = get_monitor_list()
-        if duplicates:
-            break
-        time.sleep(0.4)
-    else:
+    with discovery_context() as context:
+        for _ in range(3):
+            duplicates = get_monitor_list()
+            if duplicates:
+                break
+            # don't let the empty result be re-used when retrying
+            context.forget()
+            time.sleep(0.4)
+
+    if not duplicates:
         msg = 'no displays detected'
         if method is not None:
             msg += f' with method: {method!r}'
@@ -707,25 +1013,92 @@ def __brightness(
         f"brightness {meta_method} request display {display} with method {method}")
 
     output: List[Union[int, None]] = []
-    errors = []
+    errors: List[Tuple[dict, Exception]] = []
+
+    # displays are only discovered once for the whole call
+    with discovery_context():
+        monitors = filter_monitors(display=display, method=method, allow_duplicates=allow_duplicates)
+
+        # group the displays by method and by the bus they are on, so that each method is called
+        # once per bus. Different buses can be talked to in parallel (see `config.PARALLEL`)
+        batches: Dict[Tuple[Type[BrightnessMethod], Hashable], List[int]] = {}
+        for position, monitor in enumerate(monitors):
+            method_class = monitor['method']
+            batches.setdefault((method_class, method_class.bus(monitor)), []).append(position)
+
+        def run_batch(method_class: Type[BrightnessMethod], positions: List[int]) -> List[Tuple[int, Any]]:
+            '''Returns the positions of the batch's displays and their new brightness, None or an exception'''
+            outcomes: List[Tuple[int, Any]] = []
+            keys = {p: shadow.key(monitors[p]) for p in positions}
 
-    for monitor in filter_monitors(display=display, method=method, allow_duplicates=allow_duplicates):
-        try:
             if meta_method == 'set':
-                monitor['method'].set_brightness(
-                    *args, display=monitor['index'], **kwargs)
+                # calibrated displays (see `calibration`) are each sent their own native value
+                native_values = {p: calibration.to_native(monitors[p]['edid'], args[0]) for p in positions}
+                # displays already known to be at the new brightness are left alone (see `.helpers.ShadowState`)
+                to_set = [
+                    p for p in positions if not shadow.is_current(keys[p], monitors[p]['index'], native_values[p])
+                ]
+                if to_set:
+                    try:
+                        set_errors = method_class.set_brightness_batch(
+                            [native_values[p] for p in to_set], [monitors[p]['index'] for p in to_set], **kwargs
+                        )
+                    except Exception as e:
+                        set_errors = [e] * len(to_set)
+                    for p, error in zip(to_set, set_errors):
+                        if error is None:
+                            shadow.record(keys[p], monitors[p]['index'], native_values[p], 'write')
+                        else:
+                            shadow.invalidate(keys[p])
+                            outcomes.append((p, error))
                 if no_return:
-                    output.append(None)
-                    continue
-
-            output += monitor['method'].get_brightness(
-                display=monitor['index'], **kwargs)
-        except Exception as e:
-            output.append(None)
-            errors.append((
-                monitor, e.__class__.__name__,
-                traceback.format_exc() if verbose_error else e
-            ))
+                    return outcomes
+                # only read back the displays that were set successfully
+                failed = {p for p, _ in outcomes}
+                positions = [p for p in positions if p not in failed]
+                if not positions:
+                    return outcomes
+
+            # recent enough values are served from the shadow state rather than read again
+            values: Dict[int, Any] = {}
+            to_read = []
+            for p in positions:
+                value = shadow.get(keys[p], monitors[p]['index'])
+                if value is None:
+                    to_read.append(p)
+                else:
+                    values[p] = value
+            if to_read:
+                try:
+                    read = method_class.get_brightness_batch([monitors[p]['index'] for p in to_read], **kwargs)
+                except Exception as e:
+                    read = [e] * len(to_read)
+                for p, v in zip(to_read, read):
+                    if isinstance(v, int):
+                        shadow.record(keys[p], monitors[p]['index'], v, 'read')
+                    values[p] = v
+            for p in positions:
+                if isinstance(values[p], int):
+                    values[p] = calibration.to_logical(monitors[p]['edid'], values[p])
+            return outcomes + [(p, values[p]) for p in positions]
+
+        tasks = [
+            (bus, functools.partial(run_batch, method_class, positions))
+            for (method_class, bus), positions in batches.items()
+        ]
+        results: List[Union[int, None]] = [None] * len(monitors)
+        failed = []
+        for outcomes in fan_out(tasks):
+            for position, value in outcomes:
+                if isinstance(value, Exception):
+                    failed.append((position, value))
+                else:
+                    results[position] = value
+        # report errors in the same order as the displays
+        for position, error in sorted(failed, key=lambda f: f[0]):
+            errors.append((monitors[position], error))
+
+        output += results
 
     if output:
         output_is_none = set(output) == {None}
@@ -742,19 +1115,57 @@ def __brightness(
             return None if no_return else output
 
     # if the function hasn't returned then it has failed
+    raise __brightness_error(errors, verbose_error)
+
+
+def __per_display(
+    func: Callable[['Display'], Optional[int]],
+    display: Optional[DisplayIdentifier] = None,
+    method: Optional[str] = None,
+    allow_duplicates: Optional[bool] = None,
+    verbose_error: bool = False,
+    allow_none: bool = False
+) -> List[Union[int, None]]:
+    '''
+    Internal function that calls `func` with a `Display` for each selected display and
+    returns the results. Failed displays return None. If they all fail, a `ScreenBrightnessError`
+    is raised in the same format as `__brightness`, unless `allow_none` is set and at least
+    one of them did not raise an exception.
+    '''
+    output: List[Union[int, None]] = []
+    errors: List[Tuple[dict, Exception]] = []
+    with discovery_context():
+        for monitor in filter_monitors(display=display, method=method, allow_duplicates=allow_duplicates):
+            try:
+                output.append(func(Display.from_dict(monitor)))
+            except Exception as e:
+                output.append(None)
+                errors.append((monitor, e))
+
+    # as with `__brightness`, failed displays are left as None as long as one of them succeeded
+    if any(i is not None for i in output) or (allow_none and len(errors) < len(output)):
+        return output
+    raise __brightness_error(errors, verbose_error)
+
+
+def __brightness_error(errors: List[Tuple[dict, Exception]], verbose_error: bool) -> ScreenBrightnessError:
+    '''Internal function that builds the error raised when no display gave a valid result'''
     msg = '\n'
     if errors:
-        for monitor, exc_name, exc in errors:
+        for monitor, error in errors:
             if isinstance(monitor, str):
                 msg += f'\t{monitor}'
             else:
                 msg += f'\t{monitor["name"]} ({monitor["serial"]})'
-            msg += f' -> {exc_name}: '
+            msg += f' -> {type(error).__name__}: '
+            exc = (
+                ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+                if verbose_error else error
+            )
             msg += str(exc).replace('\n', '\n\t\t') + '\n'
     else:
         msg += '\tno valid output was received from brightness methods'
-
-    raise ScreenBrightnessError(msg)
+    return ScreenBrightnessError(msg)
 
 
 if platform.system() == 'Windows':
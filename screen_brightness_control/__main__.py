@@ -1,12 +1,20 @@
 import argparse
+import functools
+import threading
 import time
+from typing import Union
+
 import screen_brightness_control as SBC
 
 
-def get_monitors(args):
+def get_monitors(args, with_bus=False):
     filtered = SBC.filter_monitors(display=args.display, method=args.method, allow_duplicates=args.allow_duplicates)
     for monitor in filtered:
-        yield SBC.Display.from_dict(monitor)
+        if with_bus:
+            # displays on the same bus are never talked to at the same time. See `SBC.helpers.fan_out`
+            yield monitor['method'].bus(monitor), SBC.Display.from_dict(monitor)
+        else:
+            yield SBC.Display.from_dict(monitor)
 
 
 if __name__ == '__main__':
@@ -34,23 +42,37 @@ if __name__ == '__main__':
     if (args.get, args.set) != (False, None):
         try:
             arrow = ':' if args.get else ' ->'
-            for monitor in get_monitors(args):
-                name = monitor.name
-                if args.verbose:
-                    name += f' ({monitor.serial}) [{monitor.method.__name__}]'
+            print_lock = threading.Lock()
+
+            def get_set(monitor: SBC.Display):
+                ret_val: Union[int, Exception]
                 try:
                     if args.set:
                         monitor.set_brightness(args.set)
                     ret_val = monitor.get_brightness()
-
                     if ret_val is None:
                         raise Exception
-                    print(f'{name}{arrow} {ret_val}%')
                 except Exception as e:
-                    if args.verbose:
-                        print(f'{name}{arrow} Failed: {e}')
+                    ret_val = e
+
+                # print each result as soon as it is ready, rather than waiting for the slowest display
+                name = str(monitor.name)
+                if args.verbose:
+                    name += f' ({monitor.serial}) [{monitor.method.__name__}]'
+                with print_lock:
+                    if isinstance(ret_val, Exception):
+                        if args.verbose:
+                            print(f'{name}{arrow} Failed: {ret_val}')
+                        else:
+                            print(f'{name}{arrow} Failed')
                     else:
-                        print(f'{name}{arrow} Failed')
+                        print(f'{name}{arrow} {ret_val}%')
+
+            with SBC.helpers.discovery_context():
+                # displays on different buses are handled in parallel if `SBC.config.PARALLEL` is enabled
+                SBC.helpers.fan_out([
+                    (bus, functools.partial(get_set, monitor)) for bus, monitor in get_monitors(args, with_bus=True)
+                ])
         except Exception:
             kw = {
                 'display': args.display,
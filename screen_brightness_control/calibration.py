@@ -0,0 +1,224 @@
+'''
+Per-display calibration, so that displays which look different at the same brightness
+percentage can be made to match.
+
+A calibration maps each logical brightness percentage (what you pass to `.set_brightness`
+and get back from `.get_brightness`) onto the native percentage that is actually sent to
+a display. Calibrations are stored as 101 entry lookup tables, one entry per percentage,
+along with the inverse table used to translate readings back again. They are keyed by EDID,
+so they follow a display around whichever port or method it is connected with.
+Displays without an EDID can't be calibrated.
+
+Once a calibration is registered it is applied automatically whenever the brightness of
+that display is set or read, including during fades.
+
+Calibration is applied after the `force` lower bound on Linux, so a calibration that
+maps 1% onto 0% can still turn off the backlight.
+
+Example:
+    ```python
+    import screen_brightness_control as sbc
+
+    # this display is much brighter than the others, so tone it down
+    edid = sbc.list_monitors_info()[0]['edid']
+    sbc.calibration.register(edid, {0: 0, 50: 30, 100: 80})
+
+    # or load calibrations for a whole wall of displays from a file
+    sbc.calibration.load('calibration.json')
+
+    # every display now looks like it is at 50%
+    sbc.set_brightness(50)
+    ```
+'''
+import json
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Mapping, Optional, Sequence, Union
+
+from .types import FloatPercentage, IntPercentage
+
+_logger = logging.getLogger(__name__)
+
+CalibrationLike = Union['Calibration', Sequence[int], Mapping[int, int]]
+'''A `Calibration`, a table of 101 native percentages or a dict of control points (see `Calibration.from_points`)'''
+
+
+class Calibration():
+    '''Maps logical brightness percentages onto the native percentages of a display, and back again'''
+
+    def __init__(self, table: Sequence[int]):
+        '''
+        Args:
+            table: 101 native percentages, one for each logical percentage. Must never decrease
+
+        Raises:
+            ValueError: if the table is the wrong size, out of range or decreases
+        '''
+        if len(table) != 101:
+            raise ValueError(f'calibration tables must have 101 entries, not {len(table)}')
+        if any(not 0 <= i <= 100 for i in table):
+            raise ValueError('calibration table values must be between 0 and 100')
+        if any(a > b for a, b in zip(table, table[1:])):
+            raise ValueError('calibration table values must never decrease')
+
+        self.table = array('B', (int(i) for i in table))
+        '''The native percentage for each logical percentage'''
+        self.inverse = array('B', bytes(101))
+        '''The logical percentage for each native percentage'''
+        for native in range(101):
+            # the logical value whose native value is closest, preferring the lower one
+            logical = bisect_left(self.table, native)
+            if logical > 100 or (logical > 0 and native - self.table[logical - 1] <= self.table[logical] - native):
+                logical -= 1
+            self.inverse[native] = logical
+
+    @classmethod
+    def from_points(cls, points: Mapping[int, int]) -> 'Calibration':
+        '''
+        Build a calibration by drawing straight lines between control points
+
+        Args:
+            points: logical percentages and the native percentage each one should map onto.
+                Values below the lowest point and above the highest point are mapped linearly
+                towards 0 and 100 respectively, unless 0 or 100 are given as points
+        '''
+        points = {0: 0, 100: 100, **points}
+        logical = sorted(points)
+        table = []
+        for i in range(len(logical) - 1):
+            (x0, y0), (x1, y1) = (logical[i], points[logical[i]]), (logical[i + 1], points[logical[i + 1]])
+            table += [round(y0 + (y1 - y0) * (x - x0) / (x1 - x0)) for x in range(x0, x1)]
+        table.append(points[100])
+        return cls(table)
+
+    def to_native(self, value: IntPercentage) -> IntPercentage:
+        '''Returns the native percentage for a logical percentage'''
+        return self.table[value]
+
+    def to_logical(self, value: IntPercentage) -> IntPercentage:
+        '''Returns the logical percentage for a native percentage'''
+        return self.inverse[value]
+
+    def to_native_float(self, value: FloatPercentage) -> FloatPercentage:
+        '''Returns the native percentage for a fractional logical percentage, interpolating between entries'''
+        return _interpolate(self.table, value)
+
+    def to_logical_float(self, value: FloatPercentage) -> FloatPercentage:
+        '''Returns the logical percentage for a fractional native percentage, interpolating between entries'''
+        return _interpolate(self.inverse, value)
+
+    def __eq__(self, other):
+        return isinstance(other, Calibration) and self.table == other.table
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.table.tolist()})'
+
+
+def _interpolate(table: array, value: FloatPercentage) -> FloatPercentage:
+    value = min(100.0, max(0.0, value))
+    index = min(int(value), 99)
+    return table[index] + (table[index + 1] - table[index]) * (value - index)
+
+
+_calibrations: Dict[str, Calibration] = {}
+_lock = threading.Lock()
+
+
+def _key(edid: str) -> str:
+    return edid.lower()
+
+
+def register(edid: str, calibration: CalibrationLike):
+    '''
+    Calibrate a display
+
+    Args:
+        edid: the EDID of the display (see `.Display.edid`)
+        calibration: see `CalibrationLike`
+    '''
+    if isinstance(calibration, Mapping):
+        calibration = Calibration.from_points({int(k): int(v) for k, v in calibration.items()})
+    elif not isinstance(calibration, Calibration):
+        calibration = Calibration(calibration)
+    with _lock:
+        _calibrations[_key(edid)] = calibration
+
+
+def unregister(edid: Optional[str] = None):
+    '''
+    Remove the calibration for a display
+
+    Args:
+        edid: the EDID of the display. If unspecified, all calibrations are removed
+    '''
+    with _lock:
+        if edid is None:
+            _calibrations.clear()
+        else:
+            _calibrations.pop(_key(edid), None)
+
+
+def get(edid: Optional[str]) -> Optional[Calibration]:
+    '''Returns the calibration for a display, or None if it isn't calibrated'''
+    if edid is None or not _calibrations:
+        return None
+    return _calibrations.get(_key(edid))
+
+
+def load(path: str) -> int:
+    '''
+    Register calibrations from a JSON file. The file should contain an object mapping
+    each display's EDID onto either a list of 101 native percentages, or an object
+    of control points (see `Calibration.from_points`). For example:
+    `{"00ffffffffffff00...": {"0": 0, "50": 30, "100": 80}}`
+
+    Args:
+        path: the file to load
+
+    Returns:
+        The number of calibrations loaded
+
+    Raises:
+        ValueError: if any of the calibrations are invalid. Nothing is registered if so
+    '''
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f'{path} should contain a JSON object of EDIDs and calibrations')
+
+    loaded = {}
+    for edid, calibration in data.items():
+        if isinstance(calibration, dict):
+            loaded[edid] = Calibration.from_points({int(k): int(v) for k, v in calibration.items()})
+        else:
+            loaded[edid] = Calibration(calibration)
+    for edid, calibration in loaded.items():
+        register(edid, calibration)
+    _logger.debug(f'loaded {len(loaded)} calibrations from {path}')
+    return len(loaded)
+
+
+def to_native(edid: Optional[str], value: IntPercentage) -> IntPercentage:
+    '''Returns the native percentage for a logical percentage on a display. Uncalibrated displays are unchanged'''
+    calibration = get(edid)
+    return value if calibration is None else calibration.table[min(100, max(0, value))]
+
+
+def to_logical(edid: Optional[str], value: IntPercentage) -> IntPercentage:
+    '''Returns the logical percentage for a native percentage on a display. Uncalibrated displays are unchanged'''
+    calibration = get(edid)
+    return value if calibration is None else calibration.inverse[min(100, max(0, value))]
+
+
+def to_native_float(edid: Optional[str], value: FloatPercentage) -> FloatPercentage:
+    '''Same as `to_native`, for fractional percentages'''
+    calibration = get(edid)
+    return value if calibration is None else calibration.to_native_float(value)
+
+
+def to_logical_float(edid: Optional[str], value: FloatPercentage) -> FloatPercentage:
+    '''Same as `to_logical`, for fractional percentages'''
+    calibration = get(edid)
+    return value if calibration is None else calibration.to_logical_float(value)
@@ -28,3 +28,44 @@ Default value for the `method` parameter in top-level functions.
 
 For available values, see `.get_methods`
 '''
+
+DISK_CACHE: bool = False
+'''
+Persist the displays discovered by slower methods (eg: `I2C` and `DDCUtil` on Linux) to disk,
+so that short-lived processes can skip display discovery when nothing has changed.
+'''
+
+SHADOW_TTL: float = 0
+'''
+How long, in seconds, the last brightness value read from or written to a display is trusted for.
+Within this window reads are answered without talking to the display, and writes of the value
+the display is already at are skipped. Set to 0 (the default) to always talk to the display.
+See `.helpers.ShadowState`.
+'''
+
+PARALLEL: bool = False
+'''
+Talk to displays on different buses at the same time, using a thread pool shared by the
+whole library, rather than one after another. Displays on the same bus (see `.helpers.BrightnessMethod.bus`)
+are still handled one at a time.
+'''
+
+PARALLEL_WORKERS: int = 8
+'''
+The maximum number of threads used when `PARALLEL` is enabled. This is read when the thread pool
+is first used, so changing it afterwards has no effect.
+'''
+
+BUS_LOCKING: bool = False
+'''
+Hold an advisory lock on each I2C bus for the duration of every DDC/CI transaction (see `.linux.BusLocks`),
+so that several processes using this library (eg: a daemon and an ad-hoc CLI call) can't
+interleave their packets on the same bus. Linux only.
+'''
+
+ADAPTIVE_DDC_TIMING: bool = False
+'''
+Learn how quickly each display responds to DDC/CI reads and shorten the wait before reading
+replies accordingly (see `.linux.I2C.TimingProfiles`). Learned timings are persisted to
+`.linux.I2C.timing_profiles_path`. Writes always keep to the DDC/CI spec timings. Linux only.
+'''
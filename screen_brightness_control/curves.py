@@ -0,0 +1,250 @@
+'''
+Brightness curves, used to pick the values that fades step through.
+
+Each curve is a lookup table covering the 0-100 domain. Entry `x` of the table is how far
+through the brightness range (as a percentage) a fade should be once it is `x` percent of the
+way through its steps. Fades that brighten a display follow the curve forwards and fades that
+dim it follow the curve backwards, so that the shape applies to brightness levels rather than
+to the direction of travel. For example, the `LOGARITHMIC` curve takes small steps at low
+brightness levels both on the way up and on the way down.
+
+The values of each fade are worked out once per curve, start, stop and step and are then cached,
+so repeating a fade (or running the same fade on many displays) does no maths at all.
+
+Example:
+    ```python
+    import screen_brightness_control as sbc
+
+    # fade to 100% following the CIE L* perceptual lightness curve
+    sbc.fade_brightness(100, curve='cie_lstar')
+
+    # a gamma curve with any exponent
+    sbc.fade_brightness(100, curve='gamma-2.2')
+
+    # a custom curve, mapping progress (0 to 1) onto brightness (0 to 1)
+    sbc.fade_brightness(100, curve=lambda x: x ** 3)
+    ```
+'''
+import math
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+from .helpers import logarithmic_range
+
+DOMAIN = 100
+'''The highest value in each curve's table. Tables have `DOMAIN + 1` entries'''
+
+
+class Curve():
+    '''A brightness curve, stored as a lookup table over the 0-100 domain'''
+
+    def __init__(self, name: str, table: Sequence[float]):
+        '''
+        Args:
+            name: what the curve is called
+            table: `DOMAIN + 1` values between 0 and 100, one for each percentage through a fade
+        '''
+        if len(table) != DOMAIN + 1:
+            raise ValueError(f'curve tables must have {DOMAIN + 1} entries, not {len(table)}')
+        self.name = name
+        self.table: Tuple[float, ...] = tuple(min(100.0, max(0.0, float(i))) for i in table)
+
+    @classmethod
+    def from_function(cls, name: str, func: Callable[[float], float]) -> 'Curve':
+        '''
+        Build a curve by sampling a function
+
+        Args:
+            name: what the curve is called
+            func: maps progress through a fade (0 to 1) onto progress through
+                the brightness range (0 to 1)
+        '''
+        return cls(name, [func(x / DOMAIN) * 100 for x in range(DOMAIN + 1)])
+
+    def __call__(self, x: int) -> float:
+        '''Look up the curve at `x` percent of the way through a fade'''
+        return self.table[x]
+
+    def at(self, position: float) -> float:
+        '''Look up the curve at `position` percent of the way through a fade, interpolating between entries'''
+        index = min(int(position), DOMAIN - 1)
+        return self.table[index] + (self.table[index + 1] - self.table[index]) * (position - index)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name!r})'
+
+    def range(self, start: int, stop: int, step: int = 1) -> Tuple[int, ...]:
+        '''
+        A `range`-like sequence of integers following this curve from `start` (inclusive)
+        to `stop` (inclusive), with consecutive duplicates removed.
+
+        As with `range`, the sign of `step` must match the direction from `start` to `stop`,
+        otherwise the sequence is empty. Values are never less than 0 or greater than 100.
+
+        Args:
+            start: the start of your percentage range
+            stop: the end of your percentage range
+            step: the increment per iteration through the sequence
+        '''
+        return _compile_range(self, int(max(0, start)), int(min(100, stop)), step)
+
+    def float_range(self, start: float, stop: float, step: float = 1) -> Tuple[float, ...]:
+        '''
+        Same as `Curve.range` but for fractional percentages, eg: for displays with more than
+        100 steps of brightness. `step` may be a fraction of a percent.
+
+        Args:
+            start: the start of your percentage range
+            stop: the end of your percentage range
+            step: the distance between each value, before the curve is applied
+        '''
+        return _compile_float_range(self, float(max(0, start)), float(min(100, stop)), float(step))
+
+
+@lru_cache(maxsize=1024)
+def _compile_range(curve: Curve, start: int, stop: int, step: int) -> Tuple[int, ...]:
+    if step == 0:
+        raise ValueError('step must not be zero')
+    if (stop - start) * step < 0:
+        return ()
+    low, high = min(start, stop), max(start, stop)
+    span = high - low
+    if span == 0:
+        return (start,)
+
+    values: List[int] = []
+    for distance in range(0, span + 1, abs(step)):
+        position = distance * DOMAIN / span
+        if start > stop:
+            # dimming follows the curve backwards
+            position = DOMAIN - position
+        # the small offset stops float rounding from landing just short of a whole number
+        value = int(low + span * curve.at(position) / 100 + 1e-9)
+        if not values or values[-1] != value:
+            values.append(value)
+    return tuple(values)
+
+
+@lru_cache(maxsize=256)
+def _compile_float_range(curve: Curve, start: float, stop: float, step: float) -> Tuple[float, ...]:
+    if step == 0:
+        raise ValueError('step must not be zero')
+    if (stop - start) * step < 0:
+        return ()
+    low, high = min(start, stop), max(start, stop)
+    span = high - low
+    if span == 0:
+        return (start,)
+
+    values: List[float] = []
+    for count in range(math.ceil(span / abs(step) - 1e-9) + 1):
+        position = min(DOMAIN, count * abs(step) * DOMAIN / span)
+        if start > stop:
+            position = DOMAIN - position
+        value = low + span * curve.at(position) / 100
+        if not values or values[-1] != value:
+            values.append(value)
+    return tuple(values)
+
+
+class _LogarithmicCurve(Curve):
+    '''
+    The logarithmic curve. Its integer ranges are exactly the values of `.helpers.logarithmic_range`,
+    which fades have always followed, worked out once and cached like those of any other curve
+    '''
+
+    def range(self, start: int, stop: int, step: int = 1) -> Tuple[int, ...]:
+        return _compile_logarithmic_range(int(max(0, start)), int(min(100, stop)), step)
+
+
+@lru_cache(maxsize=1024)
+def _compile_logarithmic_range(start: int, stop: int, step: int) -> Tuple[int, ...]:
+    if step == 0:
+        raise ValueError('step must not be zero')
+    if (stop - start) * step < 0:
+        return ()
+    return tuple(logarithmic_range(start, stop, step))
+
+
+def _cie_lstar(x: float) -> float:
+    '''Relative luminance for a CIE L* lightness of `x * 100`'''
+    lightness = x * 100
+    if lightness > 8:
+        return ((lightness + 16) / 116) ** 3
+    return lightness / 903.3
+
+
+def _ease_in_out(x: float) -> float:
+    return x * x * (3 - 2 * x)
+
+
+LINEAR = Curve('linear', range(DOMAIN + 1))
+'''Evenly spaced steps'''
+LOGARITHMIC: Curve = _LogarithmicCurve('logarithmic', [10 ** (x / 50) for x in range(DOMAIN + 1)])
+'''`y = 10 ^ (x / 50)`. This is the default for fades. See `.helpers.logarithmic_range`'''
+CIE_LSTAR = Curve.from_function('cie_lstar', _cie_lstar)
+'''Steps that are evenly spaced in perceived lightness, following the CIE 1976 L* formula'''
+EASE_IN = Curve.from_function('ease_in', lambda x: x * x)
+'''Starts slowly and speeds up (quadratic)'''
+EASE_OUT = Curve.from_function('ease_out', lambda x: 1 - (1 - x) * (1 - x))
+'''Starts quickly and slows down (quadratic)'''
+EASE_IN_OUT = Curve.from_function('ease_in_out', _ease_in_out)
+'''Starts and ends slowly (smoothstep)'''
+
+CURVES: Dict[str, Curve] = {
+    curve.name: curve for curve in (LINEAR, LOGARITHMIC, CIE_LSTAR, EASE_IN, EASE_OUT, EASE_IN_OUT)
+}
+'''The built-in curves by name. Gamma curves are named `'gamma-N'`, eg: `'gamma-2.2'` (see `gamma`)'''
+
+CurveLike = Union[str, Curve, Callable[[float], float]]
+'''
+A curve name (see `CURVES`), a `Curve` or a function mapping progress through
+a fade (0 to 1) onto progress through the brightness range (0 to 1)
+'''
+
+
+@lru_cache(maxsize=None)
+def gamma(exponent: float) -> Curve:
+    '''
+    A gamma curve: `y = x ^ exponent`
+
+    Args:
+        exponent: the gamma value. Values above 1 take smaller steps at low brightness levels
+    '''
+    if not exponent > 0 or math.isinf(exponent):
+        raise ValueError(f'gamma exponent must be a positive number, not {exponent}')
+    return Curve.from_function(f'gamma-{exponent:g}', lambda x: x ** exponent)
+
+
+@lru_cache(maxsize=128)
+def _compile(func: Callable[[float], float]) -> Curve:
+    return Curve.from_function(getattr(func, '__name__', repr(func)), func)
+
+
+def get_curve(curve: CurveLike) -> Curve:
+    '''
+    Look up a curve. Custom curves are sampled into a table the first time
+    they are used and cached afterwards.
+
+    Args:
+        curve: see `CurveLike`
+
+    Raises:
+        ValueError: if `curve` is not a known name
+        TypeError: if `curve` is not a name, curve or function
+    '''
+    if isinstance(curve, Curve):
+        return curve
+    if isinstance(curve, str):
+        name = curve.lower()
+        if name in CURVES:
+            return CURVES[name]
+        if name.startswith('gamma-'):
+            try:
+                return gamma(float(name[6:]))
+            except ValueError:
+                pass
+        raise ValueError(f'unknown curve {curve!r}, expected one of {list(CURVES)} or "gamma-N"')
+    if callable(curve):
+        return _compile(curve)
+    raise TypeError(f'curve must be a str, Curve or function, not {type(curve).__name__}')
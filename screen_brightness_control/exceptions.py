@@ -28,6 +28,11 @@ class I2CValidationError(ScreenBrightnessError):
     ...
 
 
+class BusLockTimeoutError(ScreenBrightnessError, TimeoutError):
+    '''Timed out waiting for another thread or process to release an I2C bus'''
+    ...
+
+
 class MaxRetriesExceededError(ScreenBrightnessError, subprocess.CalledProcessError):
     '''
     The command has been retried too many times.
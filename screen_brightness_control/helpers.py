@@ -3,13 +3,25 @@ Helper functions for the library
 '''
 from __future__ import annotations
 
+import contextvars
+import heapq
+import itertools
 import logging
 import struct
 import subprocess
+import threading
 import time
 from abc import ABC, abstractmethod
-from functools import lru_cache
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache, wraps
+from typing import (Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple, TypeVar,
+                    Union, cast)
+
+from . import config
 
 from .exceptions import (EDIDParseError, MaxRetriesExceededError,  # noqa:F401
                          ScreenBrightnessError, format_exc)
@@ -124,7 +136,899 @@ MONITOR_MANUFACTURER_CODES = {
 }
 
 
+class DiscoveryContext:
+    '''
+    Remembers what has been discovered during a single top-level API call (eg: `get_brightness`),
+    so that each brightness method only enumerates its displays once per call, no matter how
+    many displays are being queried.
+
+    See `discovery_context`.
+    '''
+
+    def __init__(self):
+        self._memo: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    def memo(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        '''
+        Returns the value remembered for a key, calling `loader` to get it the first time
+
+        Args:
+            key: identifies the value, eg: `(SysFiles, 'get_display_info')`
+            loader: called to get the value if it has not been remembered yet
+        '''
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = loader()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+    def peek(self, key: Hashable) -> Any:
+        '''Returns the value remembered for a key without loading it, or None'''
+        with self._lock:
+            return self._memo.get(key)
+
+    def forget(self, key: Optional[Hashable] = None):
+        '''
+        Forget a remembered value, eg: because it has been changed
+
+        Args:
+            key: the key to forget. If unspecified, everything is forgotten
+        '''
+        with self._lock:
+            if key is None:
+                self._memo.clear()
+            else:
+                self._memo.pop(key, None)
+
+
+_discovery_context: ContextVar[Optional[DiscoveryContext]] = ContextVar('sbc_discovery_context', default=None)
+
+
+def current_discovery_context() -> Optional[DiscoveryContext]:
+    '''Returns the active `DiscoveryContext`, if there is one'''
+    return _discovery_context.get()
+
+
+@contextmanager
+def discovery_context() -> Iterator[DiscoveryContext]:
+    '''
+    Open a `DiscoveryContext` for the duration of a top-level API call.
+    If one is already open, it is re-used so nested calls share what has been discovered.
+    '''
+    context = _discovery_context.get()
+    if context is not None:
+        yield context
+        return
+    context = DiscoveryContext()
+    token = _discovery_context.set(context)
+    try:
+        yield context
+    finally:
+        _discovery_context.reset(token)
+
+
+PRIORITY_INTERACTIVE = 0
+'''Priority of requests made directly by the user, eg: `set_brightness`. These are handled first'''
+PRIORITY_FADE = 1
+'''Priority of the individual steps of a fade'''
+PRIORITY_BACKGROUND = 2
+'''Priority of background work, eg: periodically polling the brightness of a display'''
+
+_priority: ContextVar[int] = ContextVar('sbc_priority', default=PRIORITY_INTERACTIVE)
+
+
+def current_priority() -> int:
+    '''Returns the priority of brightness requests made in the current context. See `priority`'''
+    return _priority.get()
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    '''
+    Set the priority of the brightness requests made within this block. Methods that queue
+    requests for a shared resource (eg: `.linux.I2C`) send higher priority (lower numbered)
+    requests first.
+
+    Args:
+        level: one of `PRIORITY_INTERACTIVE`, `PRIORITY_FADE` or `PRIORITY_BACKGROUND`
+    '''
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+_T = TypeVar('_T')
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_thread_pool_lock = threading.Lock()
+_worker = threading.local()
+
+
+def thread_pool() -> ThreadPoolExecutor:
+    '''Returns the thread pool shared by the whole library, creating it on first use'''
+    global _thread_pool
+    with _thread_pool_lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=max(1, config.PARALLEL_WORKERS), thread_name_prefix='sbc-worker',
+                initializer=setattr, initargs=(_worker, 'active', True)
+            )
+        return _thread_pool
+
+
+def fan_out(tasks: Sequence[Tuple[Hashable, Callable[[], _T]]]) -> List[_T]:
+    '''
+    Run a number of tasks, in parallel if `.config.PARALLEL` is enabled.
+
+    Tasks that share a lane (eg: displays on the same I2C bus) are run one after another,
+    in the order given. Different lanes are run at the same time on the shared `thread_pool`.
+    Each lane runs in a copy of the caller's `contextvars` context, so an open
+    `DiscoveryContext` is still used.
+
+    Tasks are run in the calling thread when parallelism is disabled, when there is only
+    one lane or when already running on the thread pool, which avoids starving the pool.
+
+    Args:
+        tasks: a list of lanes and tasks
+
+    Returns:
+        The return value of each task, in the same order as `tasks`
+
+    Raises:
+        Exception: the first exception raised by a task, once all tasks have finished
+    '''
+    lanes: Dict[Hashable, List[int]] = {}
+    for position, (lane, _) in enumerate(tasks):
+        lanes.setdefault(lane, []).append(position)
+
+    if not config.PARALLEL or len(lanes) < 2 or getattr(_worker, 'active', False):
+        return [task() for _, task in tasks]
+
+    results: List[Any] = [None] * len(tasks)
+    errors: Dict[int, Exception] = {}
+
+    def run_lane(positions: List[int]):
+        for position in positions:
+            try:
+                results[position] = tasks[position][1]()
+            except Exception as e:
+                errors[position] = e
+
+    pool = thread_pool()
+    futures = [pool.submit(contextvars.copy_context().run, run_lane, positions) for positions in lanes.values()]
+    for future in futures:
+        future.result()
+
+    if errors:
+        raise errors[min(errors)]
+    return results
+
+
+class Fade():
+    '''
+    Handle for a fade that is being driven by the `FadeEngine`.
+
+    It can be used like the `threading.Thread` that fades used to run in: `join` waits
+    for the fade to finish and `is_alive` checks whether it is still running.
+    '''
+
+    def __init__(self, engine: 'FadeEngine'):
+        self._engine = engine
+        self._done = threading.Event()
+        self._track: Optional[_FadeTrack] = None
+        self.cancelled = False
+        '''Whether the fade was cancelled, or taken over by a newer fade on the same display'''
+        self.error: Optional[Exception] = None
+        '''The exception that stopped the fade early, if any'''
+
+    def cancel(self):
+        '''Stop the fade, leaving the display at whatever brightness it has reached'''
+        self._engine.cancel(self)
+
+    def is_alive(self) -> bool:
+        '''Returns whether the fade is still running'''
+        return not self._done.is_set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        '''
+        Wait for the fade to finish
+
+        Args:
+            timeout: the longest time to wait, in seconds. If unspecified, waits indefinitely
+
+        Returns:
+            Whether the fade has finished
+        '''
+        return self._done.wait(timeout)
+
+    def _finish(self, cancelled: bool = False, error: Optional[Exception] = None):
+        self.cancelled = cancelled
+        self.error = error
+        self._done.set()
+
+
+class _FadeTrack():
+    '''The brightness values being written to one display'''
+
+    def __init__(self, key: Hashable, setter: Callable[[float], Any], fade: Fade):
+        self.key = key
+        self.setter = setter
+        self.fade = fade
+        self.values: List[float] = []
+        self.position = 0
+        self.group: Optional[_FadeGroup] = None
+        self.in_flight = False
+        self.stopped = False
+        self.last_value: Optional[float] = None
+
+
+class _FadeGroup():
+    '''
+    Displays that step through their fades together, on the same schedule.
+    A fade on a single display is a group of one
+    '''
+
+    def __init__(self, interval: float, duration: Optional[float], started: float, precise: bool = False):
+        self.tracks: List[_FadeTrack] = []
+        self.interval = interval
+        self.duration = duration
+        self.precise = precise
+        '''Whether each step is spun up to, rather than slept until. See `FadeEngine.SPIN_THRESHOLD`'''
+        self.started = self.due = started
+        self.generation = 0
+        '''Bumped whenever the schedule changes, invalidating anything already queued'''
+        self.pending = 0
+        '''How many writes from the current step are still in flight'''
+
+
+class FadeEngine():
+    '''
+    Drives every active fade from a single scheduler thread, rather than a thread per display per fade.
+
+    Each step of a fade is written on the shared `thread_pool`, so one slow display doesn't hold
+    up the others, and each display only ever has one write in flight. A new stoppable fade on
+    a display that is already fading takes over the existing fade, carrying on from the
+    brightness it has reached, rather than starting another one alongside it.
+
+    Fades can either step through every value with a fixed interval between steps, or be given
+    a duration. Timed fades pick each value from the time elapsed, allowing for how long writes
+    to that display are taking, and skip whatever values they have fallen behind on. This way
+    they finish on time on slow displays (eg: DDC/CI) and still step through every value on fast ones.
+
+    Fades started together with `start_group` are synchronized: every display in the group is
+    written at the same timestamps, and the group only moves on once all of its writes have
+    finished, so the displays never drift apart. Their steps are timed against a monotonic clock,
+    sleeping until just before each one is due and then spinning for the rest, since a plain
+    sleep can overshoot by a millisecond or more. Other fades just sleep until each step is due.
+    How closely writes keep to their schedule is recorded per display (see `telemetry`).
+
+    The scheduler thread exits after `IDLE_TIMEOUT` seconds without any fades and is
+    restarted when needed.
+    '''
+    IDLE_TIMEOUT = 5.0
+    '''How long the scheduler thread waits for new fades before exiting'''
+    LATENCY_SMOOTHING = 0.3
+    '''Weight given to the latest write when updating the average write latency of a display'''
+    SPIN_THRESHOLD = 0.002
+    '''
+    How long before a step of a synchronized fade (see `start_group`) is due, in seconds, that the
+    scheduler stops sleeping and starts spinning
+    '''
+    TELEMETRY_SIZE = 1000
+    '''How many of the most recent writes to each display are kept for `telemetry`'''
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        '''
+        Args:
+            clock: returns the current time in seconds. Must be monotonic
+        '''
+        self.clock = clock
+        self._condition = threading.Condition()
+        self._queue: List[Tuple[float, int, _FadeGroup, int]] = []
+        self._tracks: Dict[Hashable, _FadeTrack] = {}
+        self._latency: Dict[Hashable, float] = {}
+        self._writes: Dict[Hashable, Deque[Tuple[float, float, float]]] = {}
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def position(self, key: Hashable) -> Optional[float]:
+        '''
+        Returns the last brightness written by the stoppable fade running on a display,
+        or None if there isn't one
+
+        Args:
+            key: identifies the display
+        '''
+        with self._condition:
+            track = self._tracks.get(key)
+            return None if track is None else track.last_value
+
+    def latency(self, key: Hashable) -> Optional[float]:
+        '''
+        Returns the average time taken to write a fade step to a display, in seconds,
+        or None if nothing has been written to it yet
+
+        Args:
+            key: identifies the display
+        '''
+        with self._condition:
+            return self._latency.get(key)
+
+    def telemetry(self, reset: bool = False) -> Dict[Hashable, Dict[str, Any]]:
+        '''
+        Get timing statistics for the fade steps written to each display.
+        Jitter is how late a write started compared to when it was scheduled.
+
+        Args:
+            reset: forget the recorded writes after reading them
+
+        Returns:
+            A dict of display keys and their statistics:
+            - writes (`int`): how many writes were recorded
+            - jitter_p50, jitter_p90, jitter_p99 (`float`): jitter percentiles, in seconds
+            - jitter_max (`float`): the worst jitter, in seconds
+            - samples (`list`): the scheduled time, actual start time and finish time of each write
+        '''
+        with self._condition:
+            result: Dict[Hashable, Dict[str, Any]] = {}
+            for key, writes in self._writes.items():
+                jitter = sorted(started - scheduled for scheduled, started, _ in writes)
+                result[key] = {
+                    'writes': len(jitter),
+                    **{f'jitter_p{p}': _percentile(jitter, p) for p in (50, 90, 99)},
+                    'jitter_max': jitter[-1] if jitter else 0.0,
+                    'samples': list(writes)
+                }
+            if reset:
+                self._writes = {}
+            return result
+
+    def start(
+        self,
+        key: Hashable,
+        setter: Callable[[float], Any],
+        values: List[float],
+        interval: float,
+        stoppable: bool = True,
+        duration: Optional[float] = None
+    ) -> Fade:
+        '''
+        Start a fade. Any stoppable fade already running on the same display is stopped.
+
+        Args:
+            key: identifies the display being faded
+            setter: called with each value in turn, on the shared `thread_pool`
+            values: the brightness values to step through
+            interval: the time between the start of each step, in seconds
+            stoppable: whether a newer fade on the same display can stop this one.
+                If so, and this display is already fading, this fade takes over that one
+            duration: how long the fade should take, in seconds. Values are skipped if
+                the display can't keep up. `interval` is ignored if this is given
+
+        Returns:
+            A handle for the fade
+        '''
+        return self._start([(key, setter, values)], interval, stoppable, duration, precise=False)[0]
+
+    def start_group(
+        self,
+        fades: Sequence[Tuple[Hashable, Callable[[float], Any], List[float]]],
+        interval: float,
+        stoppable: bool = True,
+        duration: Optional[float] = None
+    ) -> List[Fade]:
+        '''
+        Start fades on several displays that step in lockstep with each other.
+        Each step is written to every display at the same time, and the next step
+        waits until all of those writes have finished.
+
+        Args:
+            fades: the key, setter and values of each display being faded. See `start`
+            interval: the time between the start of each step, in seconds
+            stoppable: see `start`
+            duration: how long the fades should take, in seconds. Every display picks its
+                values from the same point in the fade, allowing for the slowest of them. See `start`
+
+        Returns:
+            A handle for each fade, in the same order as `fades`
+        '''
+        return self._start(fades, interval, stoppable, duration, precise=True)
+
+    def _start(
+        self,
+        fades: Sequence[Tuple[Hashable, Callable[[float], Any], List[float]]],
+        interval: float,
+        stoppable: bool,
+        duration: Optional[float],
+        precise: bool
+    ) -> List[Fade]:
+        handles = []
+        with self._condition:
+            group = _FadeGroup(interval, duration, self.clock(), precise)
+            for key, setter, values in fades:
+                fade = Fade(self)
+                handles.append(fade)
+                track = self._tracks.pop(key, None)
+                if track is not None:
+                    track.fade._finish(cancelled=True)
+                    if stoppable:
+                        self._leave(track)
+                        track.fade, track.setter = fade, setter
+                    else:
+                        self._stop(track)
+                        track = None
+                if track is None:
+                    track = _FadeTrack(key, setter, fade)
+                fade._track = track
+
+                track.values = list(values)
+                track.position = 0
+                if not track.values:
+                    track.stopped = True
+                    fade._finish()
+                    continue
+                track.group = group
+                group.tracks.append(track)
+                if stoppable:
+                    self._tracks[key] = track
+            if group.tracks:
+                self._schedule(group)
+        return handles
+
+    def cancel(self, fade: Fade):
+        '''Stop a fade, leaving the display at whatever brightness it has reached'''
+        with self._condition:
+            track = fade._track
+            if track is None or track.fade is not fade or track.stopped:
+                return
+            self._stop(track)
+            fade._finish(cancelled=True)
+
+    def _leave(self, track: _FadeTrack):
+        '''Remove a track from its group, unscheduling the group if nothing else is left in it'''
+        group = track.group
+        if group is None or track not in group.tracks:
+            return
+        group.tracks.remove(track)
+        if not group.tracks:
+            group.generation += 1
+
+    def _stop(self, track: _FadeTrack):
+        track.stopped = True
+        self._leave(track)
+        if self._tracks.get(track.key) is track:
+            del self._tracks[track.key]
+
+    def _schedule(self, group: _FadeGroup):
+        group.generation += 1
+        heapq.heappush(self._queue, (group.due, next(self._sequence), group, group.generation))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='sbc-fade-engine', daemon=True)
+            self._thread.start()
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    # drop anything that has been rescheduled or stopped since it was queued
+                    while self._queue and self._queue[0][3] != self._queue[0][2].generation:
+                        heapq.heappop(self._queue)
+                    if not self._queue:
+                        if not self._condition.wait(self.IDLE_TIMEOUT) and not self._queue:
+                            self._thread = None
+                            return
+                        continue
+                    threshold = self.SPIN_THRESHOLD if self._queue[0][2].precise else 0
+                    delay = self._queue[0][0] - self.clock()
+                    if delay > threshold:
+                        self._condition.wait(delay - threshold)
+                        continue
+                    due, _, group, generation = heapq.heappop(self._queue)
+                    break
+
+            if group.precise:
+                # sleeping is only accurate to a millisecond or two, so the last stretch is spun through
+                while self.clock() < due:
+                    time.sleep(0)
+
+            with self._condition:
+                if generation != group.generation:
+                    continue
+                writes = self._step(group)
+            for track, value in writes:
+                thread_pool().submit(self._write, group, track, value, due)
+
+    def _step(self, group: _FadeGroup) -> List[Tuple[_FadeTrack, float]]:
+        '''Pick the next value for every display in a group that is due to be written'''
+        if any(track.in_flight for track in group.tracks):
+            # a display is still finishing a write for the fade this group took over from.
+            # The group is rescheduled once that write finishes
+            return []
+        writes = []
+        for track in group.tracks:
+            if group.duration is not None:
+                position = self._timed_position(track, group, group.duration)
+                if position < track.position:
+                    # this display has nothing new to show yet
+                    continue
+                track.position = position
+            writes.append((track, track.values[track.position]))
+            track.position += 1
+            track.in_flight = True
+        group.pending = len(writes)
+        if not writes:
+            self._reschedule(group)
+        return writes
+
+    def _reschedule(self, group: _FadeGroup):
+        if group.duration is not None:
+            group.due = self._timed_due(group, group.duration)
+        else:
+            # `interval` is the intended time between the start of each step.
+            # If that time has already passed, the next step is written straight away
+            group.due += group.interval
+        self._schedule(group)
+
+    def _group_latency(self, group: _FadeGroup) -> float:
+        '''The slowest average write latency in a group, which all of its displays allow for'''
+        return max((self._latency.get(track.key, 0) for track in group.tracks), default=0)
+
+    def _timed_position(self, track: _FadeTrack, group: _FadeGroup, duration: float) -> int:
+        '''
+        Returns the position in a timed fade that should be written next: wherever the fade
+        is due to be by the time the write lands
+        '''
+        last = len(track.values) - 1
+        if duration <= 0 or last == 0:
+            return last
+        elapsed = self.clock() - group.started + self._group_latency(group)
+        # the small offset stops float rounding from landing just short of a position
+        return min(last, int(elapsed / duration * last + 1e-9))
+
+    def _timed_due(self, group: _FadeGroup, duration: float) -> float:
+        '''Returns when the next value for any display in a timed fade becomes due'''
+        progress = min(track.position / max(1, len(track.values) - 1) for track in group.tracks)
+        due = group.started + duration * progress - self._group_latency(group)
+        return max(due, self.clock())
+
+    def _write(self, group: _FadeGroup, track: _FadeTrack, value: float, scheduled: float):
+        error = None
+        start = self.clock()
+        try:
+            # fade steps queue behind requests made directly by the user
+            with priority(PRIORITY_FADE):
+                track.setter(value)
+        except Exception as e:
+            error = e
+        finish = self.clock()
+
+        with self._condition:
+            track.in_flight = False
+            self._writes.setdefault(
+                track.key, deque(maxlen=self.TELEMETRY_SIZE)).append((scheduled, start, finish))
+            if error is None:
+                track.last_value = value
+                previous = self._latency.get(track.key)
+                self._latency[track.key] = finish - start if previous is None else (
+                    previous + self.LATENCY_SMOOTHING * (finish - start - previous))
+
+            if track.stopped:
+                pass
+            elif track.group is not group:
+                # this display was taken over by another fade, which may be waiting for this write
+                if track.group is not None and not track.group.pending:
+                    self._schedule(track.group)
+            elif error is not None:
+                _logger.error(f'fade to {value} failed: {format_exc(error)}')
+                self._stop(track)
+                track.fade._finish(error=error)
+            elif track.position >= len(track.values):
+                self._stop(track)
+                track.fade._finish()
+
+            group.pending -= 1
+            if not group.pending and group.tracks:
+                self._reschedule(group)
+
+
+def _percentile(values: List[float], percent: int) -> float:
+    '''Nearest-rank percentile of a sorted list, or 0 if it is empty'''
+    if not values:
+        return 0.0
+    return values[max(0, -(-len(values) * percent // 100) - 1)]
+
+
+fade_engine = FadeEngine()
+'''Drives all fades started by `.Display.fade_brightness` and `.fade_brightness`'''
+
+
+@dataclass(frozen=True)
+class ShadowEntry:
+    '''The last brightness value known for a display. See `ShadowState`'''
+    value: IntPercentage
+    '''The brightness, as the native percentage sent to or read from the brightness method'''
+    timestamp: float
+    '''When the value was recorded, according to `ShadowState`'s monotonic clock'''
+    source: str
+    '''Either `'read'` or `'write'`'''
+    index: int
+    '''The index of the display within its method when the value was recorded'''
+
+
+class ShadowState():
+    '''
+    Remembers the last brightness value read from or written to each display, so that
+    reads within `.config.SHADOW_TTL` seconds of it can be answered without a round trip to
+    the display (100ms or more over DDC/CI), and writes of the value a display is already
+    known to be at can be skipped entirely.
+
+    Values are stored as native percentages (ie: before `.calibration` is applied), keyed by
+    method and display identifier (see `ShadowState.key`). Entries are dropped when:
+    - the display's index within its method changes, or a method notices that the display
+      topology has changed (eg: `.linux.SysFiles` and `.linux.I2C`)
+    - an external change is detected, eg: a hotplug or a brightness hotkey (see `.linux.HotplugListener`)
+    - a write to the display fails, or it is written to in native units
+
+    Nothing is remembered while `.config.SHADOW_TTL` is 0, which is the default.
+    '''
+    _logger = _logger.getChild('ShadowState')
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        '''
+        Args:
+            clock: the monotonic clock used to age entries
+        '''
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, ShadowEntry] = {}
+
+    @staticmethod
+    def key(display: Dict[str, Any]) -> Hashable:
+        '''
+        Returns the key a display is remembered under
+
+        Args:
+            display: the display's info, as returned by `.list_monitors_info`
+        '''
+        for prop in ('uid', 'edid', 'serial', 'name'):
+            if display.get(prop) is not None:
+                return (display['method'], display[prop])
+        return (display['method'], display['index'])
+
+    def entry(self, key: Hashable) -> Optional[ShadowEntry]:
+        '''Returns the last value recorded for a display, however old it is'''
+        with self._lock:
+            return self._entries.get(key)
+
+    def get(self, key: Hashable, index: int) -> Optional[IntPercentage]:
+        '''
+        Returns the brightness of a display if it was recorded within the last `.config.SHADOW_TTL` seconds
+
+        Args:
+            key: see `ShadowState.key`
+            index: the current index of the display within its method
+        '''
+        if config.SHADOW_TTL <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.index != index:
+                self._logger.debug(f'{key!r} moved from index {entry.index} to {index}, forgetting it')
+                del self._entries[key]
+                return None
+            if self._clock() - entry.timestamp >= config.SHADOW_TTL:
+                return None
+            return entry.value
+
+    def is_current(self, key: Hashable, index: int, value: IntPercentage) -> bool:
+        '''Returns whether a display is known to already be at a brightness, so writing it can be skipped'''
+        return self.get(key, index) == value
+
+    def record(self, key: Hashable, index: int, value: IntPercentage, source: str):
+        '''
+        Remember the brightness of a display
+
+        Args:
+            key: see `ShadowState.key`
+            index: the current index of the display within its method
+            value: the native percentage that was read or written
+            source: either `'read'` or `'write'`
+        '''
+        if config.SHADOW_TTL <= 0:
+            return
+        with self._lock:
+            self._entries[key] = ShadowEntry(value, self._clock(), source, index)
+
+    def invalidate(self, key: Optional[Hashable] = None, method: Optional[type] = None):
+        '''
+        Forget remembered values
+
+        Args:
+            key: forget a specific display
+            method: forget every display belonging to this method.
+                If neither are specified, everything is forgotten
+        '''
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            elif method is not None:
+                for k in [k for k in self._entries if k[0] is method]:  # type: ignore[index]
+                    del self._entries[k]
+            else:
+                self._entries.clear()
+
+
+shadow = ShadowState()
+'''The `ShadowState` shared by the whole library'''
+
+
+class _Adjustment():
+    '''A relative adjustment waiting to be applied to a display'''
+
+    def __init__(
+        self,
+        delta: int,
+        lower_bound: int,
+        read: Callable[[], IntPercentage],
+        write: Callable[[IntPercentage], Any]
+    ):
+        self.delta = delta
+        self.lower_bound = lower_bound
+        self.read = read
+        self.write = write
+        self.done = threading.Event()
+        self.result: Optional[IntPercentage] = None
+        self.error: Optional[Exception] = None
+        self.lead = False
+        '''Set when this adjustment's caller is handed the job of applying the queue'''
+        self.start: Optional[IntPercentage] = None
+        '''The brightness left by the previous caller to apply the queue, if known'''
+
+
+class AdjustmentQueue():
+    '''
+    Serialises relative brightness adjustments (eg: `'+5'` from a hotkey) to each display, so that
+    concurrent adjustments can't read the same starting value and overwrite each other.
+
+    The first caller for a display reads its brightness and writes the adjusted value. Adjustments
+    made while that is happening are queued, and when the write finishes the caller hands the queue to
+    the first of them, which applies everything queued so far with a single write, carrying on from the
+    value that was just written rather than reading it again. So a burst of 20 hotkey presses costs one
+    read and a handful of writes, rather than 20 reads, 20 writes and 20 read-backs that race each other.
+    Each caller only applies one batch, so a held hotkey can't keep any one of them from returning.
+
+    Queued deltas are applied one after another, each clamped between its lower bound and 100,
+    exactly as if they had been made one at a time. Each batch is read and written with the
+    callbacks of the adjustments in it, rather than those of whichever caller started draining.
+    '''
+    _logger = _logger.getChild('AdjustmentQueue')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # the presence of a key means a caller is already applying adjustments to that display
+        self._queues: Dict[Hashable, List[_Adjustment]] = {}
+
+    def adjust(
+        self,
+        key: Hashable,
+        delta: int,
+        read: Callable[[], IntPercentage],
+        write: Callable[[IntPercentage], Any],
+        lower_bound: int = 0
+    ) -> IntPercentage:
+        '''
+        Adjust the brightness of a display by a relative amount
+
+        Args:
+            key: uniquely identifies the display. Adjustments with the same key are coalesced,
+                so it should tell apart identical displays (eg: `ShadowState.key` plus the index)
+            delta: how much to change the brightness by
+            read: returns the current brightness of the display
+            write: sets the brightness of the display
+            lower_bound: the minimum value the brightness can be set to
+
+        Returns:
+            The brightness of the display once this adjustment, and any others that were
+            queued alongside it, have been applied
+
+        Raises:
+            Exception: whatever `read` or `write` raised while applying this adjustment
+        '''
+        adjustment = _Adjustment(delta, lower_bound, read, write)
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                self._queues[key] = [adjustment]
+            else:
+                queue.append(adjustment)
+        if queue is None:
+            self._drain(key)
+        else:
+            adjustment.done.wait()
+            if adjustment.lead:
+                self._drain(key, adjustment.start)
+
+        if adjustment.error is not None:
+            raise adjustment.error
+        return cast(IntPercentage, adjustment.result)
+
+    def _drain(self, key: Hashable, current: Optional[IntPercentage] = None):
+        '''
+        Apply the adjustments queued for a display with a single write, then hand anything queued
+        in the meantime to the first of those callers
+
+        Args:
+            key: the display to apply the queue to
+            current: the brightness of the display, if known. Otherwise it is read
+        '''
+        batch: List[_Adjustment] = []
+        try:
+            with self._lock:
+                batch = self._queues[key]
+                self._queues[key] = []
+
+            error: Optional[Exception] = None
+            try:
+                if current is None:
+                    current = batch[0].read()
+                value = current
+                for adjustment in batch:
+                    value = min(100, max(adjustment.lower_bound, value + adjustment.delta))
+                if len(batch) > 1:
+                    self._logger.debug(f'coalesced {len(batch)} adjustments to {key!r} into one write')
+                if value != current:
+                    batch[-1].write(value)
+                current = value
+            except Exception as e:
+                # the next caller reads the display again, since it is unclear what state it is in
+                current, error = None, e
+
+            for adjustment in batch:
+                adjustment.result, adjustment.error = current, error
+                adjustment.done.set()
+            batch = []
+
+            with self._lock:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    return
+                successor = queue[0]
+                successor.lead, successor.start = True, current
+            # wake the successor, which applies its own adjustment along with the rest of the queue
+            successor.done.set()
+        except BaseException as e:
+            # eg: KeyboardInterrupt. Nobody is left to apply the queued adjustments, so fail them all
+            # and let the next caller for this display start afresh
+            with self._lock:
+                batch += self._queues.pop(key, [])
+            error = e if isinstance(e, Exception) else ScreenBrightnessError(
+                f'adjustment interrupted by {type(e).__name__}')
+            for adjustment in batch:
+                adjustment.error = error
+                adjustment.done.set()
+            raise
+
+
+adjustments = AdjustmentQueue()
+'''The `AdjustmentQueue` used by `.set_brightness` and `.Display.adjust_brightness`'''
+
+
 class BrightnessMethod(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # remember the displays each method enumerates while a `DiscoveryContext` is open
+        func = cls.__dict__.get('get_display_info')
+        if isinstance(func, classmethod) and not getattr(func.__func__, '__isabstractmethod__', False):
+            memoized = classmethod(_memoize_display_info(func.__func__))
+            cls.get_display_info = memoized  # type: ignore[method-assign, assignment]
+
     @classmethod
     @abstractmethod
     def get_display_info(cls, display: Optional[DisplayIdentifier] = None) -> List[dict]:
@@ -174,6 +1078,122 @@ class BrightnessMethod(ABC):
         '''
         ...
 
+    @classmethod
+    def get_max_brightness(cls, display: Optional[int] = None) -> List[int]:
+        '''
+        Returns the native brightness value of each display at full brightness, ie: how many
+        steps of brightness it has. Methods that don't offer finer control than a percentage
+        (the default) return 100.
+
+        Args:
+            display: the index of the specific display to query.
+                If unspecified, all detected displays are queried
+        '''
+        return [100] * (1 if display is not None else len(cls.get_display_info()))
+
+    @classmethod
+    def get_brightness_raw(cls, display: Optional[int] = None) -> List[int]:
+        '''
+        Get the brightness in native units, between 0 and `BrightnessMethod.get_max_brightness`.
+        By default, this is the same as `BrightnessMethod.get_brightness`.
+
+        Args:
+            display: the index of the specific display to query.
+                If unspecified, all detected displays are queried
+        '''
+        return cls.get_brightness(display=display)
+
+    @classmethod
+    def set_brightness_raw(cls, value: int, display: Optional[int] = None):
+        '''
+        Set the brightness in native units, between 0 and `BrightnessMethod.get_max_brightness`.
+        By default, this is the same as `BrightnessMethod.set_brightness`.
+
+        Args:
+            value: the new brightness value
+            display: the index of the specific display to adjust.
+                If unspecified, all detected displays are adjusted
+        '''
+        cls.set_brightness(value, display=display)
+
+    @classmethod
+    def bus(cls, display: dict) -> Hashable:
+        '''
+        Identifies the bus that a display is attached to. Displays on the same bus are never
+        talked to at the same time, even with `.config.PARALLEL` enabled, and displays on
+        different buses are handled by separate batched calls. See `fan_out`.
+
+        By default, all of a method's displays are treated as being on the same bus.
+
+        Args:
+            display: the display, as returned by `BrightnessMethod.get_display_info`
+        '''
+        return cls
+
+    @classmethod
+    def get_brightness_batch(cls, displays: List[int], **kwargs) -> List[Union[IntPercentage, Exception]]:
+        '''
+        Get the brightness of several displays in one go. Methods that can query several
+        displays for the cost of one (eg: with a single subprocess call) should override this.
+        By default, `BrightnessMethod.get_brightness` is called for each display.
+
+        Args:
+            displays: the indexes of the displays to query
+            **kwargs: passed to `BrightnessMethod.get_brightness`
+
+        Returns:
+            One item per display, in the same order as `displays`. Each item is either
+            the brightness of that display or the exception raised while getting it
+        '''
+        results: List[Union[IntPercentage, Exception]] = []
+        for display in displays:
+            try:
+                results.append(cls.get_brightness(display=display, **kwargs)[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @classmethod
+    def set_brightness_batch(
+        cls, values: List[IntPercentage], displays: List[int], **kwargs
+    ) -> List[Optional[Exception]]:
+        '''
+        Set the brightness of several displays in one go. Methods that can adjust several
+        displays for the cost of one (eg: with a single subprocess call) should override this.
+        By default, `BrightnessMethod.set_brightness` is called for each display.
+
+        Args:
+            values: the new brightness of each display
+            displays: the indexes of the displays to adjust
+            **kwargs: passed to `BrightnessMethod.set_brightness`
+
+        Returns:
+            One item per display, in the same order as `displays`. Each item is either
+            None or the exception raised while setting the brightness of that display
+        '''
+        results: List[Optional[Exception]] = []
+        for value, display in zip(values, displays):
+            try:
+                cls.set_brightness(value, display=display, **kwargs)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+def _memoize_display_info(func: Callable[..., List[dict]]) -> Callable[..., List[dict]]:
+    '''
+    Wraps an implementation of `BrightnessMethod.get_display_info` so that, while a `DiscoveryContext`
+    is open, enumerating all displays only happens once. Filtered or customised calls are not remembered.
+    '''
+    @wraps(func)
+    def get_display_info(cls, *args, **kwargs) -> List[dict]:
+        context = _discovery_context.get()
+        if context is None or any(arg is not None for arg in args) or any(v is not None for v in kwargs.values()):
+            return func(cls, *args, **kwargs)
+        return list(context.memo((func, cls), lambda: func(cls)))
+    return get_display_info
+
 
 class BrightnessMethodAdv(BrightnessMethod):
     @classmethod
@@ -188,54 +1208,180 @@ class BrightnessMethodAdv(BrightnessMethod):
 
 
 class __Cache:
-    '''class to cache data with a short shelf life'''
+    '''
+    Thread-safe, size-bounded cache for data with a short shelf life.
 
-    def __init__(self):
+    Entries belong to a region (by default, a region of their own named after the key).
+    A whole region can be invalidated in O(1), eg: all cached brightness values for a method.
+    Expired entries are removed via a min-heap of expiry times rather than a scan of every key,
+    and the least recently used entries are evicted once there are more than `max_size`.
+
+    Hits, misses, expirations, invalidations and evictions are counted per region. See `__Cache.stats`.
+    '''
+    STAT_COUNTERS = ('hits', 'misses', 'expirations', 'invalidations', 'evictions')
+    '''The counters kept for each region'''
+
+    def __init__(self, max_size: int = 256, clock: Callable[[], float] = time.monotonic):
+        '''
+        Args:
+            max_size: the maximum number of entries to hold
+            clock: the monotonic clock used to expire entries
+        '''
         self.logger = _logger.getChild(f'{self.__class__.__name__}_{id(self)}')
         self.enabled = True
-        self._store: Dict[str, Tuple[Any, float]] = {}
-
-    def expire(self, key: Optional[str] = None, startswith: Optional[str] = None):
+        self.max_size = max_size
+        self._clock = clock
+        self._lock = threading.RLock()
+        # (region, key) -> (value, expires at, region generation, sequence number, stored at)
+        self._store: OrderedDict[Tuple[str, str], Tuple[Any, float, int, int, float]] = OrderedDict()
+        # min-heap of (expires at, sequence number, (region, key))
+        self._expiry: List[Tuple[float, int, Tuple[str, str]]] = []
+        self._generations: Dict[str, int] = {}
+        self._sequence = 0
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _count(self, region: str, counter: str, amount: int = 1):
+        '''Increment a counter for a region. Must be called with the lock held'''
+        stats = self._stats.get(region)
+        if stats is None:
+            stats = self._stats[region] = dict.fromkeys(self.STAT_COUNTERS + ('total_age', 'max_age'), 0)
+        stats[counter] += amount
+
+    def _purge(self, now: float):
+        '''Remove entries whose expiry time has passed. Must be called with the lock held'''
+        while self._expiry and self._expiry[0][0] <= now:
+            _, sequence, ident = heapq.heappop(self._expiry)
+            entry = self._store.get(ident)
+            # the heap may reference entries that have since been overwritten or removed
+            if entry is not None and entry[3] == sequence:
+                del self._store[ident]
+                if entry[2] == self._generations.get(ident[0], 0):
+                    self._count(ident[0], 'expirations')
+
+    def expire(self, key: Optional[str] = None, startswith: Optional[str] = None, region: Optional[str] = None):
         '''
         @private
 
-        Runs through all keys in the cache and removes any expired items.
+        Removes any expired items from the cache.
         Can optionally specify additional keys that should be removed.
 
         Args:
-            key: a specific key to remove. `KeyError` exceptions are suppressed if this key doesn't exist.
-            startswith: remove any keys that start with this string
+            key: a specific key to remove. If `region` is also given, only the key within that region is removed
+            startswith: remove any keys that start with this string. This requires checking every key,
+                so prefer storing related keys in a region and using `region`
+            region: remove every key in this region
         '''
-        if key is not None:
-            try:
-                del self._store[key]
-                self.logger.debug(f'delete key {key!r}')
-            except KeyError:
-                pass
-
-        for k, v in tuple(self._store.items()):
-            if startswith is not None and k.startswith(startswith):
-                del self._store[k]
+        with self._lock:
+            if key is not None:
+                ident = (key if region is None else region, key)
+                if self._store.pop(ident, None) is not None:
+                    self._count(ident[0], 'invalidations')
+                    self.logger.debug(f'delete key {key!r}')
+
+            elif region is not None:
+                self._generations[region] = self._generations.get(region, 0) + 1
+                self._count(region, 'invalidations')
+                self.logger.debug(f'delete keys {region=}')
+
+            if startswith is not None:
+                for ident in [i for i in self._store if i[1].startswith(startswith)]:
+                    del self._store[ident]
+                    self._count(ident[0], 'invalidations')
                 self.logger.debug(f'delete keys {startswith=}')
-                continue
-            if v[1] < time.time():
-                del self._store[k]
-                self.logger.debug(f'delete expired key {k}')
 
-    def get(self, key: str) -> Any:
+            self._purge(self._clock())
+
+    def get(self, key: str, region: Optional[str] = None) -> Any:
+        '''
+        Args:
+            key: the key to look up
+            region: the region the key was stored in
+
+        Returns:
+            The stored value, or None if there is no valid value for the key
+        '''
         if not self.enabled:
             return None
-        self.expire()
-        if key not in self._store:
-            self.logger.debug(f'{key!r} not present in cache')
-            return None
-        return self._store[key][0]
-
-    def store(self, key: str, value: Any, expires: float = 1):
+        region = key if region is None else region
+        ident = (region, key)
+        with self._lock:
+            now = self._clock()
+            self._purge(now)
+            entry = self._store.get(ident)
+            # anything that has expired was removed by the purge
+            if entry is None or entry[2] != self._generations.get(region, 0):
+                if entry is not None:
+                    del self._store[ident]
+                self._count(region, 'misses')
+                self.logger.debug(f'{key!r} not present in cache')
+                return None
+            self._store.move_to_end(ident)
+            age = now - entry[4]
+            self._count(region, 'hits')
+            stats = self._stats[region]
+            stats['total_age'] += age
+            stats['max_age'] = max(stats['max_age'], age)
+            return entry[0]
+
+    def store(self, key: str, value: Any, expires: float = 1, region: Optional[str] = None):
+        '''
+        Args:
+            key: the key to store the value under
+            value: the value to store
+            expires: how many seconds the value is valid for
+            region: the region to store the key in
+        '''
         if not self.enabled:
             return
+        region = key if region is None else region
+        ident = (region, key)
         self.logger.debug(f'cache set {key!r}, {expires=}')
-        self._store[key] = (value, expires + time.time())
+        with self._lock:
+            now = self._clock()
+            self._sequence += 1
+            self._store[ident] = (value, now + expires, self._generations.get(region, 0), self._sequence, now)
+            self._store.move_to_end(ident)
+            heapq.heappush(self._expiry, (now + expires, self._sequence, ident))
+            self._purge(now)
+            while len(self._store) > self.max_size:
+                evicted, _ = self._store.popitem(last=False)
+                self._count(evicted[0], 'evictions')
+                self.logger.debug(f'evict key {evicted[1]!r}')
+            # stop stale heap entries from piling up if values are overwritten many times before expiring
+            if len(self._expiry) > 4 * max(self.max_size, len(self._store)):
+                self._expiry = [(entry[1], entry[3], ident) for ident, entry in self._store.items()]
+                heapq.heapify(self._expiry)
+
+    def clear(self):
+        '''Remove everything from the cache. Statistics are kept'''
+        with self._lock:
+            self._store.clear()
+            self._expiry = []
+            self._generations = {}
+
+    def stats(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        '''
+        Get the cache statistics for each region
+
+        Args:
+            reset: reset the statistics after reading them. This happens atomically,
+                so no events are lost between reading and resetting
+
+        Returns:
+            A dict of region names and their statistics. See `.cache_stats` for the keys
+        '''
+        with self._lock:
+            result = {}
+            for region, stats in self._stats.items():
+                hits = stats['hits']
+                result[region] = {
+                    **{counter: int(stats[counter]) for counter in self.STAT_COUNTERS},
+                    'mean_age': stats['total_age'] / hits if hits else 0.0,
+                    'max_age': stats['max_age']
+                }
+            if reset:
+                self._stats = {}
+            return result
 
 
 class EDID:
@@ -434,6 +1580,8 @@ def logarithmic_range(start: int, stop: int, step: int = 1) -> Generator[int, No
     This function is designed to deal with brightness percentages, and so
     will never return a value less than 0 or greater than 100.
 
+    See `.curves` for other curves, including a table-based version of this one.
+
     Args:
         start: the start of your percentage range
         stop: the end of your percentage range
@@ -1,23 +1,619 @@
+import atexit
+import errno
 import fcntl
 import functools
 import glob
+import hashlib
+import heapq
+import itertools
+import json
 import logging
 import operator
 import os
 import re
+import select
+import socket
+import tempfile
+import threading
 import time
-from typing import List, Optional, Tuple
-
-from . import filter_monitors, get_methods
-from .exceptions import I2CValidationError, NoValidDisplayError, format_exc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import Future
+from concurrent.futures import wait as wait_for_futures
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Set, Tuple, Type, Union, cast
+
+from . import config, filter_monitors, get_methods
+from .exceptions import BusLockTimeoutError, I2CValidationError, NoValidDisplayError, format_exc
 from .helpers import (EDID, BrightnessMethod, BrightnessMethodAdv, __Cache,
-                      _monitor_brand_lookup, check_output)
+                      _monitor_brand_lookup, check_output, current_discovery_context,
+                      current_priority, shadow)
 from .types import DisplayIdentifier, IntPercentage
 
 __cache__ = __Cache()
 _logger = logging.getLogger(__name__)
 
 
+def _user_cache_dir() -> str:
+    '''Returns the directory used to persist data between processes'''
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'screen_brightness_control'
+    )
+
+
+def _user_runtime_dir() -> str:
+    '''Returns the directory used for files shared between running processes, eg: locks'''
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'screen_brightness_control')
+    return os.path.join(tempfile.gettempdir(), f'screen_brightness_control-{os.getuid()}')
+
+
+class _BrightnessHandle():
+    '''
+    Keeps a file descriptor for a sysfs `brightness` file open so that repeated reads
+    and writes can use `os.pread`/`os.pwrite` at offset 0 instead of re-opening the file
+    on every call.
+    '''
+
+    def __init__(self, path: str):
+        '''
+        Args:
+            path: the path to the brightness file, eg: `/sys/class/backlight/intel_backlight/brightness`
+        '''
+        self.path = path
+        try:
+            self.fd = os.open(path, os.O_RDWR)
+            self.writable = True
+        except PermissionError:
+            # fall back to read-only so that `get_brightness` still works for unprivileged users
+            self.fd = os.open(path, os.O_RDONLY)
+            self.writable = False
+
+    def read(self) -> int:
+        '''Read the current (raw) brightness value'''
+        return int(os.pread(self.fd, 32, 0))
+
+    def write(self, value: int):
+        '''Write a new (raw) brightness value'''
+        if not self.writable:
+            raise PermissionError(errno.EACCES, os.strerror(errno.EACCES), self.path)
+        os.pwrite(self.fd, str(value).encode(), 0)
+
+    def close(self):
+        '''Close the underlying file descriptor'''
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+@dataclass(frozen=True)
+class DRMConnector:
+    '''
+    A connector in `/sys/class/drm`, eg: `card0-eDP-1`.
+
+    The static properties of a connector are read once when the `DRMConnectorIndex` is built.
+    `status` and `enabled` change whenever a display is plugged in, so they are always read fresh.
+    '''
+    name: str
+    '''The name of the connector, eg: `card0-eDP-1`'''
+    path: str
+    '''The path of the connector, eg: `/sys/class/drm/card0-eDP-1`'''
+    real_path: str
+    '''The resolved path of the connector, eg: `/sys/devices/pci0000:00/0000:00:02.0/drm/card0/card0-eDP-1`'''
+    pci_path: str
+    '''The resolved path of the GPU the connector belongs to, eg: `/sys/devices/pci0000:00/0000:00:02.0`'''
+    i2c_bus: Optional[str]
+    '''The number of the I2C bus used by the connector, if any'''
+
+    @property
+    def edid_path(self) -> str:
+        '''The path of the file the kernel exposes the connector's EDID in'''
+        return f'{self.path}/edid'
+
+    @property
+    def status(self) -> Optional[str]:
+        '''The connection status, eg: `connected` or `disconnected`'''
+        return _read_sysfs(f'{self.path}/status')
+
+    @property
+    def enabled(self) -> bool:
+        '''Whether the connector is enabled. Connectors without an `enabled` file are assumed to be'''
+        enabled = _read_sysfs(f'{self.path}/enabled')
+        return enabled is None or enabled.lower() == 'enabled'
+
+    @property
+    def interface(self) -> Tuple[str, str]:
+        '''
+        The interface type and number, in the format that display servers use.
+        EG: `card0-HDMI-A-1` gives `('hdmi', '1')`
+        '''
+        match = DRMConnectorIndex.CONNECTOR_NAME.match(self.name)
+        if match is None:
+            return ('', '')
+        return (match.group(1).lower(), match.group(2))
+
+
+class DRMConnectorIndex():
+    '''
+    An index of all connectors in `/sys/class/drm`, shared by all methods.
+
+    Building the index requires resolving and searching every connector directory, so it is only
+    rebuilt when the set of connectors changes (eg: a GPU or MST hub is added or removed).
+    Even listing the connectors is only repeated every `REFRESH_INTERVAL` seconds, or straight
+    away after `clear` (eg: from a `HotplugListener` event).
+    '''
+    REFRESH_INTERVAL = 1.0
+    '''How long to go without checking whether the set of connectors has changed'''
+    CONNECTOR_NAME = re.compile(r'card\d+-([a-z]+)(?:-[a-z])?-(\d+)$', re.I)
+    '''Matches connector names and captures the interface type and number'''
+    INTERNAL_PANEL = re.compile(r'-(eDP|LVDS|DSI)-')
+    '''Matches the names of connectors that are used for internal panels'''
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        '''
+        Args:
+            clock: returns the current time in seconds. Must be monotonic
+        '''
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._checked: Optional[float] = None
+        self._names: Optional[Tuple[str, ...]] = None
+        self._connectors: Tuple[DRMConnector, ...] = ()
+        self._by_real_path: Dict[str, DRMConnector] = {}
+        self._by_interface: Dict[Tuple[str, str], List[DRMConnector]] = {}
+        self._by_bus: Dict[str, DRMConnector] = {}
+
+    def refresh(self, force: bool = False) -> bool:
+        '''
+        Rebuild the index if the set of connectors has changed
+
+        Args:
+            force: check for changes even if the last check was under `REFRESH_INTERVAL` ago
+
+        Returns:
+            Whether the index was rebuilt
+        '''
+        now = self.clock()
+        checked = self._checked
+        if not force and checked is not None and now - checked < self.REFRESH_INTERVAL:
+            return False
+
+        paths = sorted(glob.glob('/sys/class/drm/card*-*'), key=os.path.basename)
+        names = tuple(paths)
+        with self._lock:
+            self._checked = now
+            if names == self._names:
+                return False
+
+            connectors = []
+            for path in paths:
+                real_path = os.path.realpath(path)
+                connectors.append(DRMConnector(
+                    name=os.path.basename(path),
+                    path=path,
+                    real_path=real_path,
+                    pci_path=real_path.split('/drm/')[0],
+                    i2c_bus=_drm_device_i2c_bus(path)
+                ))
+
+            self._connectors = tuple(connectors)
+            self._by_real_path = {c.real_path: c for c in connectors}
+            self._by_bus = {c.i2c_bus: c for c in connectors if c.i2c_bus is not None}
+            self._by_interface = {}
+            for connector in connectors:
+                self._by_interface.setdefault(connector.interface, []).append(connector)
+            self._names = names
+            return True
+
+    def clear(self):
+        '''Forget all connectors, forcing the index to be rebuilt on next use'''
+        with self._lock:
+            self._checked = None
+            self._names = None
+            self._connectors = ()
+            self._by_real_path = {}
+            self._by_interface = {}
+            self._by_bus = {}
+
+    def connectors(self) -> Tuple[DRMConnector, ...]:
+        '''Returns all connectors, sorted by name'''
+        self.refresh()
+        return self._connectors
+
+    def by_real_path(self, real_path: str) -> Optional[DRMConnector]:
+        '''
+        Args:
+            real_path: the resolved path of a device, eg: the `device` of a backlight
+
+        Returns:
+            The connector with that path, or None
+        '''
+        self.refresh()
+        return self._by_real_path.get(real_path)
+
+    def by_bus(self, bus: str) -> Optional[DRMConnector]:
+        '''
+        Args:
+            bus: the I2C bus number, eg: `'4'`
+
+        Returns:
+            The connector that uses that I2C bus, or None
+        '''
+        self.refresh()
+        return self._by_bus.get(bus)
+
+    def by_interface(self, interface: str) -> List[DRMConnector]:
+        '''
+        Args:
+            interface: the interface name used by display servers, eg: `eDP-1`, `eDP1`, `HDMI-1`
+
+        Returns:
+            All connectors with that interface. There may be more than one if there are multiple GPUs
+        '''
+        # sometimes it can be `eDP-1` and sometimes it's `eDP1`
+        match = re.match(r'([a-z]+)-?(\d+)', interface, re.I)
+        if match is None:
+            return []
+        self.refresh()
+        return list(self._by_interface.get((match.group(1).lower(), match.group(2)), ()))
+
+    def panel_for_device(self, device_path: str) -> Optional[DRMConnector]:
+        '''
+        Find the connector that a backlight device belongs to.
+
+        Most backlights are registered against the connector of the panel they control, but some
+        (eg: `amdgpu_bl0`) are registered against the GPU. For these, the single internal panel
+        connector on that GPU is returned.
+
+        Args:
+            device_path: the resolved path of the backlight's `device`
+
+        Returns:
+            The connector, or None if there isn't exactly one candidate
+        '''
+        connector = self.by_real_path(device_path)
+        if connector is not None:
+            return connector
+        candidates = [
+            c for c in self._connectors
+            if c.pci_path == device_path and self.INTERNAL_PANEL.search(c.name)
+        ]
+        if len(candidates) == 1:
+            return candidates[0]
+        return None
+
+
+drm_connectors = DRMConnectorIndex()
+'''The `DRMConnectorIndex` shared by all methods'''
+
+
+class TopologyCache():
+    '''
+    An on-disk cache of the displays discovered by the slower methods (`I2C` and `DDCUtil`),
+    including their maximum brightness values, so that short-lived processes can skip
+    display discovery when nothing has changed.
+
+    The cache is only used if `config.DISK_CACHE` is enabled and is invalidated whenever
+    `TopologyCache.fingerprint` changes.
+    '''
+    _logger = _logger.getChild('TopologyCache')
+
+    path: Optional[str] = os.path.join(_user_cache_dir(), 'topology.json')
+    '''Where the cache is stored. Set to None to disable it regardless of `config.DISK_CACHE`'''
+
+    def __init__(self):
+        self._methods: Dict[str, dict] = {}
+        self._fingerprint: Optional[str] = None
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint() -> str:
+        '''
+        A cheap fingerprint of the display topology, made up of the names of the `/dev/i2c-*` nodes
+        and the name and status of each DRM connector. EDIDs are left to the real probe, so this only
+        costs a directory listing and one small sysfs read per connector.
+        '''
+        digest = hashlib.sha1()
+        for node in sorted(glob.glob('/dev/i2c-*')):
+            digest.update(f'{node}\n'.encode())
+        for connector in sorted(drm_connectors.connectors(), key=lambda c: c.name):
+            digest.update(f'{connector.name}:{connector.status}\n'.encode())
+        return digest.hexdigest()
+
+    def _load(self):
+        '''Read the cache from `TopologyCache.path`. Must be called with the lock held'''
+        self._loaded = True
+        if self.path is None:
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            self._fingerprint = stored['fingerprint']
+            self._methods = dict(stored['methods'])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self._logger.debug(f'failed to load display topology cache - {format_exc(e)}')
+            self._fingerprint = None
+            self._methods = {}
+
+    def get(self, method: Type[BrightnessMethod]) -> Optional[List[dict]]:
+        '''
+        Get the cached displays for a method, if the topology has not changed since they were stored.
+        Any cached maximum brightness values are restored into `method._max_brightness_cache`.
+
+        Args:
+            method: the method to get displays for
+
+        Returns:
+            A list of display info dicts, or None if nothing valid is cached
+        '''
+        if not config.DISK_CACHE or self.path is None:
+            return None
+
+        fingerprint = self.fingerprint()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if fingerprint != self._fingerprint:
+                if self._methods:
+                    self._logger.debug('display topology changed, discarding cached displays')
+                    self._methods = {}
+                    self._dirty = True
+                self._fingerprint = fingerprint
+                return None
+            entry = self._methods.get(method.__name__)
+            if entry is None:
+                return None
+            for ident, value in entry['max_brightness'].items():
+                method._max_brightness_cache.setdefault(ident, value)  # type: ignore[attr-defined]
+            return [dict(display, method=method) for display in entry['displays']]
+
+    def store(self, method: Type[BrightnessMethod], displays: List[dict]):
+        '''
+        Cache the displays discovered by a method, against the fingerprint checked in `TopologyCache.get`
+
+        Args:
+            method: the method that discovered the displays
+            displays: the display info dicts
+        '''
+        if not config.DISK_CACHE or self.path is None:
+            return
+        with self._lock:
+            if self._fingerprint is None:
+                return
+            self._methods[method.__name__] = {
+                'displays': [{k: v for k, v in display.items() if k != 'method'} for display in displays],
+                'max_brightness': {}
+            }
+            self._dirty = True
+
+    def store_max_brightness(self, method: Type[BrightnessMethod], ident: str, value: int):
+        '''
+        Cache the maximum brightness of a display
+
+        Args:
+            method: the method the display belongs to
+            ident: the key the method uses for the display in its `_max_brightness_cache`
+            value: the maximum brightness
+        '''
+        if not config.DISK_CACHE or self.path is None:
+            return
+        with self._lock:
+            entry = self._methods.get(method.__name__)
+            if entry is not None and entry['max_brightness'].get(ident) != value:
+                entry['max_brightness'][ident] = value
+                self._dirty = True
+
+    def save(self):
+        '''Write the cache to `TopologyCache.path`, if it has changed'''
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return
+            stored = {'fingerprint': self._fingerprint, 'methods': dict(self._methods)}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self._logger.debug(f'failed to save display topology cache - {format_exc(e)}')
+
+    def clear(self):
+        '''Forget everything that has been cached in this process'''
+        with self._lock:
+            self._methods = {}
+            self._fingerprint = None
+            self._loaded = False
+            self._dirty = False
+
+
+topology_cache = TopologyCache()
+'''The `TopologyCache` shared by all methods'''
+atexit.register(topology_cache.save)
+
+
+class BusLocks():
+    '''
+    Advisory locks that stop several processes from talking to the same I2C bus at once.
+    Each bus is locked with `flock` on a file in the user's runtime directory (`$XDG_RUNTIME_DIR`),
+    which the kernel releases if the process holding it dies. The modification time of the file
+    records when the last transaction on the bus finished, so that the next process to take the
+    lock can leave the gap between commands that `I2C.WAIT_TIME` requires.
+
+    The locks are only taken if `config.BUS_LOCKING` is enabled.
+    '''
+    TIMEOUT = 2.0
+    '''
+    The longest time to wait for another thread or process to release a bus. After this,
+    `BusLockTimeoutError` is raised rather than stalling indefinitely
+    '''
+    POLL_INTERVAL = 0.002
+    '''How often a contended lock is re-tried'''
+    STAT_COUNTERS = ('acquisitions', 'contended', 'timeouts')
+
+    def __init__(self, sleep: Callable[[float], None] = time.sleep):
+        '''
+        Args:
+            sleep: sleeps for the given number of seconds
+        '''
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._thread_locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def path(bus: str) -> str:
+        '''
+        Returns the lock file for an I2C bus
+
+        Args:
+            bus: the I2C bus path, eg: `/dev/i2c-2`
+        '''
+        return os.path.join(_user_runtime_dir(), os.path.basename(bus) + '.lock')
+
+    @contextmanager
+    def hold(self, bus: str) -> Iterator[None]:
+        '''
+        Hold the lock for an I2C bus for the duration of a `with` block.
+        Threads within this process are serialised as well.
+
+        Args:
+            bus: the I2C bus path, eg: `/dev/i2c-2`
+
+        Raises:
+            BusLockTimeoutError: if the lock is not released within `BusLocks.TIMEOUT`
+        '''
+        if not config.BUS_LOCKING:
+            yield
+            return
+
+        with self._lock:
+            thread_lock = self._thread_locks.setdefault(bus, threading.Lock())
+
+        start = time.monotonic()
+        deadline = start + self.TIMEOUT
+        contended = False
+        if not thread_lock.acquire(blocking=False):
+            contended = True
+            if not thread_lock.acquire(timeout=self.TIMEOUT):
+                waited = time.monotonic() - start
+                self._record(bus, False, True, contended, waited)
+                raise BusLockTimeoutError(f'timed out after {waited:.2f}s waiting for another thread to release {bus}')
+
+        fd = None
+        locked = False
+        try:
+            try:
+                fd = self._open(self.path(bus))
+            except OSError as e:
+                _logger.warning(f'failed to open lock file for {bus}: {format_exc(e)}')
+
+            timed_out = False
+            while fd is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    contended = True
+                    if time.monotonic() >= deadline:
+                        timed_out = True
+                        break
+                    self.sleep(self.POLL_INTERVAL)
+
+            waited = time.monotonic() - start
+            self._record(bus, locked, timed_out, contended, waited)
+            if timed_out:
+                raise BusLockTimeoutError(
+                    f'timed out after {waited:.2f}s waiting for another process to release {bus}')
+            if locked:
+                self._wait_for_gap(cast(int, fd))
+            yield
+        finally:
+            if fd is not None:
+                if locked:
+                    try:
+                        # record when this transaction finished for the next holder of the lock
+                        os.utime(fd)
+                    except OSError as e:
+                        _logger.debug(f'failed to update lock file for {bus}: {format_exc(e)}')
+                # closing the file releases the lock
+                os.close(fd)
+            thread_lock.release()
+
+    @staticmethod
+    def _open(path: str) -> int:
+        '''Opens a lock file, creating it with a modification time that won't hold up the first transaction'''
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return os.open(path, os.O_RDWR)
+        os.utime(fd, (0, 0))
+        return fd
+
+    def _wait_for_gap(self, fd: int):
+        '''Sleeps until `I2C.WAIT_TIME` has passed since the last transaction recorded in a lock file'''
+        try:
+            last = os.fstat(fd).st_mtime
+        except OSError:
+            return
+        remaining = last + I2C.WAIT_TIME - time.time()
+        if remaining > 0:
+            # a modification time in the future (eg: the clock changed) shouldn't stall for long
+            self.sleep(min(remaining, I2C.WAIT_TIME))
+
+    def _record(self, bus: str, locked: bool, timed_out: bool, contended: bool, waited: float):
+        with self._lock:
+            stats = self._stats.get(bus)
+            if stats is None:
+                stats = self._stats[bus] = dict.fromkeys(self.STAT_COUNTERS + ('total_wait', 'max_wait'), 0)
+            stats['acquisitions'] += locked
+            stats['timeouts'] += timed_out
+            stats['contended'] += contended
+            stats['total_wait'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+
+    def stats(self, reset: bool = False) -> Dict[str, Dict[str, float]]:
+        '''
+        Get lock statistics for each I2C bus
+
+        Args:
+            reset: reset the statistics after reading them
+
+        Returns:
+            A dict of bus paths and their statistics:
+            - acquisitions (`int`): how many times the lock was taken
+            - contended (`int`): how many times the lock was held by someone else
+            - timeouts (`int`): how many times the lock could not be taken within `TIMEOUT`
+            - mean_wait (`float`): the average time spent waiting for the lock, in seconds
+            - max_wait (`float`): the longest time spent waiting for the lock, in seconds
+        '''
+        with self._lock:
+            result = {}
+            for bus, stats in self._stats.items():
+                attempts = stats['acquisitions'] + stats['timeouts']
+                result[bus] = {
+                    **{counter: int(stats[counter]) for counter in self.STAT_COUNTERS},
+                    'mean_wait': stats['total_wait'] / attempts if attempts else 0.0,
+                    'max_wait': stats['max_wait']
+                }
+            if reset:
+                self._stats = {}
+            return result
+
+
+bus_locks = BusLocks()
+'''Locks each I2C bus while DDC/CI transactions are in flight. See `BusLocks`'''
+
+
 class SysFiles(BrightnessMethod):
     '''
     A way of getting display information and adjusting the brightness
@@ -32,22 +628,77 @@ class SysFiles(BrightnessMethod):
     '''
     _logger = _logger.getChild('SysFiles')
 
+    _display_info_cache: Optional[Tuple[Tuple[str, ...], List[dict]]] = None
+    '''The backlight topology and the displays that were discovered for it'''
+    _handles: Dict[str, _BrightnessHandle] = {}
+    '''Open brightness file handles, keyed by backlight path'''
+    _lock = threading.Lock()
+
+    @classmethod
+    def _topology(cls) -> Tuple[str, ...]:
+        '''Returns a cheap fingerprint of the current backlight topology'''
+        return tuple(sorted(os.listdir('/sys/class/backlight')))
+
+    @classmethod
+    def _clear_handles(cls):
+        '''Close all open brightness file handles'''
+        with cls._lock:
+            for handle in cls._handles.values():
+                handle.close()
+            cls._handles = {}
+
+    @classmethod
+    def _get_handle(cls, device: dict) -> _BrightnessHandle:
+        '''Returns an open `_BrightnessHandle` for a display, opening one if required'''
+        with cls._lock:
+            handle = cls._handles.get(device['path'])
+            if handle is None:
+                handle = _BrightnessHandle(os.path.join(device['path'], 'brightness'))
+                cls._handles[device['path']] = handle
+            return handle
+
+    @classmethod
+    def _drop_handle(cls, device: dict):
+        '''Close and forget the handle for a display, eg: after an I/O error'''
+        with cls._lock:
+            handle = cls._handles.pop(device['path'], None)
+        if handle is not None:
+            handle.close()
+
     @classmethod
     def get_display_info(cls, display: Optional[DisplayIdentifier] = None) -> List[dict]:
+        topology = cls._topology()
+        cached = cls._display_info_cache
+        if cached is not None and cached[0] == topology:
+            all_displays = cached[1]
+        else:
+            if cached is not None:
+                cls._logger.debug('backlight topology changed, closing open handles')
+                cls._clear_handles()
+                shadow.invalidate(method=cls)
+            all_displays = cls._discover(topology)
+            cls._display_info_cache = (topology, all_displays)
+
+        if display is not None:
+            all_displays = filter_monitors(
+                display=display, haystack=all_displays, include=['path'])
+        # copy so that callers can't modify the cached info
+        return [dict(d) for d in all_displays]
+
+    @classmethod
+    def _discover(cls, topology: Tuple[str, ...]) -> List[dict]:
+        '''Walks `/sys/class/backlight` and returns info for all displays found'''
         subsystems = set()
-        for folder in os.listdir('/sys/class/backlight'):
+        for folder in topology:
             if os.path.isdir(f'/sys/class/backlight/{folder}/subsystem'):
                 subsystems.add(tuple(os.listdir(f'/sys/class/backlight/{folder}/subsystem')))
 
         displays_by_edid = {}
         index = 0
 
-        # map drm devices to their pci device paths
-        drm_paths = {}
-        for folder in glob.glob('/sys/class/drm/card*-*'):
-            drm_paths[os.path.realpath(folder)] = folder
-
         for subsystem in subsystems:
+            # backlight folder -> the DRM connector it belongs to
+            connectors: Dict[str, DRMConnector] = {}
 
             device: dict = {
                 'name': subsystem[0],
@@ -83,15 +734,26 @@ class SysFiles(BrightnessMethod):
                     )
                     continue
 
-                # check if backlight subsystem device matches any of the PCI devices discovered earlier
-                # if so, extract the i2c bus from the drm device folder
-                pci_path = os.path.realpath(f'/sys/class/backlight/{folder}/device')
-                if pci_path in drm_paths:
-                    device['uid'] = device['uid'] or i2c_bus_from_drm_device(drm_paths[pci_path])
-
-            if os.path.isfile('%s/device/edid' % device['path']):
+                # check if backlight subsystem device matches any of the DRM connectors
+                # if so, use the i2c bus of that connector
+                connector = drm_connectors.panel_for_device(
+                    os.path.realpath(f'/sys/class/backlight/{folder}/device'))
+                if connector is not None:
+                    connectors[folder] = connector
+                    if connector.enabled:
+                        device['uid'] = device['uid'] or connector.i2c_bus
+
+            # prefer the EDID exposed by the DRM connector, since backlights registered against
+            # the GPU (eg: amdgpu_bl0) have no `device/edid` of their own
+            edid = None
+            if device['name'] in connectors:
+                edid = edid_from_drm_device(connectors[device['name']].path)
+            if edid is not None:
+                device['edid'] = edid.hex()
+            elif os.path.isfile('%s/device/edid' % device['path']):
                 device['edid'] = EDID.hexdump('%s/device/edid' % device['path'])
 
+            if device['edid'] is not None:
                 for key, value in zip(
                     ('manufacturer_id', 'manufacturer', 'model', 'name', 'serial'),
                     EDID.parse(device['edid'])
@@ -103,11 +765,7 @@ class SysFiles(BrightnessMethod):
             displays_by_edid[device['edid']] = device
             index += 1
 
-        all_displays = list(displays_by_edid.values())
-        if display is not None:
-            all_displays = filter_monitors(
-                display=display, haystack=all_displays, include=['path'])
-        return all_displays
+        return list(displays_by_edid.values())
 
     @classmethod
     def get_brightness(cls, display: Optional[int] = None) -> List[IntPercentage]:
@@ -117,8 +775,11 @@ class SysFiles(BrightnessMethod):
 
         results = []
         for device in info:
-            with open(os.path.join(device['path'], 'brightness'), 'r') as f:
-                brightness = int(f.read().rstrip('\n'))
+            try:
+                brightness = cls._get_handle(device).read()
+            except OSError:
+                cls._drop_handle(device)
+                raise
             results.append(int(brightness / device['scale']))
 
         return results
@@ -130,8 +791,47 @@ class SysFiles(BrightnessMethod):
             info = [info[display]]
 
         for device in info:
-            with open(os.path.join(device['path'], 'brightness'), 'w') as f:
-                f.write(str(int(value * device['scale'])))
+            try:
+                cls._get_handle(device).write(int(value * device['scale']))
+            except OSError:
+                cls._drop_handle(device)
+                raise
+
+    @classmethod
+    def get_max_brightness(cls, display: Optional[int] = None) -> List[int]:
+        info = cls.get_display_info()
+        if display is not None:
+            info = [info[display]]
+        # `scale` is `max_brightness / 100`
+        return [round(device['scale'] * 100) for device in info]
+
+    @classmethod
+    def get_brightness_raw(cls, display: Optional[int] = None) -> List[int]:
+        info = cls.get_display_info()
+        if display is not None:
+            info = [info[display]]
+
+        results = []
+        for device in info:
+            try:
+                results.append(cls._get_handle(device).read())
+            except OSError:
+                cls._drop_handle(device)
+                raise
+        return results
+
+    @classmethod
+    def set_brightness_raw(cls, value: int, display: Optional[int] = None):
+        info = cls.get_display_info()
+        if display is not None:
+            info = [info[display]]
+
+        for device in info:
+            try:
+                cls._get_handle(device).write(int(value))
+            except OSError:
+                cls._drop_handle(device)
+                raise
 
 
 class I2C(BrightnessMethod):
@@ -177,10 +877,361 @@ class I2C(BrightnessMethod):
 
     # timings
     WAIT_TIME = 0.05
-    '''How long to wait between I2C commands'''
+    '''
+    The minimum gap between the end of one DDC/CI message on a bus and the start of
+    the next write (or any other message that is not a reply to a request)
+    '''
+    READ_WAIT_TIME = 0.04
+    '''The minimum gap between writing a request and reading the reply from the display'''
+    WORKER_IDLE_TIMEOUT = 5.0
+    '''How long a `BusWorker` thread waits for new requests before exiting'''
+    timing_profiles_path: Optional[str] = os.path.join(_user_cache_dir(), 'ddc_timings.json')
+    '''Where learned DDC/CI timings are persisted between processes. Set to `None` to disable'''
+
+    # discovery
+    PROBE_WORKERS = 8
+    '''The maximum number of I2C buses to probe for EDIDs at the same time'''
+    PROBE_TIMEOUT = 1.0
+    '''How long to wait for all the I2C buses to return an EDID before skipping those that haven't'''
+    PROBE_ALL_BUSES = False
+    '''
+    Probe every `/dev/i2c-*` bus for displays, rather than just the buses that are attached
+    to connected DRM connectors or that belong to a graphics adapter. See `I2C.ddc_capable_buses`
+    '''
+    DISPLAY_ADAPTER_NAMES = re.compile(r'nvidia|nvkm|radeon|amdgpu|i915|gmbus|dpmst|dp.?aux|ddc', re.I)
+    '''
+    Pattern matching the names (`/sys/bus/i2c/devices/i2c-*/name`) of I2C adapters that may
+    carry DDC traffic, for buses that are not linked to any DRM connector
+    '''
 
     _max_brightness_cache: dict = {}
 
+    _connections: Dict[Tuple[str, int], 'I2C.I2CDevice'] = {}
+    '''Pool of open I2C connections, keyed by bus path and slave address'''
+    _bus_topology: Optional[Tuple[str, ...]] = None
+    '''The set of I2C buses present when the pool was last validated'''
+    _connections_lock = threading.Lock()
+    _workers: Dict[str, 'I2C.BusWorker'] = {}
+    '''The `BusWorker` for each I2C bus, keyed by bus path'''
+    _workers_lock = threading.Lock()
+
+    class TimingProfiles():
+        '''
+        Per-display multipliers for the DDC/CI wait times, keyed by EDID.
+        Only used if `.config.ADAPTIVE_DDC_TIMING` is enabled.
+
+        The multiplier is lowered after every few reads that pass validation and raised
+        when a read fails a checksum or length check, so each display converges on the
+        shortest delay it can reliably handle. Writes get no such feedback, so the gaps
+        before them never go below the spec timings (see `I2C.BusScheduler.delay`).
+        '''
+        MIN_FACTOR = 0.25
+        '''The lowest multiplier that will be applied to the DDC/CI wait times'''
+        MAX_FACTOR = 2.0
+        '''The highest multiplier that will be applied to the DDC/CI wait times'''
+        DECREASE = 0.9
+        '''Multiplier applied after `SUCCESS_STREAK` consecutive valid reads'''
+        INCREASE = 2.0
+        '''Multiplier applied after a failed read'''
+        SUCCESS_STREAK = 3
+        '''How many valid reads are required before the delay is lowered'''
+
+        def __init__(self):
+            self._factors: Dict[str, float] = {}
+            self._buses: Dict[str, str] = {}
+            self._streaks: Dict[str, int] = {}
+            self._loaded = False
+            self._dirty = False
+            self._lock = threading.Lock()
+
+        def load(self):
+            '''Load previously learned timings from `I2C.timing_profiles_path`'''
+            with self._lock:
+                self._loaded = True
+                if I2C.timing_profiles_path is None:
+                    return
+                try:
+                    with open(I2C.timing_profiles_path) as f:
+                        stored = json.load(f)
+                except FileNotFoundError:
+                    return
+                except (OSError, ValueError) as e:
+                    _logger.debug(f'failed to load DDC timing profiles - {format_exc(e)}')
+                    return
+                for edid, factor in stored.items():
+                    if isinstance(factor, (int, float)):
+                        self._factors.setdefault(edid, min(self.MAX_FACTOR, max(self.MIN_FACTOR, factor)))
+
+        def save(self):
+            '''Persist learned timings to `I2C.timing_profiles_path`, if any have changed'''
+            with self._lock:
+                if not self._dirty or I2C.timing_profiles_path is None:
+                    return
+                factors = dict(self._factors)
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(I2C.timing_profiles_path), exist_ok=True)
+                tmp_path = f'{I2C.timing_profiles_path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(factors, f)
+                os.replace(tmp_path, I2C.timing_profiles_path)
+            except OSError as e:
+                _logger.debug(f'failed to save DDC timing profiles - {format_exc(e)}')
+
+        def assign(self, bus: str, edid: str):
+            '''
+            Associate an I2C bus with the display connected to it
+
+            Args:
+                bus: the I2C bus path, eg: `/dev/i2c-2`
+                edid: the EDID of the display on that bus
+            '''
+            with self._lock:
+                self._buses[bus] = edid
+
+        def factor(self, bus: str) -> float:
+            '''Returns the wait time multiplier for the display on a bus'''
+            if not config.ADAPTIVE_DDC_TIMING:
+                return 1.0
+            if not self._loaded:
+                self.load()
+            with self._lock:
+                edid = self._buses.get(bus)
+                return 1.0 if edid is None else self._factors.get(edid, 1.0)
+
+        def success(self, bus: str):
+            '''Record that a read from a bus passed validation'''
+            if not config.ADAPTIVE_DDC_TIMING:
+                return
+            if not self._loaded:
+                self.load()
+            with self._lock:
+                edid = self._buses.get(bus)
+                if edid is None:
+                    return
+                factor = self._factors.get(edid, 1.0)
+                streak = self._streaks.get(edid, 0) + 1
+                if streak >= self.SUCCESS_STREAK:
+                    streak = 0
+                    new_factor = max(self.MIN_FACTOR, factor * self.DECREASE)
+                    if new_factor != factor:
+                        self._factors[edid] = new_factor
+                        self._dirty = True
+                self._streaks[edid] = streak
+
+        def failure(self, bus: str):
+            '''Record that a read from a bus failed validation'''
+            if not config.ADAPTIVE_DDC_TIMING:
+                return
+            if not self._loaded:
+                self.load()
+            with self._lock:
+                edid = self._buses.get(bus)
+                if edid is None:
+                    return
+                factor = self._factors.get(edid, 1.0)
+                self._streaks[edid] = 0
+                new_factor = min(self.MAX_FACTOR, factor * self.INCREASE)
+                if new_factor != factor:
+                    _logger.debug(f'backing off DDC timings on {bus} (x{new_factor:.2f})')
+                    self._factors[edid] = new_factor
+                    self._dirty = True
+
+    class BusScheduler():
+        '''
+        Tracks the last DDC/CI transaction on each I2C bus so that commands only sleep
+        for whatever is left of the minimum gap required by the DDC/CI spec, rather
+        than sleeping for the full `WAIT_TIME` before every operation.
+        '''
+
+        def __init__(
+            self,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep
+        ):
+            '''
+            Args:
+                clock: returns the current time in seconds. Must be monotonic
+                sleep: sleeps for the given number of seconds
+            '''
+            self.clock = clock
+            self.sleep = sleep
+            self.profiles = I2C.TimingProfiles()
+            '''Learned per-display timings, used to scale the wait times'''
+            self._last: Dict[str, Tuple[str, float]] = {}
+            self._lock = threading.Lock()
+
+        def delay(self, bus: str, operation: str, factor: Optional[float] = None) -> float:
+            '''
+            Returns how long to wait before performing an operation on a bus
+
+            Args:
+                bus: the I2C bus path, eg: `/dev/i2c-2`
+                operation: either `'read'` or `'write'`
+                factor: the wait time multiplier to use. Defaults to the learned one (see `I2C.TimingProfiles`)
+            '''
+            with self._lock:
+                last = self._last.get(bus)
+            if last is None:
+                return 0
+            last_operation, timestamp = last
+            if (last_operation, operation) == ('write', 'read'):
+                gap = I2C.READ_WAIT_TIME
+            else:
+                gap = I2C.WAIT_TIME
+            if factor is None:
+                factor = self.profiles.factor(bus)
+            if operation == 'write':
+                # nothing validates that a write was received, so never send them faster than the spec allows
+                factor = max(1.0, factor)
+            gap *= factor
+            return max(0, timestamp + gap - self.clock())
+
+        def wait(self, bus: str, operation: str, factor: Optional[float] = None) -> float:
+            '''
+            Sleep until an operation may be performed on a bus
+
+            Args:
+                bus: the I2C bus path, eg: `/dev/i2c-2`
+                operation: either `'read'` or `'write'`
+                factor: see `I2C.BusScheduler.delay`
+
+            Returns:
+                How long was spent sleeping
+            '''
+            delay = self.delay(bus, operation, factor)
+            if delay > 0:
+                self.sleep(delay)
+            return delay
+
+        def record(self, bus: str, operation: str):
+            '''
+            Record that an operation has just finished on a bus
+
+            Args:
+                bus: the I2C bus path, eg: `/dev/i2c-2`
+                operation: either `'read'` or `'write'`
+            '''
+            with self._lock:
+                self._last[bus] = (operation, self.clock())
+
+    class BusWorker():
+        '''
+        Sends all of the DDC/CI traffic for one I2C bus from a single thread, so that requests
+        made from different threads (eg: a fade and a user-initiated set) can't interleave and
+        corrupt each other's transactions.
+
+        Requests are handled in order of priority (see `.helpers.priority`), then in the order
+        they were made. A queued request that shares a key with a newer one is merged into it,
+        so only the latest value is sent. The thread exits after `I2C.WORKER_IDLE_TIMEOUT`
+        seconds without any requests and is restarted when needed.
+        '''
+
+        class Request():
+            '''A function queued to run on a `BusWorker`'''
+
+            def __init__(self, func: Callable, priority: int, key: Optional[Hashable]):
+                self.func = func
+                self.priority = priority
+                self.key = key
+                self.merged: List['I2C.BusWorker.Request'] = []
+                '''Older requests that this one replaced. They complete when this one does'''
+                self.cancelled = False
+                self.done = threading.Event()
+                self.result: Any = None
+                self.error: Optional[Exception] = None
+
+            def complete(self, result: Any = None, error: Optional[Exception] = None):
+                for request in (self, *self.merged):
+                    request.result, request.error = result, error
+                    request.done.set()
+
+        def __init__(self, bus: str):
+            '''
+            Args:
+                bus: the I2C bus path, eg: `/dev/i2c-2`
+            '''
+            self.bus = bus
+            self._queue: List[Tuple[int, int, 'I2C.BusWorker.Request']] = []
+            self._pending: Dict[Hashable, 'I2C.BusWorker.Request'] = {}
+            self._sequence = itertools.count()
+            self._condition = threading.Condition()
+            self._thread: Optional[threading.Thread] = None
+
+        def submit(self, func: Callable, key: Optional[Hashable] = None) -> 'I2C.BusWorker.Request':
+            '''
+            Queue a function to run on the worker thread, at the current `.helpers.priority`
+
+            Args:
+                func: called with no arguments
+                key: if a request with the same key is still queued, it is merged into this one.
+                    For example, two sets of the same VCP code
+
+            Returns:
+                The queued request
+            '''
+            request = self.Request(func, current_priority(), key)
+            with self._condition:
+                if key is not None:
+                    stale = self._pending.get(key)
+                    if stale is not None:
+                        stale.cancelled = True
+                        request.merged += [stale, *stale.merged]
+                        stale.merged = []
+                        # don't keep whoever made the stale request waiting any longer than before
+                        request.priority = min(request.priority, stale.priority)
+                    self._pending[key] = request
+                heapq.heappush(self._queue, (request.priority, next(self._sequence), request))
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name=f'sbc-i2c-worker-{self.bus}', daemon=True)
+                    self._thread.start()
+                self._condition.notify()
+            return request
+
+        def call(self, func: Callable, key: Optional[Hashable] = None) -> Any:
+            '''
+            Same as `BusWorker.submit` but waits for the request to complete.
+
+            Returns:
+                Whatever `func` returns. If the request was merged into a newer one,
+                that request's return value is returned instead
+
+            Raises:
+                Exception: whatever `func` raises
+            '''
+            if threading.current_thread() is self._thread:
+                # already on the worker thread
+                return func()
+            request = self.submit(func, key)
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+            return request.result
+
+        def _run(self):
+            while True:
+                with self._condition:
+                    if not self._queue:
+                        self._condition.wait(I2C.WORKER_IDLE_TIMEOUT)
+                    if not self._queue:
+                        self._thread = None
+                        return
+                    request = heapq.heappop(self._queue)[2]
+                    if request.cancelled:
+                        continue
+                    if request.key is not None and self._pending.get(request.key) is request:
+                        del self._pending[request.key]
+                try:
+                    result = request.func()
+                except Exception as e:
+                    request.complete(error=e)
+                else:
+                    request.complete(result)
+
+    _scheduler: BusScheduler
+    '''Tracks DDC/CI timings for every bus. Created once the class has been defined'''
+
     class I2CDevice():
         '''
         Class to read and write data to an I2C bus,
@@ -221,6 +1272,13 @@ class I2C(BrightnessMethod):
             '''
             return os.write(self.device, data)
 
+        def close(self):
+            '''Close the connection to the I2C bus'''
+            try:
+                os.close(self.device)
+            except OSError:
+                pass
+
     class DDCInterface(I2CDevice):
         '''
         Class to send DDC (Display Data Channel) commands to an I2C device,
@@ -236,9 +1294,10 @@ class I2C(BrightnessMethod):
             '''
             self.logger = _logger.getChild(
                 self.__class__.__name__).getChild(i2c_path)
+            self.i2c_path = i2c_path
             super().__init__(i2c_path, I2C.DDCCI_ADDR)
 
-        def write(self, *args) -> int:
+        def write(self, *args, factor: Optional[float] = None) -> int:
             '''
             Write some data to the I2C device.
 
@@ -249,19 +1308,22 @@ class I2C(BrightnessMethod):
                 *args: variable length list of arguments. This will be put
                     into a `bytearray` and wrapped up in various flags and
                     checksums before being written to the I2C device
+                factor: the wait time multiplier to use. See `I2C.BusScheduler.delay`
 
             Returns:
                 The number of bytes that were written
             '''
-            time.sleep(I2C.WAIT_TIME)
-
             ba = bytearray(args)
             ba.insert(0, len(ba) | self.PROTOCOL_FLAG)  # add length info
             ba.insert(0, I2C.HOST_ADDR_W)  # insert source address
             ba.append(functools.reduce(operator.xor, ba,
                       I2C.DESTINATION_ADDR_W))  # checksum
 
-            return super().write(ba)
+            I2C._scheduler.wait(self.i2c_path, 'write', factor)
+            try:
+                return super().write(ba)
+            finally:
+                I2C._scheduler.record(self.i2c_path, 'write')
 
         def setvcp(self, vcp_code: int, value: int) -> int:
             '''
@@ -276,7 +1338,7 @@ class I2C(BrightnessMethod):
             '''
             return self.write(I2C.SET_VCP_CMD, vcp_code, *value.to_bytes(2, 'big'))
 
-        def read(self, amount: int) -> bytes:
+        def read(self, amount: int, factor: Optional[float] = None) -> bytes:
             '''
             Reads data from the DDC device.
 
@@ -285,13 +1347,16 @@ class I2C(BrightnessMethod):
 
             Args:
                 amount: the number of bytes to read
+                factor: the wait time multiplier to use. See `I2C.BusScheduler.delay`
 
             Raises:
                 ValueError: if the read data is deemed invalid
             '''
-            time.sleep(I2C.WAIT_TIME)
-
-            ba = super().read(amount + 3)
+            I2C._scheduler.wait(self.i2c_path, 'read', factor)
+            try:
+                ba = super().read(amount + 3)
+            finally:
+                I2C._scheduler.record(self.i2c_path, 'read')
 
             # check the bytes read
             checks = {
@@ -319,8 +1384,27 @@ class I2C(BrightnessMethod):
             Raises:
                 ValueError: if the read data is deemed invalid
             '''
-            self.write(I2C.GET_VCP_CMD, vcp_code)
-            ba = self.read(8)
+            profiles = I2C._scheduler.profiles
+            factor = profiles.factor(self.i2c_path)
+            try:
+                result = self._getvcp(vcp_code, factor)
+            except I2CValidationError:
+                if factor >= 1:
+                    profiles.failure(self.i2c_path)
+                    raise
+                # the learned timings may be too short for this display, so try again at the spec timings
+                self.logger.debug(f'retrying getvcp at spec timings (x{factor:.2f} failed)')
+                try:
+                    return self._getvcp(vcp_code, 1.0)
+                finally:
+                    profiles.failure(self.i2c_path)
+            profiles.success(self.i2c_path)
+            return result
+
+        def _getvcp(self, vcp_code: int, factor: float) -> Tuple[int, int]:
+            '''Performs a single `getvcp` transaction, scaling the wait times by `factor`'''
+            self.write(I2C.GET_VCP_CMD, vcp_code, factor=factor)
+            ba = self.read(8, factor=factor)
 
             checks = {
                 'is feature reply': ba[0] == I2C.GET_VCP_REPLY,
@@ -336,66 +1420,322 @@ class I2C(BrightnessMethod):
             return int.from_bytes(ba[6:8], 'big'), int.from_bytes(ba[4:6], 'big')
 
     @classmethod
-    def get_display_info(cls, display: Optional[DisplayIdentifier] = None) -> List[dict]:
-        all_displays = __cache__.get('i2c_display_info')
-        if all_displays is None:
-            all_displays = []
-            index = 0
+    def connect(cls, i2c_path: str, slave_addr: int) -> 'I2C.I2CDevice':
+        '''
+        Returns a pooled connection to an I2C bus, opening one if required.
+        The slave address is only set when the connection is first opened.
+
+        Args:
+            i2c_path: the path to the I2C bus, eg: `/dev/i2c-2`
+            slave_addr: the slave address to talk to. Connections using `DDCCI_ADDR`
+                are returned as `DDCInterface` instances
+        '''
+        key = (i2c_path, slave_addr)
+        with cls._connections_lock:
+            connection = cls._connections.get(key)
+            if connection is None:
+                if slave_addr == cls.DDCCI_ADDR:
+                    connection = cls.DDCInterface(i2c_path)
+                else:
+                    connection = cls.I2CDevice(i2c_path, slave_addr)
+                cls._connections[key] = connection
+            return connection
 
-            for i2c_path in glob.glob('/dev/i2c-*'):
-                if not os.path.exists(i2c_path):
+    @classmethod
+    def disconnect(cls, i2c_path: Optional[str] = None, slave_addr: Optional[int] = None):
+        '''
+        Close pooled connections.
+
+        Args:
+            i2c_path: only close connections to this bus. If unspecified, all buses are closed
+            slave_addr: only close connections using this slave address
+        '''
+        with cls._connections_lock:
+            for key in tuple(cls._connections):
+                if i2c_path is not None and key[0] != i2c_path:
+                    continue
+                if slave_addr is not None and key[1] != slave_addr:
                     continue
+                cls._connections.pop(key).close()
+
+    @classmethod
+    def worker(cls, i2c_path: str) -> 'I2C.BusWorker':
+        '''
+        Returns the `BusWorker` that all DDC/CI traffic for an I2C bus goes through
+
+        Args:
+            i2c_path: the path to the I2C bus, eg: `/dev/i2c-2`
+        '''
+        with cls._workers_lock:
+            worker = cls._workers.get(i2c_path)
+            if worker is None:
+                worker = cls._workers[i2c_path] = cls.BusWorker(i2c_path)
+            return worker
+
+    @classmethod
+    def _getvcp(cls, i2c_path: str, vcp_code: int) -> Tuple[int, int]:
+        '''Calls `DDCInterface.getvcp` on a pooled connection. Must be run on the bus's `BusWorker`'''
+        interface = cast(I2C.DDCInterface, cls.connect(i2c_path, cls.DDCCI_ADDR))
+        try:
+            with bus_locks.hold(i2c_path):
+                return interface.getvcp(vcp_code)
+        except OSError:
+            cls.disconnect(i2c_path, cls.DDCCI_ADDR)
+            raise
+
+    @classmethod
+    def _setvcp(cls, i2c_path: str, vcp_code: int, value: int) -> int:
+        '''Calls `DDCInterface.setvcp` on a pooled connection. Must be run on the bus's `BusWorker`'''
+        interface = cast(I2C.DDCInterface, cls.connect(i2c_path, cls.DDCCI_ADDR))
+        try:
+            with bus_locks.hold(i2c_path):
+                return interface.setvcp(vcp_code, value)
+        except OSError:
+            cls.disconnect(i2c_path, cls.DDCCI_ADDR)
+            raise
+
+    @classmethod
+    def _check_bus_topology(cls, buses: Tuple[str, ...]):
+        '''Close all pooled connections if the set of I2C buses has changed'''
+        if cls._bus_topology is not None and cls._bus_topology != buses:
+            cls._logger.debug('I2C bus topology changed, closing pooled connections')
+            cls.disconnect()
+            shadow.invalidate(method=cls)
+        cls._bus_topology = buses
+
+    @classmethod
+    def ddc_capable_buses(cls) -> Set[str]:
+        '''
+        Builds an allow-list of I2C buses that could have a display attached, so that
+        SMBus, touchpad and sensor adapters are never probed.
+
+        A bus is allowed if it belongs to a connected and enabled DRM connector, or if it is not
+        linked to any DRM connector but its adapter name matches `DISPLAY_ADAPTER_NAMES`
+        (eg: the proprietary NVIDIA driver does not link buses to connectors).
+
+        Returns:
+            A set of bus paths, eg: `{'/dev/i2c-4'}`. This will be empty if the DRM
+            topology could not be determined
+        '''
+        allowed = set()
+        claimed = set()
+        for connector in drm_connectors.connectors():
+            if connector.i2c_bus is None:
+                continue
+            claimed.add(connector.i2c_bus)
+            if connector.status != 'disconnected' and connector.enabled:
+                allowed.add(connector.i2c_bus)
 
+        for adapter in glob.glob('/sys/bus/i2c/devices/i2c-*/name'):
+            bus = os.path.basename(os.path.dirname(adapter)).replace('i2c-', '')
+            if bus in claimed:
+                continue
+            name = _read_sysfs(adapter)
+            if name is not None and cls.DISPLAY_ADAPTER_NAMES.search(name):
+                allowed.add(bus)
+
+        return {f'/dev/i2c-{bus}' for bus in allowed}
+
+    @classmethod
+    def _probe_edid(cls, i2c_path: str, abandoned: Optional[Set[str]] = None) -> Optional[bytes]:
+        '''
+        Read the EDID of the display connected to an I2C bus, if there is one
+
+        Args:
+            i2c_path: the path to the I2C bus, eg: `/dev/i2c-2`
+            abandoned: when probing concurrently, the buses whose probes have been given up on.
+                The probe then reads through its own connection rather than the pool's, and only
+                hands it to the pool (under `_connections_lock`) if the bus hasn't been abandoned
+
+        Returns:
+            The 128 byte EDID, or None if no display was found on the bus
+        '''
+        if not os.path.exists(i2c_path):
+            return None
+
+        device = None
+        try:
+            # open the I2C device using the host read address
+            if abandoned is None:
+                device = cls.connect(i2c_path, cls.HOST_ADDR_R)
+            else:
+                device = cls.I2CDevice(i2c_path, cls.HOST_ADDR_R)
+            # read some 512 bytes from the device
+            data = device.read(512)
+        except IOError as e:
+            cls._logger.error(
+                f'IOError reading from device {i2c_path}: {e}')
+            if abandoned is None:
+                cls.disconnect(i2c_path, cls.HOST_ADDR_R)
+            elif device is not None:
+                device.close()
+            return None
+
+        # search for the EDID header within our 512 read bytes
+        start = data.find(bytes.fromhex('00 FF FF FF FF FF FF 00'))
+        edid = data[start: start + 128] if start >= 0 else None
+
+        if abandoned is None:
+            if edid is None:
+                # no display on this bus, don't hold the connection open
+                cls.disconnect(i2c_path, cls.HOST_ADDR_R)
+            return edid
+
+        # this probe is the only user of its connection, so it is the only one that may close it
+        with cls._connections_lock:
+            pooled = edid is not None and i2c_path not in abandoned
+            if pooled:
+                pooled = cls._connections.setdefault((i2c_path, cls.HOST_ADDR_R), device) is device
+        if not pooled:
+            device.close()
+        return edid
+
+    @classmethod
+    def _probe_buses(cls, buses: Tuple[str, ...]) -> List[Tuple[str, bytes]]:
+        '''
+        Probe a number of I2C buses for EDIDs concurrently, on up to `PROBE_WORKERS` threads.
+        Buses that haven't responded within `PROBE_TIMEOUT` are skipped. A stalled probe keeps its
+        own connection and closes it once the read returns, so nothing it is using is closed underneath it.
+        The probes run on daemon threads, so a stalled bus can't stop the interpreter from exiting.
+
+        Args:
+            buses: the paths of the buses to probe
+
+        Returns:
+            A list of bus paths and the EDIDs found on them, in the same order as `buses`
+        '''
+        if not buses:
+            return []
+
+        workers = max(1, min(cls.PROBE_WORKERS, len(buses)))
+        if workers == 1:
+            results = [(bus, cls._probe_edid(bus)) for bus in buses]
+            return [(bus, edid) for bus, edid in results if edid is not None]
+
+        # `ThreadPoolExecutor` threads are joined when the interpreter exits, which a stalled bus would hold up
+        futures: Dict[str, 'Future[Optional[bytes]]'] = {bus: Future() for bus in buses}
+        pending = iter(buses)
+        pending_lock = threading.Lock()
+        # buses that were still being probed at the deadline. Only changed under `_connections_lock`
+        abandoned: Set[str] = set()
+
+        def probe():
+            while True:
+                with pending_lock:
+                    bus = next(pending, None)
+                if bus is None:
+                    return
+                future = futures[bus]
+                if not future.set_running_or_notify_cancel():
+                    continue
                 try:
-                    # open the I2C device using the host read address
-                    device = cls.I2CDevice(i2c_path, cls.HOST_ADDR_R)
-                    # read some 512 bytes from the device
-                    data = device.read(512)
-                except IOError as e:
-                    cls._logger.error(
-                        f'IOError reading from device {i2c_path}: {e}')
+                    edid = cls._probe_edid(bus, abandoned)
+                except BaseException as e:
+                    with cls._connections_lock:
+                        if bus not in abandoned:
+                            future.set_exception(e)
                     continue
+                with cls._connections_lock:
+                    if bus not in abandoned:
+                        future.set_result(edid)
+
+        for i in range(workers):
+            threading.Thread(target=probe, name=f'sbc-i2c-probe-{i}', daemon=True).start()
+
+        wait_for_futures(futures.values(), timeout=cls.PROBE_TIMEOUT)
+        found = []
+        for bus, future in futures.items():
+            # buses that haven't been started yet are skipped by the workers
+            if not future.cancel():
+                with cls._connections_lock:
+                    if not future.done():
+                        # the probe is stalled on this bus. Leave it to close its own connection
+                        abandoned.add(bus)
+            if bus in abandoned or future.cancelled():
+                cls._logger.warning(f'timed out probing {bus} for an EDID')
+                continue
+            edid = future.result()
+            if edid is not None:
+                found.append((bus, edid))
+        return found
 
-                # search for the EDID header within our 512 read bytes
-                start = data.find(bytes.fromhex('00 FF FF FF FF FF FF 00'))
-                if start < 0:
-                    continue
+    @classmethod
+    def get_display_info(cls, display: Optional[DisplayIdentifier] = None) -> List[dict]:
+        all_displays = __cache__.get('i2c_display_info')
+        if all_displays is None:
+            buses = tuple(sorted(glob.glob('/dev/i2c-*'), key=_i2c_bus_sort_key))
+            cls._check_bus_topology(buses)
 
-                # grab 128 bytes of the edid
-                edid = data[start: start + 128]
-                # parse the EDID
-                (
-                    manufacturer_id,
-                    manufacturer,
-                    model,
-                    name,
-                    serial
-                ) = EDID.parse(edid)
-
-                all_displays.append(
-                    {
-                        'name': name,
-                        'model': model,
-                        'manufacturer': manufacturer,
-                        'manufacturer_id': manufacturer_id,
-                        'serial': serial,
-                        'method': cls,
-                        'index': index,
-                        # convert edid to hex string
-                        'edid': ''.join(f'{i:02x}' for i in edid),
-                        'i2c_bus': i2c_path,
-                        'uid': i2c_path.split('-')[-1]
-                    }
-                )
-                index += 1
+            all_displays = topology_cache.get(cls)
+            if all_displays is not None:
+                for device in all_displays:
+                    cls._scheduler.profiles.assign(device['i2c_bus'], device['edid'])
+            else:
+                all_displays = cls._discover(buses)
+                if all_displays:
+                    topology_cache.store(cls, all_displays)
 
             if all_displays:
-                __cache__.store('i2c_display_info', all_displays, expires=2)
+                __cache__.store('i2c_display_info', all_displays, expires=_display_info_ttl(2))
 
         if display is not None:
             return filter_monitors(display=display, haystack=all_displays, include=['i2c_bus'])
         return all_displays
 
+    @classmethod
+    def _discover(cls, buses: Tuple[str, ...]) -> List[dict]:
+        '''Finds all displays connected to the given I2C buses'''
+        all_displays = []
+        index = 0
+
+        if not cls.PROBE_ALL_BUSES:
+            allowed = cls.ddc_capable_buses()
+            if allowed:
+                buses = tuple(bus for bus in buses if bus in allowed)
+            else:
+                cls._logger.debug('could not determine DDC capable buses, probing all I2C buses')
+
+        # the kernel already exposes the EDIDs of most connected displays, so only
+        # fall back to reading them over the bus when it doesn't
+        known = {bus: edid for bus, edid in drm_edids().items() if bus in buses}
+        found = list(known.items()) + cls._probe_buses(tuple(bus for bus in buses if bus not in known))
+        found.sort(key=lambda item: _i2c_bus_sort_key(item[0]))
+
+        for i2c_path, edid in found:
+            cls._scheduler.profiles.assign(i2c_path, edid.hex())
+            # parse the EDID
+            (
+                manufacturer_id,
+                manufacturer,
+                model,
+                name,
+                serial
+            ) = EDID.parse(edid)
+
+            all_displays.append(
+                {
+                    'name': name,
+                    'model': model,
+                    'manufacturer': manufacturer,
+                    'manufacturer_id': manufacturer_id,
+                    'serial': serial,
+                    'method': cls,
+                    'index': index,
+                    # convert edid to hex string
+                    'edid': ''.join(f'{i:02x}' for i in edid),
+                    'i2c_bus': i2c_path,
+                    'uid': i2c_path.split('-')[-1]
+                }
+            )
+            index += 1
+
+        return all_displays
+
+    @classmethod
+    def bus(cls, display: dict) -> Hashable:
+        '''Implements `BrightnessMethod.bus`. Displays are on the I2C bus they are talked to over'''
+        return display['i2c_bus']
+
     @classmethod
     def get_brightness(cls, display: Optional[int] = None) -> List[IntPercentage]:
         all_displays = cls.get_display_info()
@@ -404,14 +1744,15 @@ class I2C(BrightnessMethod):
 
         results = []
         for device in all_displays:
-            interface = cls.DDCInterface(device['i2c_bus'])
-            value, max_value = interface.getvcp(0x10)
+            value, max_value = cls.worker(device['i2c_bus']).call(
+                functools.partial(cls._getvcp, device['i2c_bus'], 0x10))
 
             # make sure display's max brighness is cached
             cache_ident = '%s-%s-%s' % (device['name'],
                                         device['model'], device['serial'])
             if cache_ident not in cls._max_brightness_cache:
                 cls._max_brightness_cache[cache_ident] = max_value
+                topology_cache.store_max_brightness(cls, cache_ident, max_value)
                 cls._logger.info(
                     f'{cache_ident} max brightness:{max_value} (current: {value})')
 
@@ -442,8 +1783,14 @@ class I2C(BrightnessMethod):
             if max_value != 100:
                 value = int((value / 100) * max_value)
 
-            interface = cls.DDCInterface(device['i2c_bus'])
-            interface.setvcp(0x10, value)
+            # only the latest of any queued sets is sent
+            cls.worker(device['i2c_bus']).call(
+                functools.partial(cls._setvcp, device['i2c_bus'], 0x10, value), key=('setvcp', 0x10))
+
+
+I2C._scheduler = I2C.BusScheduler()
+atexit.register(I2C.disconnect)
+atexit.register(I2C._scheduler.profiles.save)
 
 
 class XRandr(BrightnessMethodAdv):
@@ -457,8 +1804,7 @@ class XRandr(BrightnessMethodAdv):
         '''
         Attempts to find a UID (I2C bus path) for a given display interface.
 
-        This works by parsing the interface name and matching it up to the entries in `/sys/class/drm`.
-        `i2c_bus_from_drm_device` is then used to extract the bus number
+        This works by parsing the interface name and matching it up to the connectors in `drm_connectors`
 
         Args:
             interface: the interface in question. EG: `eDP-1`, `eDP1`, `HDMI-1`...
@@ -466,22 +1812,10 @@ class XRandr(BrightnessMethodAdv):
         Returns:
             The bus number as a string if found. Otherwise, none.
         '''
-        if not os.path.isdir('/sys/class/drm'):
-            return None
-
-        # use regex because sometimes it can be `eDP-1` and sometimes it's `eDP1`
-        if interface_match := re.match(r'([a-z]+)-?(\d+)', interface, re.I):
-            interface, count = interface_match.groups()
-        else:
-            return None
-
-        for dir in os.listdir('/sys/class/drm/'):
-            # use regex here for case insensitivity on the interface
-            if not re.match(r'card\d+-%s(?:-[A-Z])?-%s' % (interface, count), dir, re.I):
-                continue
-            dir = f'/sys/class/drm/{dir}'
-            if bus := i2c_bus_from_drm_device(dir):
-                return bus
+        for connector in drm_connectors.by_interface(interface):
+            if connector.i2c_bus is not None and connector.enabled:
+                return connector.i2c_bus
+        return None
 
     @classmethod
     def _gdi(cls):
@@ -543,6 +1877,17 @@ class XRandr(BrightnessMethodAdv):
         if tmp_display:
             yield tmp_display
 
+    @classmethod
+    def _gdi_once(cls) -> List[dict]:
+        '''
+        Same as `XRandr._gdi` except that, within a `.helpers.DiscoveryContext`, xrandr is only called
+        once. Both the display info and the brightness of every display come from that single call.
+        '''
+        context = current_discovery_context()
+        if context is None:
+            return list(cls._gdi())
+        return [dict(i) for i in context.memo((cls, '_gdi'), lambda: list(cls._gdi()))]
+
     @classmethod
     def get_display_info(cls, display: Optional[DisplayIdentifier] = None, brightness: bool = False) -> List[dict]:
         '''
@@ -555,7 +1900,7 @@ class XRandr(BrightnessMethodAdv):
                 in the returned info
         '''
         valid_displays = []
-        for item in cls._gdi():
+        for item in cls._gdi_once():
             if item['unsupported']:
                 continue
             if not brightness:
@@ -583,9 +1928,77 @@ class XRandr(BrightnessMethodAdv):
         if display is not None:
             info = [info[display]]
 
+        context = current_discovery_context()
         for i in info:
-            check_output([cls.executable, '--output',
-                         i['interface'], '--brightness', value_as_str])
+            try:
+                check_output([cls.executable, '--output',
+                             i['interface'], '--brightness', value_as_str])
+            except Exception:
+                if context is not None:
+                    # not sure what state the display is in now
+                    context.forget((cls, '_gdi'))
+                raise
+
+            # keep the brightness remembered from the last xrandr call up to date
+            if context is not None:
+                for item in context.peek((cls, '_gdi')) or ():
+                    if item['interface'] == i['interface']:
+                        item['brightness'] = int(float(value_as_str) * 100)
+
+    @classmethod
+    def get_brightness_batch(cls, displays: List[int], **kwargs) -> List[Union[IntPercentage, Exception]]:
+        '''
+        Implements `BrightnessMethod.get_brightness_batch`. The brightness of every
+        display is read from a single xrandr call.
+        '''
+        monitors = cls.get_display_info(brightness=True)
+        results: List[Union[IntPercentage, Exception]] = []
+        for display in displays:
+            try:
+                results.append(monitors[display]['brightness'])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @classmethod
+    def set_brightness_batch(
+        cls, values: List[IntPercentage], displays: List[int], **kwargs
+    ) -> List[Optional[Exception]]:
+        '''
+        Implements `BrightnessMethod.set_brightness_batch`. Every display is adjusted
+        with a single xrandr call, so if that call fails, it fails for all of them.
+        '''
+        info = cls.get_display_info()
+        results: List[Optional[Exception]] = []
+        command = [cls.executable]
+        targets = {}
+        for value, display in zip(values, displays):
+            try:
+                interface = info[display]['interface']
+            except Exception as e:
+                results.append(e)
+                continue
+            value_as_str = str(float(value) / 100)
+            command += ['--output', interface, '--brightness', value_as_str]
+            targets[interface] = int(float(value_as_str) * 100)
+            results.append(None)
+
+        if not targets:
+            return results
+
+        context = current_discovery_context()
+        try:
+            check_output(command)
+        except Exception as e:
+            if context is not None:
+                context.forget((cls, '_gdi'))
+            return [result or e for result in results]
+
+        if context is not None:
+            for item in context.peek((cls, '_gdi')) or ():
+                if item['interface'] in targets:
+                    item['brightness'] = targets[item['interface']]
+        return results
 
 
 class DDCUtil(BrightnessMethodAdv):
@@ -618,12 +2031,39 @@ class DDCUtil(BrightnessMethodAdv):
 
         Gets all displays reported by DDCUtil even if they're not supported
         '''
+        edids = drm_edids()
+        if edids:
+            # the kernel already has the EDIDs, so skip the (much slower) verbose detection
+            displays = list(cls._detect(verbose=False))
+            for display in displays:
+                edid = edids.get(display.get('i2c_bus', ''))
+                if edid is None:
+                    continue
+                display['edid'] = display['edid'] or edid.hex()
+                display['bin_serial'] = display['bin_serial'] or f'{int.from_bytes(edid[12:16], "little"):08x}'
+
+            if all(display['edid'] or display['unsupported'] for display in displays):
+                yield from displays
+                return
+            cls._logger.debug('not all EDIDs are exposed by DRM, falling back to verbose detection')
+
+        yield from cls._detect(verbose=True)
+
+    @classmethod
+    def _detect(cls, verbose: bool = True):
+        '''
+        Parses the output of `ddcutil detect`
+
+        Args:
+            verbose: pass the `-v` flag to ddcutil, which is required to get the EDID of each display
+        '''
         raw_ddcutil_output = str(
             check_output(
-                [
-                    cls.executable, 'detect', '-v',
-                    f'--sleep-multiplier={cls.sleep_multiplier}'
-                ] + ['--async'] if cls.enable_async else [], max_tries=cls.cmd_max_tries
+                [cls.executable, 'detect']
+                + (['-v'] if verbose else [])
+                + [f'--sleep-multiplier={cls.sleep_multiplier}']
+                + (['--async'] if cls.enable_async else []),
+                max_tries=cls.cmd_max_tries
             )
         )[2:-1].split('\\n')
         # Use -v to get EDID string but this means output cannot be decoded.
@@ -706,21 +2146,31 @@ class DDCUtil(BrightnessMethodAdv):
     def get_display_info(cls, display: Optional[DisplayIdentifier] = None) -> List[dict]:
         valid_displays = __cache__.get('ddcutil_monitors_info')
         if valid_displays is None:
-            valid_displays = []
-            for item in cls._gdi():
-                if item['unsupported']:
-                    continue
-                del item['unsupported']
-                valid_displays.append(item)
+            valid_displays = topology_cache.get(cls)
+            if valid_displays is None:
+                valid_displays = []
+                for item in cls._gdi():
+                    if item['unsupported']:
+                        continue
+                    del item['unsupported']
+                    valid_displays.append(item)
+
+                if valid_displays:
+                    topology_cache.store(cls, valid_displays)
 
             if valid_displays:
-                __cache__.store('ddcutil_monitors_info', valid_displays)
+                __cache__.store('ddcutil_monitors_info', valid_displays, expires=_display_info_ttl(1))
 
         if display is not None:
             valid_displays = filter_monitors(
                 display=display, haystack=valid_displays, include=['i2c_bus'])
         return valid_displays
 
+    @classmethod
+    def bus(cls, display: dict) -> Hashable:
+        '''Implements `BrightnessMethod.bus`. Displays are on the I2C bus they are talked to over'''
+        return display['i2c_bus']
+
     @classmethod
     def get_brightness(cls, display: Optional[int] = None) -> List[IntPercentage]:
         monitors = cls.get_display_info()
@@ -729,16 +2179,17 @@ class DDCUtil(BrightnessMethodAdv):
 
         res = []
         for monitor in monitors:
-            value = __cache__.get(f'ddcutil_brightness_{monitor["index"]}')
+            value = __cache__.get(str(monitor['index']), region='ddcutil_brightness')
             if value is None:
-                cmd_out = check_output(
-                    [
-                        cls.executable,
-                        'getvcp', '10', '-t',
-                        '-b', str(monitor['bus_number']),
-                        f'--sleep-multiplier={cls.sleep_multiplier}'
-                    ], max_tries=cls.cmd_max_tries
-                ).decode().split(' ')
+                with bus_locks.hold(monitor['i2c_bus']):
+                    cmd_out = check_output(
+                        [
+                            cls.executable,
+                            'getvcp', '10', '-t',
+                            '-b', str(monitor['bus_number']),
+                            f'--sleep-multiplier={cls.sleep_multiplier}'
+                        ], max_tries=cls.cmd_max_tries
+                    ).decode().split(' ')
 
                 value = int(cmd_out[-2])
                 max_value = int(cmd_out[-1])
@@ -752,11 +2203,11 @@ class DDCUtil(BrightnessMethodAdv):
                                             monitor['serial'], monitor['bin_serial'])
                 if cache_ident not in cls._max_brightness_cache:
                     cls._max_brightness_cache[cache_ident] = max_value
+                    topology_cache.store_max_brightness(cls, cache_ident, max_value)
                     cls._logger.debug(
                         f'{cache_ident} max brightness:{max_value} (current: {value})')
 
-                __cache__.store(
-                    f'ddcutil_brightness_{monitor["index"]}', value, expires=0.5)
+                __cache__.store(str(monitor['index']), value, expires=0.5, region='ddcutil_brightness')
             res.append(value)
         return res
 
@@ -766,7 +2217,7 @@ class DDCUtil(BrightnessMethodAdv):
         if display is not None:
             monitors = [monitors[display]]
 
-        __cache__.expire(startswith='ddcutil_brightness_')
+        __cache__.expire(region='ddcutil_brightness')
         for monitor in monitors:
             # check if monitor has a max brightness that requires us to scale this value
             cache_ident = '%s-%s-%s' % (monitor['name'],
@@ -777,13 +2228,244 @@ class DDCUtil(BrightnessMethodAdv):
             if cls._max_brightness_cache[cache_ident] != 100:
                 value = int((value / 100) * cls._max_brightness_cache[cache_ident])
 
-            check_output(
-                [
-                    cls.executable, 'setvcp', '10', str(value),
-                    '-b', str(monitor['bus_number']),
-                    f'--sleep-multiplier={cls.sleep_multiplier}'
-                ], max_tries=cls.cmd_max_tries
-            )
+            with bus_locks.hold(monitor['i2c_bus']):
+                check_output(
+                    [
+                        cls.executable, 'setvcp', '10', str(value),
+                        '-b', str(monitor['bus_number']),
+                        f'--sleep-multiplier={cls.sleep_multiplier}'
+                    ], max_tries=cls.cmd_max_tries
+                )
+
+
+class HotplugListener():
+    '''
+    Listens for kernel uevents from the `drm`, `i2c`, `i2c-dev` and `backlight` subsystems
+    and invalidates exactly the cached display info that they affect, so that displays
+    are rediscovered straight after a hotplug rather than when a cache entry expires.
+    Events that don't connect or disconnect a display (eg: a `change` event for a connector
+    property) leave the caches alone, and only the displays on the affected I2C buses are
+    forgotten by the `.helpers.ShadowState`.
+
+    While a listener is running, display info is cached for `DISPLAY_INFO_TTL` seconds instead
+    of the usual 1-2 seconds, since changes will be picked up as they happen. Backlight brightness
+    changes made by a hotkey or the firmware also clear the `.helpers.ShadowState` for `SysFiles`.
+
+    Example:
+        ```python
+        from screen_brightness_control.linux import HotplugListener
+
+        listener = HotplugListener()
+        listener.on_display_added = lambda name: print('connected', name)
+        listener.on_display_removed = lambda name: print('disconnected', name)
+        listener.start()
+        ```
+    '''
+    _logger = _logger.getChild('HotplugListener')
+
+    NETLINK_KOBJECT_UEVENT = 15
+    '''The netlink protocol that the kernel sends uevents over'''
+    SUBSYSTEMS = ('drm', 'i2c', 'i2c-dev', 'backlight')
+    '''The subsystems that are relevant to display discovery'''
+    DISPLAY_INFO_TTL: float = 60
+    '''How long display info is cached for while a listener is running'''
+    POLL_INTERVAL: float = 0.5
+    '''How often the listener thread checks whether it has been stopped'''
+
+    _running: Set['HotplugListener'] = set()
+    _running_lock = threading.Lock()
+
+    def __init__(self, sock: Optional[socket.socket] = None):
+        '''
+        Args:
+            sock: a socket to read uevents from. By default, a netlink socket subscribed
+                to kernel uevents is opened
+        '''
+        if sock is None:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, self.NETLINK_KOBJECT_UEVENT)
+            # group 1 is uevents straight from the kernel, rather than ones re-broadcast by udev
+            sock.bind((0, 1))
+        self._sock = sock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._connected: Dict[str, Optional[str]] = self._connected_displays()
+
+        self.on_display_added: Optional[Callable[[str], None]] = None
+        '''Called with the name of a DRM connector or backlight when a display is connected'''
+        self.on_display_removed: Optional[Callable[[str], None]] = None
+        '''Called with the name of a DRM connector or backlight when a display is disconnected'''
+
+    @classmethod
+    def active(cls) -> bool:
+        '''Whether any listener is currently running'''
+        with cls._running_lock:
+            return bool(cls._running)
+
+    def start(self):
+        '''Start listening for uevents on a background thread'''
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sbc-hotplug', daemon=True)
+        with self._running_lock:
+            self._running.add(self)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        '''
+        Stop listening and close the socket
+
+        Args:
+            timeout: how long to wait for the listener thread to exit. If it is still running
+                after this, it closes the socket itself once it exits
+        '''
+        self._stop.set()
+        with self._running_lock:
+            self._running.discard(self)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # closing the socket under the thread could hand it someone else's file descriptor
+                return
+            self._thread = None
+        self._sock.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([self._sock], [], [], self.POLL_INTERVAL)
+                if not readable:
+                    continue
+                data = self._sock.recv(16384)
+            except (OSError, ValueError) as e:
+                if not self._stop.is_set():
+                    self._logger.error(f'error reading uevents - {format_exc(e)}')
+                break
+            if not data:
+                break
+            try:
+                self.handle(data)
+            except Exception as e:
+                self._logger.error(f'error handling uevent - {format_exc(e)}')
+        with self._running_lock:
+            self._running.discard(self)
+        if self._stop.is_set():
+            # `stop` may have given up waiting for this thread, leaving the socket open
+            self._sock.close()
+
+    @staticmethod
+    def parse(data: bytes) -> Optional[Dict[str, str]]:
+        '''
+        Parse a kernel uevent, eg: `b'change@/devices/...\\0ACTION=change\\0SUBSYSTEM=drm\\0HOTPLUG=1\\0'`
+
+        Returns:
+            The key-value pairs of the event, or None if the message is not a kernel uevent
+        '''
+        # udev re-broadcasts events with a binary header. Those aren't relevant
+        if data.startswith(b'libudev'):
+            return None
+        header, *fields = data.decode(errors='replace').split('\0')
+        if '@' not in header:
+            return None
+        event = {}
+        for field in fields:
+            key, sep, value = field.partition('=')
+            if sep:
+                event[key] = value
+        event.setdefault('ACTION', header.split('@', 1)[0])
+        return event
+
+    def handle(self, data: bytes):
+        '''
+        Invalidate the caches affected by a uevent and fire any callbacks
+
+        Args:
+            data: the raw uevent
+        '''
+        event = self.parse(data)
+        if event is None or event.get('SUBSYSTEM') not in self.SUBSYSTEMS:
+            return
+        subsystem, action = event['SUBSYSTEM'], event['ACTION']
+        self._logger.debug(f'uevent {action} {event.get("DEVPATH")} ({subsystem})')
+
+        if subsystem == 'backlight':
+            if action not in ('add', 'remove'):
+                # change events are sent whenever the brightness changes, including by this library's own
+                # writes (`SOURCE=sysfs`). Only those from a hotkey or the firmware mean the shadow state
+                # is out of date, and none of them change which displays there are
+                if event.get('SOURCE', 'sysfs') != 'sysfs':
+                    shadow.invalidate(method=SysFiles)
+                return
+            shadow.invalidate(method=SysFiles)
+            SysFiles._display_info_cache = None
+            SysFiles._clear_handles()
+            name = os.path.basename(event.get('DEVPATH', ''))
+            self._fire(self.on_display_added if action == 'add' else self.on_display_removed, name)
+            return
+
+        if subsystem in ('i2c', 'i2c-dev'):
+            # only adapters being added or removed matter, not the devices on them (eg: `.../i2c-7/7-0050`)
+            name = event.get('DEVNAME') or os.path.basename(event.get('DEVPATH', ''))
+            if action in ('add', 'remove') and re.fullmatch(r'i2c-\d+', name):
+                self._buses_changed({name.split('-')[1]})
+            return
+
+        if action in ('add', 'remove'):
+            drm_connectors.clear()
+        connected = self._connected_displays()
+        added = {name: connected[name] for name in connected.keys() - self._connected.keys()}
+        removed = {name: self._connected[name] for name in self._connected.keys() - connected.keys()}
+        self._connected = connected
+        if not added and not removed:
+            return
+
+        self._buses_changed({bus for bus in (*added.values(), *removed.values()) if bus is not None})
+        for name in sorted(added):
+            self._fire(self.on_display_added, name)
+        for name in sorted(removed):
+            self._fire(self.on_display_removed, name)
+
+    def _buses_changed(self, buses: Set[str]):
+        '''
+        Invalidate the caches after displays have been connected to or disconnected from some I2C buses
+
+        Args:
+            buses: the numbers of the affected buses, eg: `{'4'}`
+        '''
+        for bus in buses:
+            I2C.disconnect(f'/dev/i2c-{bus}')
+            # both methods use the bus number as the UID of their displays
+            shadow.invalidate(key=(I2C, bus))
+            shadow.invalidate(key=(DDCUtil, bus))
+        # the displays have to be enumerated again, and DDCUtil's brightness values are cached by
+        # index, which may have changed
+        __cache__.expire('i2c_display_info')
+        __cache__.expire('ddcutil_monitors_info')
+        __cache__.expire(region='ddcutil_brightness')
+
+    def _fire(self, callback: Optional[Callable[[str], None]], name: str):
+        if callback is None:
+            return
+        try:
+            callback(name)
+        except Exception as e:
+            self._logger.error(f'error in hotplug callback for {name} - {format_exc(e)}')
+
+    @staticmethod
+    def _connected_displays() -> Dict[str, Optional[str]]:
+        '''Returns the names of all DRM connectors that have a display connected, and their I2C buses'''
+        return {c.name: c.i2c_bus for c in drm_connectors.connectors() if c.status == 'connected'}
+
+
+def _display_info_ttl(default: float) -> float:
+    '''How long display info should be cached for, depending on whether a `HotplugListener` is running'''
+    return HotplugListener.DISPLAY_INFO_TTL if HotplugListener.active() else default
+
+
+def _i2c_bus_sort_key(path: str) -> Tuple[int, str]:
+    '''Sort key that orders I2C bus paths by bus number, eg: `/dev/i2c-2` before `/dev/i2c-10`'''
+    number = path.rsplit('-', 1)[-1]
+    return (int(number) if number.isdigit() else -1, path)
 
 
 def i2c_bus_from_drm_device(dir: str) -> Optional[str]:
@@ -799,11 +2481,17 @@ def i2c_bus_from_drm_device(dir: str) -> Optional[str]:
         Returns the I2C bus number as a string if found. Otherwise, returns None
     '''
     # check for enabled file and skip device if monitor inactive
-    if os.path.isfile(f'{dir}/enabled'):
-        with open(f'{dir}/enabled') as f:
-            if f.read().strip().lower() != 'enabled':
-                return
+    enabled = _read_sysfs(f'{dir}/enabled')
+    if enabled is not None and enabled.lower() != 'enabled':
+        return None
+
+    return _drm_device_i2c_bus(dir)
+
 
+def _drm_device_i2c_bus(dir: str) -> Optional[str]:
+    '''
+    Same as `i2c_bus_from_drm_device` but does not check whether the device is enabled
+    '''
     # sometimes the i2c path is in /sys/class/drm/*/i2c-*
     # do this first because, in my testing, sometimes a device can have both `.../i2c-X` and `.../ddc/i2c-dev/...`
     # and the latter is usually the wrong i2c path
@@ -816,6 +2504,57 @@ def i2c_bus_from_drm_device(dir: str) -> Optional[str]:
         paths = os.listdir(f'{dir}/ddc/i2c-dev')
         if paths:
             return paths[0].replace('i2c-', '')
+    return None
+
+
+def edid_from_drm_device(dir: str) -> Optional[bytes]:
+    '''
+    Read the EDID that the kernel exposes for a device in `/sys/class/drm`.
+
+    Args:
+        dir: the DRM directory, in the format `/sys/class/drm/<device>`
+
+    Returns:
+        The 128 byte EDID base block, or None if the connector doesn't have one (eg: nothing is plugged in)
+    '''
+    try:
+        with open(f'{dir}/edid', 'rb') as f:
+            data = f.read(128)
+    except OSError:
+        return None
+
+    if len(data) < 128 or not data.startswith(bytes.fromhex('00 FF FF FF FF FF FF 00')):
+        return None
+    return data
+
+
+def drm_edids() -> Dict[str, bytes]:
+    '''
+    Collect the EDIDs of all enabled DRM connectors that are linked to an I2C bus.
+
+    This is much cheaper than reading EDIDs over the I2C bus or asking ddcutil for them,
+    since the kernel has already read them.
+
+    Returns:
+        A dict of I2C bus paths and the EDIDs of the displays on them, eg: `{'/dev/i2c-4': b'...'}`
+    '''
+    edids = {}
+    for connector in drm_connectors.connectors():
+        if connector.i2c_bus is None or not connector.enabled:
+            continue
+        edid = edid_from_drm_device(connector.path)
+        if edid is not None:
+            edids[f'/dev/i2c-{connector.i2c_bus}'] = edid
+    return edids
+
+
+def _read_sysfs(path: str) -> Optional[str]:
+    '''Read a sysfs attribute, returning None if it cannot be read'''
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
 
 
 def list_monitors_info(
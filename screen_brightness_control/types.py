@@ -37,6 +37,11 @@ String values may come in two forms:
 
 Relative brightness values will usually be resolved by the `.helpers.percentage` function.
 '''
+FloatPercentage = float
+'''
+A float between 0 and 100 (inclusive) that represents a brightness level more finely than
+an `IntPercentage`, for displays with more than 100 steps of brightness (see `.Display.get_max_brightness`).
+'''
 
 
 DisplayIdentifier = Union[int, str]
@@ -323,7 +323,7 @@ class VCP(BrightnessMethod):
         values = []
         start = display if display is not None else 0
         for index, handle in enumerate(cls.iter_physical_monitors(start=start), start=start):
-            current = __cache__.get(f'vcp_brightness_{index}')
+            current = __cache__.get(str(index), region='vcp_brightness')
             if current is None:
                 cur_out = DWORD()
                 attempt = 0  # avoid UnboundLocalError in else clause if max_tries is 0
@@ -338,8 +338,7 @@ class VCP(BrightnessMethod):
                         f'failed to get VCP feature reply for display:{index} after {attempt} tries')
 
             if current is not None:
-                __cache__.store(
-                    f'vcp_brightness_{index}', current, expires=0.1)
+                __cache__.store(str(index), current, expires=0.1, region='vcp_brightness')
                 values.append(current)
 
             if display == index:
@@ -359,7 +358,7 @@ class VCP(BrightnessMethod):
             max_tries: the maximum allowed number of attempts to
                 send the VCP input to the display
         '''
-        __cache__.expire(startswith='vcp_brightness_')
+        __cache__.expire(region='vcp_brightness')
         code = BYTE(0x10)
         value_dword = DWORD(value)
         start = display if display is not None else 0
@@ -4,6 +4,7 @@ import platform
 import screen_brightness_control as sbc
 
 from .mocks import os_module_mock
+from .mocks.helpers_mock import FakeClock
 
 # define tests to skip
 collect_ignore = []
@@ -14,6 +15,27 @@ elif platform.system() == 'Linux':
 
 _OS_MODULE = sbc._OS_MODULE
 
+
+def pytest_addoption(parser: pytest.Parser):
+    parser.addoption(
+        '--benchmark', action='store_true', default=False,
+        help='run the tests marked as benchmarks, which depend on wall clock timings'
+    )
+
+
+def pytest_configure(config: pytest.Config):
+    config.addinivalue_line('markers', 'benchmark: depends on wall clock timings. Only run with --benchmark')
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items):
+    if config.getoption('--benchmark'):
+        return
+    skip = pytest.mark.skip(reason='wall clock benchmark, run with --benchmark')
+    for item in items:
+        if item.get_closest_marker('benchmark') is not None:
+            item.add_marker(skip)
+
+
 @pytest.fixture(autouse=True)
 def mock_os_module(monkeypatch: pytest.MonkeyPatch):
     monkeypatch.setattr(sbc, '_OS_MODULE', os_module_mock)
@@ -29,3 +51,9 @@ def original_os_module():
 @pytest.fixture
 def displays(mock_os_module):
     return mock_os_module.list_monitors_info()
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    '''A simulated monotonic clock, for anything that takes a `clock` (and `sleep`) function'''
+    return FakeClock()
@@ -37,3 +37,17 @@ class MockBrightnessMethod(BrightnessMethod):
                 cls.brightness[display_dict['name']] = value
                 if display is not None:
                     return
+
+
+class FakeClock:
+    '''A simulated monotonic clock. Sleeping advances the clock instead of blocking'''
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+        self.slept += seconds
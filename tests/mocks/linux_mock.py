@@ -1,3 +1,5 @@
+import functools
+import operator
 import re
 import textwrap
 from typing import Dict, List, Tuple
@@ -31,6 +33,9 @@ class MockI2C:
         def write(self, data: bytes) -> int:
             return len(data)
 
+        def close(self):
+            pass
+
     class MockDDCInterface(MockI2CDevice):
         def __init__(self, i2c_path: str):
             super().__init__(i2c_path, I2C.DDCCI_ADDR)
@@ -53,6 +58,15 @@ class MockI2C:
             return self._vcp_state.get(vcp_code, 100), 100
 
 
+def ddc_reply(current: int, maximum: int, vcp_code: int = 0x10) -> bytes:
+    '''
+    Builds a valid DDC/CI "get VCP feature" reply packet, as it would be read from the bus
+    '''
+    payload = bytes([I2C.GET_VCP_REPLY, 0, vcp_code, 0]) + maximum.to_bytes(2, 'big') + current.to_bytes(2, 'big')
+    packet = bytes([I2C.DESTINATION_ADDR_W, len(payload) | I2C.DDCInterface.PROTOCOL_FLAG]) + payload
+    return packet + bytes([functools.reduce(operator.xor, packet, I2C.HOST_ADDR_R)])
+
+
 def mock_xrandr_verbose_output(mfg_id: str, name: str, serial: str, index = 1):
     '''
     Mocks the output of `xrandr --verbose` for a display, including a fake edid
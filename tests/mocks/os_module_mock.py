@@ -1,5 +1,9 @@
+from screen_brightness_control.helpers import __Cache
+
 from .helpers_mock import MockBrightnessMethod
 
+__cache__ = __Cache()
+
 class Method1(MockBrightnessMethod):
     @classmethod
     def get_display_info(cls):
@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+import screen_brightness_control as sbc
+from screen_brightness_control import calibration
+from screen_brightness_control.calibration import Calibration
+
+from .mocks.helpers_mock import MockBrightnessMethod
+
+EDID1 = '00ffffffffff00edid1'
+EDID2 = '00ffffffffff00edid2'
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    yield
+    calibration.unregister()
+
+
+class TestCalibration:
+    def test_identity(self):
+        identity = Calibration(range(101))
+        assert all(identity.to_native(i) == identity.to_logical(i) == i for i in range(101))
+
+    def test_round_trip(self):
+        half = Calibration([i // 2 for i in range(101)])
+        assert half.to_native(50) == 25
+        # many logical values share a native value, so the lowest is picked
+        assert half.to_logical(25) == 50
+        assert half.to_logical(half.to_native(100)) == 100
+
+        curve = Calibration.from_points({50: 30, 100: 80})
+        assert all(curve.to_logical(curve.to_native(i)) == i for i in range(101) if i % 5 == 0)
+
+    def test_inverse_picks_nearest(self):
+        step = Calibration([0] * 50 + [100] * 51)
+        assert step.to_logical(0) == 0
+        assert step.to_logical(40) == 49
+        assert step.to_logical(60) == 50
+        assert step.to_logical(100) == 50
+
+    def test_from_points(self):
+        curve = Calibration.from_points({50: 30, 100: 80})
+        assert curve.to_native(0) == 0
+        assert curve.to_native(25) == 15
+        assert curve.to_native(50) == 30
+        assert curve.to_native(75) == 55
+        assert curve.to_native(100) == 80
+
+    def test_float(self):
+        half = Calibration([i // 2 for i in range(101)])
+        assert half.to_native_float(50) == 25
+        assert half.to_native_float(51.5) == 25.5
+        assert half.to_native_float(150) == 50
+        identity = Calibration(range(101))
+        assert identity.to_logical_float(33.25) == 33.25
+        assert calibration.to_native_float(None, 12.5) == 12.5
+
+    def test_is_compact(self):
+        curve = Calibration(range(101))
+        assert curve.table.itemsize == curve.inverse.itemsize == 1
+        assert len(curve.table) == len(curve.inverse) == 101
+
+    @pytest.mark.parametrize('table', [[0] * 100, [0] * 100 + [101], [50] + [0] * 100])
+    def test_invalid(self, table):
+        with pytest.raises(ValueError):
+            Calibration(table)
+
+
+class TestRegistry:
+    def test_register(self):
+        assert calibration.get(EDID1) is None
+        calibration.register(EDID1.upper(), {50: 30})
+        assert calibration.get(EDID1) == Calibration.from_points({50: 30})
+        calibration.register(EDID1, list(range(101)))
+        assert calibration.get(EDID1) == Calibration(range(101))
+        assert calibration.get(None) is None
+
+        calibration.unregister(EDID1)
+        assert calibration.get(EDID1) is None
+
+    def test_to_native_and_logical(self):
+        assert calibration.to_native(EDID1, 50) == 50
+        calibration.register(EDID1, [i // 2 for i in range(101)])
+        assert calibration.to_native(EDID1, 50) == 25
+        assert calibration.to_logical(EDID1, 25) == 50
+        assert calibration.to_native(None, 50) == 50
+
+    def test_load(self, tmp_path: Path):
+        path = tmp_path / 'calibration.json'
+        path.write_text(json.dumps({EDID1: {'50': 30}, EDID2: list(range(101))}))
+        assert calibration.load(str(path)) == 2
+        assert calibration.get(EDID1) == Calibration.from_points({50: 30})
+        assert calibration.get(EDID2) == Calibration(range(101))
+
+    def test_load_is_all_or_nothing(self, tmp_path: Path):
+        path = tmp_path / 'calibration.json'
+        path.write_text(json.dumps({EDID1: {'50': 30}, EDID2: [1, 2, 3]}))
+        with pytest.raises(ValueError):
+            calibration.load(str(path))
+        assert calibration.get(EDID1) is None
+
+
+class TestApplied:
+    @pytest.fixture(autouse=True)
+    def calibrate(self):
+        # the first display is twice as bright as the others
+        calibration.register(EDID1, [i // 2 for i in range(101)])
+
+    @pytest.fixture
+    def brightness(self):
+        MockBrightnessMethod.brightness.clear()
+        return MockBrightnessMethod.brightness
+
+    def test_set_brightness(self, brightness):
+        sbc.set_brightness(80)
+        assert brightness == {'Brand Display1': 40, 'Brand Display2': 80, 'Brand Display3': 80}
+
+    def test_get_brightness(self, brightness):
+        brightness.update({'Brand Display1': 40, 'Brand Display2': 80, 'Brand Display3': 80})
+        assert sbc.get_brightness(display=0) == [80]
+        assert sbc.get_brightness(display=2) == [80]
+
+    def test_set_returns_logical_values(self, brightness):
+        assert sbc.set_brightness(60, display=0, no_return=False) == [60]
+        assert MockBrightnessMethod.brightness['Brand Display1'] == 30
+
+    def test_relative_values(self, brightness):
+        brightness.update({'Brand Display1': 20, 'Brand Display2': 80, 'Brand Display3': 80})
+        sbc.set_brightness('+10', display=0)
+        assert brightness['Brand Display1'] == 25
+
+    def test_display(self, brightness):
+        display = sbc.Display.from_dict(sbc.list_monitors_info()[0])
+        display.set_brightness(100)
+        assert brightness['Brand Display1'] == 50
+        assert display.get_brightness() == 100
+
+    def test_fade(self, brightness, mocker: MockerFixture):
+        spy = mocker.spy(MockBrightnessMethod, 'set_brightness')
+        sbc.fade_brightness(20, start=10, interval=0, display=0, logarithmic=False)
+        assert brightness['Brand Display1'] == 10
+        assert [c.args[0] for c in spy.mock_calls] == [i // 2 for i in range(10, 21)]
@@ -0,0 +1,182 @@
+import time
+from timeit import timeit
+
+import pytest
+from pytest_mock import MockerFixture
+
+import screen_brightness_control as sbc
+from screen_brightness_control import curves
+
+
+class TestCurve:
+    @pytest.mark.parametrize('curve', list(curves.CURVES.values()) + [curves.gamma(2.2)])
+    def test_tables(self, curve: curves.Curve):
+        assert len(curve.table) == curves.DOMAIN + 1
+        assert all(0 <= i <= 100 for i in curve.table)
+        assert list(curve.table) == sorted(curve.table), 'curves should never go backwards'
+        assert curve(100) == pytest.approx(100)
+
+    def test_table_size_is_checked(self):
+        with pytest.raises(ValueError):
+            curves.Curve('short', [0, 100])
+
+    def test_cie_lstar(self):
+        # 50% lightness is roughly 18% luminance
+        assert curves.CIE_LSTAR(50) == pytest.approx(18.4, abs=0.1)
+        assert curves.CIE_LSTAR(0) == 0
+
+    @pytest.mark.parametrize('start,stop,step', [(0, 100, 1), (20, 75, 5), (100, 0, -1), (90, 10, -10)])
+    def test_linear_range_matches_builtin_range(self, start, stop, step):
+        expected = list(range(start, stop + (1 if step > 0 else -1), step))
+        assert list(curves.LINEAR.range(start, stop, step)) == expected
+
+    @pytest.mark.parametrize('curve', list(curves.CURVES))
+    def test_range(self, curve: str):
+        up = curves.get_curve(curve).range(0, 100)
+        down = curves.get_curve(curve).range(100, 0, -1)
+        for values, direction in ((up, 1), (down, -1)):
+            assert all(isinstance(i, int) and 0 <= i <= 100 for i in values)
+            assert all((b - a) * direction > 0 for a, b in zip(values, values[1:]))
+        assert up[-1] == 100
+        # the logarithmic curve starts at 1%
+        assert down[-1] == int(curves.get_curve(curve).table[0])
+
+    def test_dimming_follows_curve_backwards(self):
+        '''Logarithmic fades should take small steps at low brightness levels in both directions'''
+        up = curves.LOGARITHMIC.range(0, 100)
+        down = curves.LOGARITHMIC.range(100, 0, -1)
+        assert up[1] - up[0] < up[-1] - up[-2]
+        assert down[0] - down[1] > down[-2] - down[-1]
+
+    def test_range_bounds(self):
+        assert curves.LINEAR.range(-10, 150, 50) == (0, 50, 100)
+        assert curves.LINEAR.range(0, 100, -1) == ()
+        assert curves.LINEAR.range(40, 40) == (40,)
+        with pytest.raises(ValueError):
+            curves.LINEAR.range(0, 100, 0)
+
+    def test_logarithmic_range_matches_helper(self):
+        for start in range(0, 101, 3):
+            for stop in range(0, 101, 7):
+                for step in (1, 2, 5, 10):
+                    step = step if start <= stop else -step
+                    assert list(curves.LOGARITHMIC.range(start, stop, step)) == list(
+                        sbc.logarithmic_range(start, stop, step)), (start, stop, step)
+
+    def test_range_is_cached(self):
+        assert curves.EASE_IN_OUT.range(3, 97, 2) is curves.EASE_IN_OUT.range(3, 97, 2)
+
+    def test_float_range(self):
+        values = curves.LINEAR.float_range(10, 11, 0.1)
+        assert len(values) == 11
+        assert values[0] == 10 and values[-1] == 11
+        assert all(b > a for a, b in zip(values, values[1:]))
+        # a step that doesn't divide the range still finishes on the target
+        assert curves.LINEAR.float_range(0, 1, 0.3)[-1] == 1
+        down = curves.LINEAR.float_range(50, 40, -0.5)
+        assert down[0] == 50 and down[-1] == 40
+        assert all(b < a for a, b in zip(down, down[1:]))
+        assert curves.LINEAR.float_range(0, 1, -0.1) == ()
+
+
+class TestGetCurve:
+    def test_by_name(self):
+        assert curves.get_curve('logarithmic') is curves.LOGARITHMIC
+        assert curves.get_curve('CIE_LSTAR') is curves.CIE_LSTAR
+        assert curves.get_curve(curves.EASE_OUT) is curves.EASE_OUT
+
+    def test_gamma(self):
+        curve = curves.get_curve('gamma-2.2')
+        assert curve is curves.gamma(2.2)
+        assert curve.name == 'gamma-2.2'
+        assert curve(50) == pytest.approx(100 * 0.5 ** 2.2)
+        for exponent in (0, -1, float('nan'), float('inf')):
+            with pytest.raises(ValueError):
+                curves.gamma(exponent)
+
+    @pytest.mark.parametrize('name', ['squiggly', 'gamma-', 'gamma-x', 'gamma--2'])
+    def test_unknown_name(self, name):
+        with pytest.raises(ValueError):
+            curves.get_curve(name)
+
+    def test_wrong_type(self):
+        with pytest.raises(TypeError):
+            curves.get_curve(123)  # type: ignore
+
+    def test_custom_curves_are_compiled_once(self):
+        calls = []
+
+        def cubic(x):
+            calls.append(x)
+            return x ** 3
+
+        curve = curves.get_curve(cubic)
+        assert curve is curves.get_curve(cubic)
+        assert len(calls) == curves.DOMAIN + 1
+        assert curve.name == 'cubic'
+        assert curve(50) == pytest.approx(12.5)
+
+
+class TestFades:
+    @pytest.fixture
+    def display(self):
+        display = sbc.Display.from_dict(sbc.list_monitors_info()[0])
+        display.set_brightness(50)
+        return display
+
+    @pytest.mark.parametrize('curve', ['cie_lstar', 'gamma-2.2', curves.EASE_IN, lambda x: x ** 3])
+    def test_curve_kwarg(self, display: sbc.Display, mocker: MockerFixture, curve):
+        setter = mocker.spy(display, 'set_brightness')
+        display.fade_brightness(100, start=0, interval=0, curve=curve, force=True)
+        values = [c.args[0] for c in setter.mock_calls]
+        assert list(values) == list(curves.get_curve(curve).range(0, 100))
+
+    def test_curve_overrides_logarithmic(self, display: sbc.Display, mocker: MockerFixture):
+        spy = mocker.spy(curves.LOGARITHMIC, 'range')
+        display.fade_brightness(100, interval=0, curve='linear', logarithmic=True)
+        spy.assert_not_called()
+
+    @pytest.mark.parametrize('start,stop', [(0, 100), (50, 100), (100, 0), (73, 12)])
+    def test_logarithmic_fades_are_unchanged(self, display: sbc.Display, mocker: MockerFixture, start, stop):
+        '''The default fade should step through the same values that `logarithmic_range` gives'''
+        setter = mocker.spy(display, 'set_brightness')
+        display.fade_brightness(stop, start=start, interval=0, force=True)
+        expected = list(sbc.logarithmic_range(start, stop, 1 if start < stop else -1))
+        if expected[-1] != stop:
+            expected.append(stop)
+        assert [c.args[0] for c in setter.mock_calls] == expected
+
+    @pytest.mark.benchmark
+    def test_benchmark(self):
+        '''
+        Working out the values for a fade on each of 50 displays, compared with
+        the per-step maths that `logarithmic_range` does
+        '''
+        DISPLAYS = 50
+
+        def legacy_logarithmic_range(start, stop, step=1):
+            value_range = stop - start
+            last_yielded = None
+            for x in range(start, stop + 1, step):
+                x = int(((10 ** ((((x - start) / value_range) * 100) / 50)) / 100) * value_range + start)
+                if x != last_yielded:
+                    yield x
+                    last_yielded = x
+
+        def legacy():
+            for i in range(DISPLAYS):
+                list(legacy_logarithmic_range(i % 10, 100))
+
+        def tables():
+            for i in range(DISPLAYS):
+                list(curves.LOGARITHMIC.range(i % 10, 100))
+
+        tables()  # the first fade of each kind compiles the values
+        start = time.perf_counter()
+        curves.gamma(1.7).range(0, 100)
+        compile_time = time.perf_counter() - start
+
+        legacy_time = timeit(legacy, number=20)
+        table_time = timeit(tables, number=20)
+        assert table_time * 5 < legacy_time, f'{table_time * 1000:.2f}ms vs {legacy_time * 1000:.2f}ms'
+        assert compile_time < 0.01
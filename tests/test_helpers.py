@@ -1,5 +1,8 @@
 import itertools
 import subprocess
+import threading
+from functools import partial
+from timeit import timeit
 from unittest.mock import Mock, call, mock_open
 import pytest
 import time
@@ -10,48 +13,230 @@ import screen_brightness_control as sbc
 from screen_brightness_control.helpers import EDID, percentage, _monitor_brand_lookup
 
 
+class LegacyCache:
+    '''The cache implementation that `__Cache` replaced, kept for benchmarking'''
+    def __init__(self):
+        self._store = {}
+
+    def expire(self, key=None, startswith=None):
+        if key is not None:
+            self._store.pop(key, None)
+        for k, v in tuple(self._store.items()):
+            if startswith is not None and k.startswith(startswith):
+                del self._store[k]
+                continue
+            if v[1] < time.time():
+                del self._store[k]
+
+    def get(self, key):
+        self.expire()
+        if key not in self._store:
+            return None
+        return self._store[key][0]
+
+    def store(self, key, value, expires=1):
+        self._store[key] = (value, expires + time.time())
+
+
 class TestCache:
     @pytest.fixture(scope='function')
-    def cache(self):
+    def cache(self, clock):
         # have to use getattr otherwise python mangles the name due to lead dunder
-        return getattr(sbc.helpers, '__Cache')()
+        return getattr(sbc.helpers, '__Cache')(clock=clock.clock)
 
     def test_get(self, cache):
-        c_time = time.time()
-        cache._store.update({
-            'a': (123, c_time + 1),
-            'b': (456, c_time - 1)
-        })
+        cache.store('a', 123, expires=1)
+        cache.store('b', 456, expires=-1)
 
         assert cache.get('a') == 123
-        assert 'a' in cache._store
         assert cache.get('b') is None
         # key should have been deleted as expired
-        assert 'b' not in  cache._store
+        assert len(cache._store) == 1
 
     @pytest.mark.parametrize('expires', [1, 3, 5, -1])
-    def test_store(self, cache, expires: int):
-        c_time = time.time()
+    def test_store(self, cache, clock, expires: int):
         cache.store('abc', 123, expires=expires)
-        assert 'abc' in cache._store
-        item = cache._store['abc']
-        assert item[0] == 123
-        assert (c_time + expires) - item[1] < 0.1
-
-    def test_expire(self, cache):
-        cache._store.update({
-            'a': (123, 0),
-            'b': (123, 0),
-            'bc': (123, 0),
-            'def': (123, 0)
-        })
+        if expires > 0:
+            clock.now += expires - 0.01
+            assert cache.get('abc') == 123
+        clock.now += 0.02
+        assert cache.get('abc') is None
+
+    def test_expire(self, cache, clock):
+        for key in ('a', 'b', 'bc', 'def'):
+            cache.store(key, 123)
+        cache.store('1', 123, region='ghi')
+        cache.store('2', 123, region='ghi')
+
         cache.expire('a')
-        assert 'a' not in cache._store
+        assert cache.get('a') is None
         cache.expire(startswith='b')
-        assert 'b' not in cache._store
-        assert 'bc' not in cache._store
-        # `expire` now expires all out of date keys automatically
-        assert 'def' not in cache._store
+        assert cache.get('b') is None
+        assert cache.get('bc') is None
+        assert cache.get('def') == 123
+
+        # a single key can be removed from a region, leaving the rest of it
+        cache.expire('1', region='ghi')
+        assert cache.get('1', region='ghi') is None
+        assert cache.get('2', region='ghi') == 123
+        assert cache.stats()['ghi']['invalidations'] == 1
+
+        cache.store('1', 123, region='ghi')
+        cache.expire(region='ghi')
+        assert cache.get('1', region='ghi') is None
+        assert cache.get('2', region='ghi') is None
+        # the region can be used again afterwards
+        cache.store('1', 456, region='ghi')
+        assert cache.get('1', region='ghi') == 456
+
+        # `expire` expires all out of date keys automatically
+        clock.now += 2
+        cache.expire()
+        assert len(cache._store) == 0
+
+    def test_regions_are_separate(self, cache):
+        cache.store('0', 'a', region='ddcutil_brightness')
+        cache.store('0', 'b', region='vcp_brightness')
+        assert cache.get('0', region='ddcutil_brightness') == 'a'
+        assert cache.get('0', region='vcp_brightness') == 'b'
+        assert cache.get('0') is None
+
+    def test_lru_eviction(self, cache):
+        cache.max_size = 3
+        for key in ('a', 'b', 'c'):
+            cache.store(key, key)
+        cache.get('a')
+        cache.store('d', 'd')
+        assert [cache.get(k) for k in ('a', 'b', 'c', 'd')] == ['a', None, 'c', 'd']
+
+    def test_disabled(self, cache):
+        cache.enabled = False
+        cache.store('a', 123)
+        assert cache.get('a') is None
+
+    def test_expiry_queue_is_bounded(self, cache):
+        for i in range(10000):
+            cache.store('a', i, expires=60)
+        assert len(cache._expiry) <= 4 * cache.max_size
+        assert cache.get('a') == 9999
+
+    def test_thread_safety(self):
+        cache = getattr(sbc.helpers, '__Cache')(max_size=32)
+        errors = []
+
+        def worker(n: int):
+            try:
+                for i in range(2000):
+                    cache.store(str(i % 50), i, expires=0.001 * (i % 3), region=f'r{n % 2}')
+                    cache.get(str(i % 50), region=f'r{n % 2}')
+                    if i % 100 == 0:
+                        cache.expire(region=f'r{n % 2}')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert len(cache._store) <= 32
+
+    class TestStats:
+        def test_counters(self, cache, clock):
+            cache.max_size = 2
+            cache.store('a', 1, expires=1)
+            clock.now += 0.25
+            cache.get('a')
+            clock.now += 0.5
+            cache.get('a')
+            cache.get('missing')
+            clock.now += 1
+            cache.get('a')
+
+            cache.store('1', 1, region='r')
+            cache.store('2', 2, region='r')
+            cache.store('3', 3, region='r')
+            cache.expire(region='r')
+            cache.get('3', region='r')
+
+            stats = cache.stats()
+            assert stats['a'] == {
+                'hits': 2, 'misses': 1, 'expirations': 1, 'invalidations': 0, 'evictions': 0,
+                'mean_age': 0.5, 'max_age': 0.75
+            }
+            assert stats['missing']['misses'] == 1
+            assert stats['r']['evictions'] == 1
+            assert stats['r']['invalidations'] == 1
+            assert stats['r']['misses'] == 1
+            # invalidated values don't also count as expired
+            clock.now += 5
+            cache.expire()
+            assert cache.stats()['r']['expirations'] == 0
+
+        def test_reset_is_atomic(self):
+            cache = getattr(sbc.helpers, '__Cache')()
+            cache.store('a', 1, expires=60)
+            stop = threading.Event()
+            snapshots = []
+
+            def reader():
+                while not stop.is_set():
+                    snapshots.append(cache.stats(reset=True))
+
+            thread = threading.Thread(target=reader)
+            thread.start()
+            for _ in range(5000):
+                cache.get('a')
+            stop.set()
+            thread.join()
+            snapshots.append(cache.stats(reset=True))
+            assert sum(s.get('a', {}).get('hits', 0) for s in snapshots) == 5000
+
+    @pytest.mark.benchmark
+    class TestBenchmarks:
+        ENTRIES = 200
+
+        @pytest.fixture
+        def caches(self):
+            new, legacy = getattr(sbc.helpers, '__Cache')(), LegacyCache()
+            for cache in (new, legacy):
+                for i in range(self.ENTRIES):
+                    cache.store(f'ddcutil_brightness_{i}', i, expires=60)
+            return new, legacy
+
+        def test_get(self, caches):
+            new, legacy = caches
+            new_time = timeit(lambda: new.get('ddcutil_brightness_7'), number=2000)
+            legacy_time = timeit(lambda: legacy.get('ddcutil_brightness_7'), number=2000)
+            assert new_time * 5 < legacy_time, f'{new_time=:.4f}s {legacy_time=:.4f}s'
+
+        def test_invalidate_group(self):
+            new, legacy = getattr(sbc.helpers, '__Cache')(max_size=10000), LegacyCache()
+
+            def fill_new():
+                for i in range(self.ENTRIES):
+                    new.store(str(i), i, expires=60, region='ddcutil_brightness')
+                new.store('other', 1, expires=60)
+
+            def fill_legacy():
+                for i in range(self.ENTRIES):
+                    legacy.store(f'ddcutil_brightness_{i}', i, expires=60)
+                legacy.store('other', 1, expires=60)
+
+            new_time = legacy_time = 0.0
+            for _ in range(20):
+                fill_new()
+                fill_legacy()
+                start = time.perf_counter()
+                new.expire(region='ddcutil_brightness')
+                new_time += time.perf_counter() - start
+                start = time.perf_counter()
+                legacy.expire(startswith='ddcutil_brightness_')
+                legacy_time += time.perf_counter() - start
+            assert new.get('0', region='ddcutil_brightness') is None
+            assert new.get('other') == 1
+            assert new_time < legacy_time, f'{new_time=:.4f}s {legacy_time=:.4f}s'
 
 
 class TestEDID:
@@ -194,6 +379,495 @@ class TestCheckOutput:
         )
 
 
+class TestFanOut:
+    @pytest.fixture
+    def parallel(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(sbc.config, 'PARALLEL', True)
+
+    def test_runs_inline_by_default(self):
+        tasks = [(lane, lambda: threading.current_thread()) for lane in 'abc']
+        assert sbc.helpers.fan_out(tasks) == [threading.current_thread()] * 3
+
+    def test_lanes_run_in_parallel(self, parallel):
+        # would time out if the lanes were run one after another
+        barrier = threading.Barrier(3, timeout=5)
+        tasks = [(lane, lambda lane=lane: (barrier.wait(), lane)[1]) for lane in 'abc']
+        assert sbc.helpers.fan_out(tasks) == ['a', 'b', 'c']
+
+    def test_lane_is_serialised(self, parallel):
+        lock = threading.Lock()
+        order = []
+
+        def task(i):
+            assert lock.acquire(blocking=False), 'tasks in the same lane overlapped'
+            time.sleep(0.01)
+            order.append(i)
+            lock.release()
+            return i
+
+        tasks = [('a' if i % 2 else 'b', lambda i=i: task(i) if i % 2 else i) for i in range(8)]
+        assert sbc.helpers.fan_out(tasks) == list(range(8))
+        assert order == [1, 3, 5, 7]
+
+    def test_context_is_copied(self, parallel):
+        with sbc.helpers.discovery_context() as context:
+            tasks = [(lane, sbc.helpers.current_discovery_context) for lane in 'ab']
+            assert sbc.helpers.fan_out(tasks) == [context, context]
+
+    def test_first_error_is_raised(self, parallel):
+        ran = []
+
+        def task(i):
+            ran.append(i)
+            if i:
+                raise ValueError(i)
+
+        with pytest.raises(ValueError, match='1'):
+            sbc.helpers.fan_out([(i, lambda i=i: task(i)) for i in range(3)])
+        assert sorted(ran) == [0, 1, 2], 'every task should still be run'
+
+    def test_nested_calls_run_inline(self, parallel):
+        def nested():
+            return sbc.helpers.fan_out([(lane, threading.current_thread) for lane in 'ab'])
+
+        for threads in sbc.helpers.fan_out([(lane, nested) for lane in 'ab']):
+            assert threads[0] is threads[1] is not threading.current_thread()
+
+
+class TestFadeEngine:
+    @pytest.fixture
+    def engine(self):
+        return sbc.helpers.FadeEngine()
+
+    def test_steps(self, engine: sbc.helpers.FadeEngine):
+        written = []
+        fade = engine.start('a', written.append, [1, 2, 3], interval=0)
+        assert fade.join(5)
+        assert written == [1, 2, 3]
+        assert not fade.cancelled and fade.error is None
+        assert engine.position('a') is None, 'finished fades are forgotten'
+
+    def test_steps_run_at_fade_priority(self, engine: sbc.helpers.FadeEngine):
+        levels = []
+        engine.start('a', lambda v: levels.append(sbc.helpers.current_priority()), [1], 0).join(5)
+        assert levels == [sbc.helpers.PRIORITY_FADE]
+
+    def test_interval(self, engine: sbc.helpers.FadeEngine):
+        start = time.monotonic()
+        engine.start('a', lambda v: None, [1, 2, 3], interval=0.02).join(5)
+        assert time.monotonic() - start >= 0.04
+
+    def test_retarget(self, engine: sbc.helpers.FadeEngine):
+        written = []
+        first = engine.start('a', written.append, list(range(100)), interval=0.005)
+        while engine.position('a') is None:
+            time.sleep(0.001)
+        second = engine.start('a', written.append, [-1, -2], interval=0)
+        assert second.join(5)
+        assert first.cancelled and not first.is_alive()
+        assert not second.cancelled
+        assert written[-2:] == [-1, -2] and len(written) < 100
+        # the same schedule is carried on, rather than a second one running alongside
+        assert first._track is second._track
+
+    def test_not_stoppable(self, engine: sbc.helpers.FadeEngine):
+        written: dict = {'a': [], 'b': []}
+        first = engine.start('x', written['a'].append, list(range(5)), interval=0.005, stoppable=False)
+        second = engine.start('x', written['b'].append, list(range(5)), interval=0.005, stoppable=False)
+        assert first.join(5) and second.join(5)
+        assert written == {'a': list(range(5)), 'b': list(range(5))}
+
+    def test_cancel(self, engine: sbc.helpers.FadeEngine):
+        written = []
+        fade = engine.start('a', written.append, list(range(100)), interval=0.005)
+        while not written:
+            time.sleep(0.001)
+        fade.cancel()
+        assert fade.join(5) and fade.cancelled
+        count = len(written)
+        time.sleep(0.02)
+        assert len(written) == count < 100
+
+    def test_error(self, engine: sbc.helpers.FadeEngine):
+        setter = Mock(side_effect=[None, OSError('gone'), None])
+        fade = engine.start('a', setter, [1, 2, 3], interval=0)
+        assert fade.join(5)
+        assert isinstance(fade.error, OSError)
+        assert setter.call_count == 2
+
+    def test_duration_on_slow_display(self, engine: sbc.helpers.FadeEngine):
+        '''A fade of 101 steps at 10ms intervals would take over 5 seconds with 50ms writes'''
+        written = []
+
+        def setter(value):
+            time.sleep(0.05)
+            written.append(value)
+
+        engine.start('a', setter, list(range(101)), interval=0.01, duration=0.3).join(5)
+        assert written[-1] == 100
+        assert written == sorted(set(written)), 'values should only move forwards'
+        assert len(written) < 15, 'values the display could not keep up with should be skipped'
+        assert engine.latency('a') >= 0.05
+
+    @pytest.mark.benchmark
+    def test_duration_is_kept_on_slow_display(self, engine: sbc.helpers.FadeEngine):
+        start = time.monotonic()
+        engine.start('a', lambda v: time.sleep(0.05), list(range(101)), interval=0.01, duration=0.3).join(5)
+        took = time.monotonic() - start
+        assert took < 0.45, f'{took * 1000:.0f}ms'
+
+    def test_duration_on_fast_display(self, engine: sbc.helpers.FadeEngine):
+        written = []
+        start = time.monotonic()
+        engine.start('a', written.append, list(range(11)), interval=0, duration=0.1).join(5)
+        took = time.monotonic() - start
+        assert written == list(range(11)), 'no values should be skipped'
+        # a busy machine can only make the fade late, never early
+        assert took >= 0.09, f'{took * 1000:.0f}ms'
+
+    @pytest.mark.benchmark
+    def test_duration_is_kept(self, engine: sbc.helpers.FadeEngine):
+        start = time.monotonic()
+        engine.start('a', lambda v: None, list(range(11)), interval=0, duration=0.1).join(5)
+        took = time.monotonic() - start
+        assert took < 0.2, f'{took * 1000:.0f}ms'
+
+    def test_zero_duration(self, engine: sbc.helpers.FadeEngine):
+        written = []
+        engine.start('a', written.append, list(range(11)), interval=0, duration=0).join(5)
+        assert written == [10]
+
+    def fade_in_lockstep(self, engine: sbc.helpers.FadeEngine) -> dict:
+        '''Fade a fast display (eg: SysFiles) and a slow one (eg: DDC/CI) together and return when each was written'''
+        times: dict = {'fast': [], 'slow': []}
+
+        def setter(key, delay, value):
+            times[key].append(time.monotonic())
+            time.sleep(delay)
+
+        fades = engine.start_group([
+            ('fast', partial(setter, 'fast', 0), list(range(10))),
+            ('slow', partial(setter, 'slow', 0.01), list(range(10)))
+        ], interval=0.002)
+        assert all(fade.join(5) for fade in fades)
+        return times
+
+    def test_group_steps_in_lockstep(self, engine: sbc.helpers.FadeEngine):
+        times = self.fade_in_lockstep(engine)
+        assert len(times['fast']) == len(times['slow']) == 10
+        # each step waits for the slow display to finish the last one
+        gaps = [b - a for a, b in zip(times['fast'], times['fast'][1:])]
+        assert min(gaps) >= 0.01
+
+    @pytest.mark.benchmark
+    def test_group_skew(self, engine: sbc.helpers.FadeEngine):
+        '''Both displays should be written at the same moments'''
+        times = self.fade_in_lockstep(engine)
+        skew = max(abs(a - b) for a, b in zip(times['fast'], times['slow']))
+        assert skew < 0.005, f'{skew * 1000:.1f}ms'
+
+    def test_group_duration(self, engine: sbc.helpers.FadeEngine):
+        '''Displays fading different distances should still reach the same point of the fade together'''
+        written: dict = {'a': [], 'b': []}
+
+        def setter(key, value):
+            time.sleep(0.02 if key == 'b' else 0)
+            written[key].append(value)
+
+        fades = engine.start_group([
+            ('a', partial(setter, 'a'), list(range(101))),
+            ('b', partial(setter, 'b'), list(range(11)))
+        ], interval=0, duration=0.2)
+        assert all(fade.join(5) for fade in fades)
+        assert written['a'][-1] == 100 and written['b'][-1] == 10
+        for a, b in zip(written['a'], written['b']):
+            assert abs(a / 100 - b / 10) <= 0.1 + 1e-9
+
+    def test_group_retarget(self, engine: sbc.helpers.FadeEngine):
+        written: dict = {'a': [], 'b': []}
+        first = engine.start_group([
+            (key, written[key].append, list(range(100))) for key in written
+        ], interval=0.005)
+        while engine.position('a') is None:
+            time.sleep(0.001)
+        second = engine.start('a', written['a'].append, [-1], interval=0)
+        assert second.join(5)
+        assert first[0].cancelled and not first[1].cancelled
+        assert written['a'][-1] == -1
+        first[1].cancel()
+
+    def test_telemetry(self, engine: sbc.helpers.FadeEngine):
+        engine.start('a', lambda v: None, list(range(20)), interval=0.005).join(5)
+        stats = engine.telemetry(reset=True)['a']
+        assert stats['writes'] == 20 and len(stats['samples']) == 20
+        assert 0 <= stats['jitter_p50'] <= stats['jitter_p90'] <= stats['jitter_p99'] <= stats['jitter_max']
+        scheduled = [sample[0] for sample in stats['samples']]
+        assert [b - a for a, b in zip(scheduled, scheduled[1:])] == pytest.approx([0.005] * 19)
+        assert all(scheduled <= started <= finished for scheduled, started, finished in stats['samples'])
+        assert engine.telemetry() == {}
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        assert sbc.helpers._percentile(values, 50) == 50
+        assert sbc.helpers._percentile(values, 99) == 99
+        assert sbc.helpers._percentile([1.0], 90) == 1
+        assert sbc.helpers._percentile([], 50) == 0
+
+    @pytest.mark.benchmark
+    def test_hybrid_sleep_precision(self, engine: sbc.helpers.FadeEngine):
+        '''Writes should start within a fraction of a millisecond of when they were scheduled'''
+        fade, = engine.start_group([('a', lambda v: None, list(range(50)))], interval=0.004)
+        fade.join(5)
+        stats = engine.telemetry()['a']
+        assert stats['jitter_p50'] < 0.001, f'{stats["jitter_p50"] * 1000:.2f}ms'
+
+    def test_only_groups_spin(self, engine: sbc.helpers.FadeEngine, mocker: MockerFixture):
+        '''Unsynchronized fades should wait on the condition rather than busy-waiting'''
+        spy = mocker.spy(sbc.helpers.time, 'sleep')
+        engine.start('a', lambda v: None, list(range(5)), interval=0.004).join(5)
+        assert 0 not in [call.args[0] for call in spy.call_args_list]
+        engine.start_group([('b', lambda v: None, list(range(5)))], interval=0.004)[0].join(5)
+        assert 0 in [call.args[0] for call in spy.call_args_list]
+
+    def test_overlapping_fades(self, engine: sbc.helpers.FadeEngine):
+        '''Each new fade on a display replaces the last, so only the latest one finishes'''
+        written: dict = {key: [] for key in range(10)}
+        fades = [
+            engine.start(i % 10, written[i % 10].append, list(range(i, i + 20)), 0.001)
+            for i in range(100)
+        ]
+        assert all(fade.join(10) for fade in fades)
+        assert [i for i, fade in enumerate(fades) if not fade.cancelled] == list(range(90, 100))
+        assert all(written[key][-1] == 90 + key + 19 for key in written)
+
+    @pytest.mark.benchmark
+    def test_overlapping_fades_benchmark(self, engine: sbc.helpers.FadeEngine):
+        '''
+        100 overlapping fade requests across 10 displays, eg: from someone holding down a
+        brightness hotkey. Compared with the old approach of a thread per display per fade
+        '''
+        REQUESTS, DISPLAYS, STEPS, INTERVAL = 100, 10, 20, 0.002
+        lock = threading.Lock()
+        peak = {'threads': 0, 'writes': 0}
+
+        def setter(value):
+            with lock:
+                peak['writes'] += 1
+                peak['threads'] = max(peak['threads'], threading.active_count())
+            time.sleep(0.0005)
+
+        def legacy_fade(key, latest):
+            # a thread per fade, stopped by checking it is still the latest one for its display
+            latest[key] = threading.current_thread()
+            for value in range(STEPS):
+                if latest[key] is not threading.current_thread():
+                    return
+                setter(value)
+                time.sleep(INTERVAL)
+
+        baseline = threading.active_count()
+        latest: dict = {}
+        threads = [threading.Thread(target=legacy_fade, args=(i % DISPLAYS, latest)) for i in range(REQUESTS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        legacy = (time.perf_counter() - start, peak['threads'] - baseline)
+
+        peak.update(threads=0, writes=0)
+        baseline = threading.active_count()
+        start = time.perf_counter()
+        fades = [engine.start(i % DISPLAYS, setter, list(range(STEPS)), INTERVAL) for i in range(REQUESTS)]
+        for fade in fades:
+            assert fade.join(10)
+        engine_time, engine_threads = time.perf_counter() - start, peak['threads'] - baseline
+
+        # only the latest fade on each display runs to completion
+        assert sum(not fade.cancelled for fade in fades) == DISPLAYS
+        assert engine_threads <= sbc.config.PARALLEL_WORKERS + 1 < legacy[1], (
+            f'{engine_threads} threads vs {legacy[1]} threads'
+        )
+        assert engine_time < legacy[0] * 3, f'{engine_time * 1000:.0f}ms vs {legacy[0] * 1000:.0f}ms'
+
+
+class TestShadowState:
+    @pytest.fixture
+    def shadow(self, clock, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(sbc.config, 'SHADOW_TTL', 1)
+        return sbc.helpers.ShadowState(clock=clock.clock)
+
+    def test_key(self):
+        key = sbc.helpers.ShadowState.key
+        assert key({'method': int, 'uid': None, 'edid': 'abc', 'index': 0}) == (int, 'abc')
+        assert key({'method': int, 'uid': '1', 'edid': 'abc', 'index': 0}) == (int, '1')
+        assert key({'method': int, 'index': 3}) == (int, 3)
+
+    def test_staleness_window(self, shadow, clock):
+        shadow.record('a', 0, 50, 'write')
+        assert shadow.get('a', 0) == 50
+        assert shadow.is_current('a', 0, 50) and not shadow.is_current('a', 0, 51)
+        clock.now += 1
+        assert shadow.get('a', 0) is None
+        # stale entries are still available for inspection
+        entry = shadow.entry('a')
+        assert (entry.value, entry.timestamp, entry.source) == (50, 1000.0, 'write')
+
+    def test_index_change(self, shadow):
+        shadow.record('a', 0, 50, 'read')
+        assert shadow.get('a', 1) is None
+        assert shadow.entry('a') is None
+
+    def test_invalidate(self, shadow):
+        shadow.record((int, 'a'), 0, 1, 'read')
+        shadow.record((int, 'b'), 1, 2, 'read')
+        shadow.record((str, 'c'), 0, 3, 'read')
+        shadow.invalidate((int, 'a'))
+        assert shadow.get((int, 'a'), 0) is None
+        shadow.invalidate(method=int)
+        assert shadow.get((int, 'b'), 1) is None and shadow.get((str, 'c'), 0) == 3
+        shadow.invalidate()
+        assert shadow.get((str, 'c'), 0) is None
+
+    def test_disabled(self, shadow, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(sbc.config, 'SHADOW_TTL', 0)
+        shadow.record('a', 0, 50, 'read')
+        assert shadow.entry('a') is None and shadow.get('a', 0) is None
+
+
+class TestAdjustmentQueue:
+    @pytest.fixture
+    def queue(self):
+        return sbc.helpers.AdjustmentQueue()
+
+    def test_adjust(self, queue):
+        write = Mock()
+        assert queue.adjust('a', 5, lambda: 50, write) == 55
+        write.assert_called_once_with(55)
+        assert queue.adjust('a', -80, lambda: 50, write, lower_bound=1) == 1
+        # nothing is written if the brightness wouldn't change
+        write.reset_mock()
+        assert queue.adjust('a', 10, lambda: 100, write) == 100
+        write.assert_not_called()
+        assert not queue._queues
+
+    def test_queued_adjustments_are_coalesced(self, queue):
+        brightness = {'value': 10}
+        read = Mock(side_effect=lambda: brightness['value'])
+        writing, release = threading.Event(), threading.Event()
+        writes = []
+
+        def write(value):
+            writes.append(value)
+            writing.set()
+            release.wait(5)
+            brightness['value'] = value
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(queue.adjust('a', 2, read, write)))
+            for _ in range(20)
+        ]
+        threads[0].start()
+        assert writing.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while len(queue._queues['a']) < 19:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert brightness['value'] == 50
+        assert writes == [12, 50]
+        read.assert_called_once()
+        assert sorted(results) == [12] + [50] * 19
+
+    def test_queued_deltas_are_clamped_in_order(self, queue):
+        write = Mock()
+        queue._queues['a'] = [
+            sbc.helpers._Adjustment(delta, lower_bound, lambda: 95, write)
+            for delta, lower_bound in ((10, 0), (-10, 0), (-95, 1))
+        ]
+        queue._drain('a')
+        # 95 -> 100 -> 90 -> 1, rather than 95 - 95 = 0
+        write.assert_called_once_with(1)
+
+    def adjust_in_background(self, queue, delta: int, read, write) -> threading.Thread:
+        thread = threading.Thread(target=queue.adjust, args=('a', delta, read, write))
+        thread.start()
+        return thread
+
+    def test_queued_callbacks_are_used(self, queue):
+        '''Each batch should be written with the callbacks it was queued with, not the first caller's'''
+        writing, release = threading.Event(), threading.Event()
+        first, second = Mock(side_effect=lambda v: (writing.set(), release.wait(5))), Mock()
+        threads = [self.adjust_in_background(queue, 5, lambda: 50, first)]
+        assert writing.wait(5)
+        threads.append(self.adjust_in_background(queue, 5, Mock(), second))
+        while len(queue._queues['a']) < 1:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        first.assert_called_once_with(55)
+        second.assert_called_once_with(60)
+
+    def test_first_caller_returns_while_adjustments_keep_arriving(self, queue):
+        '''Someone holding down a hotkey shouldn't stop the first caller from returning'''
+        writes = []
+        releases: list = []
+
+        def write(value):
+            release = threading.Event()
+            releases.append(release)
+            writes.append(value)
+            release.wait(5)
+
+        first = self.adjust_in_background(queue, 1, lambda: 50, write)
+        threads = []
+        for i in range(5):
+            # adjustments arrive while each write is in flight
+            while len(releases) <= i:
+                time.sleep(0.001)
+            threads.append(self.adjust_in_background(queue, 1, Mock(), write))
+            while len(queue._queues['a']) < 1:
+                time.sleep(0.001)
+            releases[i].set()
+            if i == 0:
+                first.join(5)
+                assert not first.is_alive(), 'the first caller should not apply later adjustments'
+        while len(releases) < 6:
+            time.sleep(0.001)
+        releases[5].set()
+        for thread in threads:
+            thread.join(5)
+        assert writes == list(range(51, 57))
+        assert not queue._queues
+
+    def test_errors(self, queue):
+        with pytest.raises(RuntimeError):
+            queue.adjust('a', 5, Mock(side_effect=RuntimeError), Mock())
+        with pytest.raises(ValueError):
+            queue.adjust('a', 5, lambda: 50, Mock(side_effect=ValueError))
+        assert queue.adjust('a', 5, lambda: 50, Mock()) == 55
+
+    def test_interrupted(self, queue):
+        '''Adjustments queued behind one that is interrupted should fail rather than wait forever'''
+        def write(value):
+            queue._queues['a'].append(queued[1])
+            raise KeyboardInterrupt
+
+        queued = [sbc.helpers._Adjustment(5, 0, lambda: 50, write) for _ in range(2)]
+        queue._queues['a'] = queued[:1]
+        with pytest.raises(KeyboardInterrupt):
+            queue._drain('a')
+        assert all(adjustment.done.is_set() for adjustment in queued)
+        assert all(isinstance(adjustment.error, sbc.ScreenBrightnessError) for adjustment in queued)
+        assert not queue._queues
+        assert queue.adjust('a', 5, lambda: 50, Mock()) == 55
+
+
 class TestLogarithmicRange:
     @pytest.fixture(params=[
         (0, 100), (0, 10), (29, 77), (99, 100), (0, 50),
@@ -245,6 +919,15 @@ class TestLogarithmicRange:
             base_range = list(sbc.logarithmic_range(0, 100, step=1))
             assert len(log_range) < len(base_range), 'bigger steps should yield less numbers'
 
+    @pytest.mark.parametrize('args,expected', [
+        ((3, 35, 1), [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 14, 16, 18, 20, 23, 26, 30, 35]),
+        ((3, 0, -2), [3]),
+        ((5, 6), [5])
+    ])
+    def test_values_are_stable(self, args, expected):
+        '''`logarithmic_range` is public, so its values should not change (see `.curves` for the table based curves)'''
+        assert list(sbc.logarithmic_range(*args)) == expected
+
     def test_skip_intervals(self, bounds):
         l_bound, u_bound = bounds
 
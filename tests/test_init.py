@@ -13,6 +13,7 @@ import screen_brightness_control as sbc
 
 from .helpers import BrightnessFunctionTest
 from .mocks import os_module_mock
+from .mocks.helpers_mock import MockBrightnessMethod
 
 
 class TestGetBrightness(BrightnessFunctionTest):
@@ -104,15 +105,48 @@ class TestSetBrightness(BrightnessFunctionTest):
             def counter(*a, **kw):
                 nonlocal count
                 count += 1
-                return [count]
+                return count
 
-            mocker.patch.object(sbc, 'get_brightness', new=counter)
+            mocker.patch.object(sbc.Display, 'get_brightness', new=counter)
+            display_setter = mocker.spy(sbc.Display, 'set_brightness')
             sbc.set_brightness('+10')
             expected = [i + 10 for i in range(count + 1)]
-            actual = [call.args[0] for call in self.setter_spy.mock_calls[1:]]
+            actual = [call.args[1] for call in display_setter.mock_calls]
+            assert len(expected) == len(sbc.list_monitors_info())
             assert expected == actual
 
 
+class TestRelativeAdjustments:
+    def test_new_value_is_not_read_back(self, mocker: MockerFixture):
+        sbc.set_brightness(40, display=0)
+        getter = mocker.spy(sbc.Display, 'get_brightness')
+        assert sbc.set_brightness('+5', display=0, no_return=False) == [45]
+        getter.assert_called_once()
+
+    def test_concurrent_relative_values(self):
+        '''Rapid hotkey presses on several threads shouldn't lose any updates'''
+        sbc.set_brightness(10, display=0)
+        threads = [threading.Thread(target=sbc.set_brightness, args=('+2',), kwargs={'display': 0}) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert sbc.get_brightness(display=0) == [50]
+
+    def test_identical_displays_are_kept_apart(self, mocker: MockerFixture):
+        '''Displays with the same EDID (eg: two of the same model) shouldn't share an adjustment queue'''
+        info = sbc.list_monitors_info()[0]
+        displays = [
+            sbc.Display.from_dict({**info, 'index': 0, 'uid': None}),
+            sbc.Display.from_dict({**info, 'index': 1, 'uid': None})
+        ]
+        spy = mocker.spy(sbc.adjustments, 'adjust')
+        for display in displays:
+            display.adjust_brightness(1)
+        keys = [c.args[0] for c in spy.mock_calls]
+        assert keys[0] != keys[1]
+
+
 class TestFadeBrightness(BrightnessFunctionTest):
     @pytest.fixture
     def operation_type(self):
@@ -125,35 +159,97 @@ class TestFadeBrightness(BrightnessFunctionTest):
         assert sorted(result) == sorted(d['index'] for d in displays)  # type: ignore
 
     def test_blocking_kwarg(self, subtests):
-        threads = sbc.fade_brightness(100, blocking=False, interval=0)
-        assert isinstance(threads, list) and all(isinstance(t, threading.Thread) for t in threads)
-        for index, thread in enumerate(threads):
-            with subtests.test(index=index, thread=thread):
+        fades = sbc.fade_brightness(100, blocking=False, interval=0)
+        assert isinstance(fades, list) and all(isinstance(f, sbc.helpers.Fade) for f in fades)
+        for index, fade in enumerate(fades):
+            with subtests.test(index=index, fade=fade):
                 # assert again for type checker
-                assert isinstance(thread, threading.Thread)
-                thread.join()
+                assert isinstance(fade, sbc.helpers.Fade)
+                assert fade.join(5)
+                assert not fade.is_alive()
 
     def test_passes_kwargs_to_display_class(self, mocker: MockerFixture, subtests):
         '''
-        Most of the fade logic has been moved to `Display.fade_brightness`. The top level
+        Most of the fade logic has been moved to `Display._fade_plan` and the `FadeEngine`. The top level
         `fade_brightness` function is just responsible for coordinating all the different displays.
 
-        This test just checks that we pass all the correct config to the display class, and then the
-        `Display` unit tests will check that all the right things happen
+        This test just checks that we pass all the correct config to the display class and the engine,
+        and then the `Display` unit tests will check that all the right things happen
         '''
-        def stub(*a, **k):
-            pass
-
-        spy = mocker.patch.object(sbc.Display, 'fade_brightness', Mock(side_effect=stub))
-        args = (100,)
-        # all the kwargs that get passed to `Display`
-        kwargs: Dict[str, Any] = dict(
-            start=0, interval=0, increment=10, force=False, logarithmic=False
+        plan = mocker.patch.object(sbc.Display, '_fade_plan', Mock(return_value=('key', Mock(), [1, 2])))
+        start = mocker.patch.object(sbc.helpers.fade_engine, 'start', Mock(return_value=Mock(error=None)))
+        sbc.fade_brightness(
+            100, start=0, interval=0, increment=10, force=False, logarithmic=False, stoppable=True, duration=None,
+            curve=None, native=False
         )
-        sbc.fade_brightness(*args, **kwargs)
-        for index, mock_call in enumerate(spy.mock_calls):
-            with subtests.test(index=index, mock_call=mock_call):
-                assert mock_call == call(*args, **kwargs)
+        assert plan.mock_calls and len(plan.mock_calls) == len(start.mock_calls)
+        for index, (plan_call, start_call) in enumerate(zip(plan.mock_calls, start.mock_calls)):
+            with subtests.test(index=index):
+                assert plan_call == call(100, 0, 10, False, False, True, None, False)
+                assert start_call == call('key', plan.return_value[1], [1, 2], 0, stoppable=True, duration=None)
+        # the top level function waits for all the fades itself
+        start.return_value.join.assert_called()
+
+    def test_plans_are_fanned_out(self, displays, mocker: MockerFixture):
+        '''Reading the starting brightness of each display should go through `fan_out`'''
+        spy = mocker.spy(sbc, 'fan_out')
+        sbc.fade_brightness(50, interval=0, blocking=False)
+        spy.assert_called_once()
+        assert len(spy.call_args.args[0]) == len(displays)
+
+    @pytest.mark.parametrize('synchronized', [False, True])
+    def test_unreadable_display(self, displays, mocker: MockerFixture, synchronized: bool):
+        '''A display whose brightness can't be read shouldn't stop the others from fading'''
+        method = displays[0]['method']
+        # replace any fades left running by earlier tests
+        sbc.fade_brightness(50, interval=0, method=method.__name__)
+        original = method.get_brightness
+
+        def get_brightness(display=None):
+            if display == 0:
+                raise RuntimeError('display 0 is broken')
+            return original(display=display)
+
+        mocker.patch.object(method, 'get_brightness', Mock(side_effect=get_brightness))
+        setter = mocker.spy(method, 'set_brightness')
+        result = sbc.fade_brightness(
+            50, interval=0, method=method.__name__, synchronized=synchronized, logarithmic=False)
+        assert isinstance(result, list) and result[0] is None
+        assert setter.mock_calls and {c.kwargs['display'] for c in setter.mock_calls} == {1}
+
+        fades = sbc.fade_brightness(50, interval=0, method=method.__name__, blocking=False)
+        assert isinstance(fades[0], sbc.helpers.Fade) and isinstance(fades[0].error, RuntimeError)
+        assert fades[1].join(5) and fades[1].error is None
+
+        mocker.patch.object(method, 'get_brightness', Mock(side_effect=RuntimeError('all broken')))
+        with pytest.raises(sbc.ScreenBrightnessError, match='all broken'):
+            sbc.fade_brightness(50, interval=0, method=method.__name__)
+
+    def test_errors(self, displays, mocker: MockerFixture):
+        '''Errors from blocking fades should be reported, rather than only logged'''
+        broken = {0}
+
+        def set_brightness(value, display=None):
+            if display in broken:
+                raise RuntimeError(f'display {display} is broken')
+
+        method = displays[0]['method']
+        mocker.patch.object(method, 'set_brightness', Mock(side_effect=set_brightness))
+        result = sbc.fade_brightness(50, start=40, interval=0, method=method.__name__)
+        assert isinstance(result, list) and result[0] is None and result[1] is not None
+
+        broken.add(1)
+        with pytest.raises(sbc.ScreenBrightnessError, match='(?s)display 0 is broken.*display 1 is broken'):
+            sbc.fade_brightness(50, start=40, interval=0, method=method.__name__)
+
+    def test_synchronized_kwarg(self, displays, mocker: MockerFixture):
+        spy = mocker.spy(sbc.helpers.fade_engine, 'start_group')
+        fades = sbc.fade_brightness(100, start=90, interval=0, blocking=False, synchronized=True)
+        spy.assert_called_once()
+        assert [key for key, _, _ in spy.call_args.args[0]] == [
+            frozenset((d['method'], d['index'])) for d in displays
+        ]
+        assert all(isinstance(f, sbc.helpers.Fade) and f.join(5) for f in fades)
 
 
 def test_list_monitors_info(mock_os_module, mocker: MockerFixture):
@@ -191,6 +287,261 @@ def test_list_monitors(mock_os_module, mocker: MockerFixture):
     assert result == [i['name'] for i in mock_return]
 
 
+def test_cache_stats(mock_os_module):
+    cache = mock_os_module.__cache__
+    cache.stats(reset=True)
+    cache.store('a', 1)
+    cache.get('a')
+    cache.get('b')
+    cache.expire(region='c')
+
+    stats = sbc.cache_stats(reset=True)
+    assert set(stats) == {'a', 'b', 'c'}
+    assert stats['a']['hits'] == 1 and stats['a']['misses'] == 0
+    assert stats['b']['misses'] == 1
+    assert stats['c']['invalidations'] == 1
+    assert sbc.cache_stats() == {}
+
+
+class TestDiscoveryContext:
+    @pytest.fixture
+    def methods(self, mock_os_module, monkeypatch: pytest.MonkeyPatch):
+        '''Brightness methods that count how many times they have enumerated their displays'''
+        def make(name: str):
+            class Counted(MockBrightnessMethod):
+                calls = 0
+                brightness: dict = {}
+
+                @classmethod
+                def get_display_info(cls, display=None):
+                    cls.calls += 1
+                    return [
+                        {
+                            'name': f'{name} {i}', 'model': None, 'manufacturer': None, 'manufacturer_id': None,
+                            'serial': f'{name}{i}', 'edid': None, 'method': cls, 'index': i
+                        }
+                        for i in range(3)
+                    ]
+
+                @classmethod
+                def get_brightness(cls, display=None):
+                    values = [cls.brightness.get(i['name'], 100) for i in cls.get_display_info()]
+                    return values if display is None else [values[display]]
+            Counted.__name__ = name
+            return Counted
+
+        methods = (make('Method1'), make('Method2'))
+        monkeypatch.setattr(mock_os_module, 'METHODS', methods)
+        return methods
+
+    @pytest.mark.parametrize('func,args', [
+        (sbc.get_brightness, ()),
+        (sbc.set_brightness, (50,)),
+        (sbc.set_brightness, ('+10',)),
+    ])
+    def test_methods_enumerated_once_per_call(self, methods, func, args):
+        func(*args)
+        assert [m.calls for m in methods] == [1, 1]
+
+    def test_context_is_per_call(self, methods):
+        sbc.get_brightness()
+        sbc.get_brightness(display=4)
+        assert [m.calls for m in methods] == [2, 2]
+
+    def test_filtered_calls_are_not_remembered(self, methods):
+        with sbc.helpers.discovery_context():
+            methods[0].get_display_info()
+            methods[0].get_display_info()
+            methods[0].get_display_info(display=1)
+        assert methods[0].calls == 2
+
+    def test_empty_discovery_is_retried(self, mocker: MockerFixture, methods):
+        mocker.patch.object(time, 'sleep')
+
+        class Flaky(methods[0]):
+            @classmethod
+            def get_display_info(cls, display=None):
+                # nothing is found the first time
+                displays = super().get_display_info()
+                return [] if cls.calls == 1 else displays
+
+        mocker.patch.object(sbc._OS_MODULE, 'METHODS', (Flaky,))
+        assert len(sbc.get_brightness()) == 3
+        assert Flaky.calls == 2
+
+
+class TestBatching:
+    @pytest.fixture
+    def methods(self, mock_os_module, monkeypatch: pytest.MonkeyPatch):
+        '''Brightness methods that record each batched call they receive'''
+        def make(name: str, offset: int):
+            class Batched(MockBrightnessMethod):
+                batches: list = []
+                brightness: dict = {}
+
+                @classmethod
+                def get_display_info(cls, display=None):
+                    return [
+                        {
+                            'name': f'{name} {i}', 'model': None, 'manufacturer': None, 'manufacturer_id': None,
+                            'serial': f'{name}{i}', 'edid': None, 'method': cls, 'index': i
+                        }
+                        for i in range(2)
+                    ]
+
+                @classmethod
+                def get_brightness(cls, display=None):
+                    return [cls.brightness.get(display, offset + display)]
+
+                @classmethod
+                def set_brightness(cls, value, display=None):
+                    cls.brightness[display] = value
+
+                @classmethod
+                def get_brightness_batch(cls, displays, **kwargs):
+                    cls.batches.append(('get', displays))
+                    return super().get_brightness_batch(displays, **kwargs)
+
+                @classmethod
+                def set_brightness_batch(cls, values, displays, **kwargs):
+                    cls.batches.append(('set', displays))
+                    return super().set_brightness_batch(values, displays, **kwargs)
+            Batched.__name__ = name
+            return Batched
+
+        methods = (make('Method1', 10), make('Method2', 20))
+        monkeypatch.setattr(mock_os_module, 'METHODS', methods)
+        return methods
+
+    def test_one_call_per_method(self, methods):
+        assert sbc.get_brightness() == [10, 11, 20, 21]
+        assert [m.batches for m in methods] == [[('get', [0, 1])], [('get', [0, 1])]]
+
+    def test_set(self, methods):
+        assert sbc.set_brightness(50, no_return=False) == [50] * 4
+        assert methods[0].batches == [('set', [0, 1]), ('get', [0, 1])]
+
+        methods[0].batches.clear()
+        assert sbc.set_brightness(60) is None
+        assert methods[0].batches == [('set', [0, 1])]
+
+    def test_errors_are_per_display(self, mocker: MockerFixture, methods):
+        def get_brightness(display=None):
+            if display == 1:
+                raise ValueError('display 1 is broken')
+            return [30]
+        mocker.patch.object(methods[0], 'get_brightness', Mock(side_effect=get_brightness))
+
+        assert sbc.get_brightness() == [30, None, 20, 21]
+
+        mocker.patch.object(methods[1], 'get_brightness_batch', Mock(side_effect=RuntimeError))
+        with pytest.raises(sbc.ScreenBrightnessError, match='(?s)Method2 0.*RuntimeError.*Method2 1.*RuntimeError'):
+            sbc.get_brightness(method='method2')
+        with pytest.raises(sbc.ScreenBrightnessError) as exc:
+            sbc.get_brightness(display='Method2 1', verbose_error=True)
+        assert 'Traceback' in str(exc.value)
+
+    def test_raw_errors_match(self, mocker: MockerFixture, methods):
+        '''The native-unit functions should report failures the same way as the percentage ones'''
+        mocker.patch.object(methods[1], 'get_brightness_batch', Mock(side_effect=RuntimeError('broken')))
+        mocker.patch.object(methods[1], 'get_brightness_raw', Mock(side_effect=RuntimeError('broken')))
+        with pytest.raises(sbc.ScreenBrightnessError) as expected:
+            sbc.get_brightness(method='method2')
+        with pytest.raises(sbc.ScreenBrightnessError) as exc:
+            sbc.get_brightness_raw(method='method2')
+        assert str(exc.value) == str(expected.value)
+
+    def test_parallel(self, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch, methods):
+        monkeypatch.setattr(sbc.config, 'PARALLEL', True)
+        # every display on its own bus, so all four are queried at once
+        barrier = threading.Barrier(4, timeout=5)
+        for method in methods:
+            mocker.patch.object(method, 'bus', Mock(side_effect=lambda display: display['name']))
+            original = method.get_brightness
+            mocker.patch.object(
+                method, 'get_brightness',
+                Mock(side_effect=lambda display=None, original=original: (barrier.wait(), original(display))[1])
+            )
+
+        assert sbc.get_brightness() == [10, 11, 20, 21]
+        assert methods[0].batches == [('get', [0]), ('get', [1])]
+
+    def test_parallel_errors_keep_display_order(self, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch, methods):
+        monkeypatch.setattr(sbc.config, 'PARALLEL', True)
+        for method in methods:
+            mocker.patch.object(method, 'bus', Mock(side_effect=lambda display: display['name']))
+            mocker.patch.object(method, 'get_brightness', Mock(side_effect=RuntimeError))
+
+        with pytest.raises(sbc.ScreenBrightnessError) as exc:
+            sbc.get_brightness()
+        names = [line.split(' (')[0].strip() for line in str(exc.value).strip().splitlines()]
+        assert names == ['Method1 0', 'Method1 1', 'Method2 0', 'Method2 1']
+
+    class TestShadowState:
+        @pytest.fixture(autouse=True)
+        def enable(self, monkeypatch: pytest.MonkeyPatch):
+            monkeypatch.setattr(sbc.config, 'SHADOW_TTL', 60)
+            yield
+            sbc.helpers.shadow.invalidate()
+
+        def test_reads_are_served_from_shadow(self, methods):
+            assert sbc.get_brightness() == sbc.get_brightness() == [10, 11, 20, 21]
+            assert methods[0].batches == [('get', [0, 1])]
+            entry = sbc.helpers.shadow.entry((methods[0], 'Method10'))
+            assert (entry.value, entry.source, entry.index) == (10, 'read', 0)
+
+        def test_no_op_writes_are_skipped(self, methods):
+            sbc.set_brightness(50, display='Method1 0')
+            assert sbc.set_brightness(50, no_return=False) == [50] * 4
+            # the first display was already at 50 and nothing needs reading back
+            assert methods[0].batches == [('set', [0]), ('set', [1])]
+            assert methods[1].batches == [('set', [0, 1])]
+
+        def test_relative_values(self, methods, mocker: MockerFixture):
+            sbc.set_brightness(50, display='Method1 0')
+            get_brightness = mocker.spy(methods[0], 'get_brightness')
+            assert sbc.set_brightness('+10', display='Method1 0', no_return=False) == [60]
+            get_brightness.assert_not_called()
+            assert methods[0].brightness[0] == 60
+
+        def test_display(self, methods, mocker: MockerFixture):
+            display = sbc.Display.from_dict(sbc.list_monitors_info()[0])
+            set_brightness = mocker.spy(methods[0], 'set_brightness')
+            display.set_brightness(30)
+            display.set_brightness(30)
+            set_brightness.assert_called_once_with(30, display=0)
+            get_brightness = mocker.spy(methods[0], 'get_brightness')
+            assert display.get_brightness() == 30
+            get_brightness.assert_not_called()
+
+            display.set_brightness_raw(45)
+            assert display.get_brightness() == 45
+            get_brightness.assert_called_once()
+
+        def test_failed_writes_are_forgotten(self, methods, mocker: MockerFixture):
+            sbc.get_brightness()
+            mocker.patch.object(methods[0], 'set_brightness', Mock(side_effect=RuntimeError))
+            sbc.set_brightness(50)
+            assert sbc.helpers.shadow.entry((methods[0], 'Method10')) is None
+            assert sbc.helpers.shadow.entry((methods[1], 'Method20')).value == 50
+
+        def test_calibrated_values(self, methods):
+            sbc.calibration.register('abc', [i // 2 for i in range(101)])
+            try:
+                for method in methods:
+                    method.get_display_info = classmethod(  # type: ignore
+                        lambda cls, display=None, original=method.get_display_info: [
+                            {**i, 'edid': 'abc'} if i['index'] == 0 else i for i in original()
+                        ]
+                    )
+                sbc.set_brightness(80, display=0)
+                assert sbc.helpers.shadow.entry((methods[0], 'abc')).value == 40
+                assert sbc.get_brightness(display=0) == [80]
+                assert methods[0].batches == [('set', [0])]
+            finally:
+                sbc.calibration.unregister()
+
+
 class TestGetMethods:
     def test_returns_dict_of_brightness_methods(self, subtests):
         methods = sbc.get_methods()
@@ -245,6 +596,13 @@ class TestDisplay:
             display.fade_brightness(100, start=value, interval=0)
             assert spy.mock_calls[0].args[0] == value
 
+        def test_errors_are_raised(self, display: sbc.Display, mocker: MockerFixture):
+            mocker.patch.object(display.method, 'set_brightness', Mock(side_effect=RuntimeError('broken')))
+            with pytest.raises(RuntimeError, match='broken'):
+                display.fade_brightness(60, interval=0)
+            fade = display.fade_brightness(60, interval=0, blocking=False)
+            assert fade.join(5) and isinstance(fade.error, RuntimeError)
+
         def test_interval_kwarg(self, display: sbc.Display):
             assert (
                 timeit(lambda: display.fade_brightness(100, start=95, interval=0), number=1)
@@ -282,7 +640,7 @@ class TestDisplay:
 
         def test_logarithmic_kwarg(self, display: sbc.Display, mocker: MockerFixture):
             # range_spy = mocker.spy(sbc, 'range')  # cant spy on range?
-            logarithmic_range_spy = mocker.spy(sbc, 'logarithmic_range')
+            logarithmic_range_spy = mocker.spy(sbc.curves.LOGARITHMIC, 'range')
 
             display.fade_brightness(100, interval=0)
             # range_spy.assert_not_called()
@@ -295,6 +653,13 @@ class TestDisplay:
             # range_spy.assert_called()
             logarithmic_range_spy.assert_not_called()
 
+        def test_duration_kwarg(self, display: sbc.Display, mocker: MockerFixture):
+            setter = mocker.patch.object(display, 'set_brightness', Mock(side_effect=lambda *a, **k: time.sleep(0.02)))
+            display.fade_brightness(100, start=0, interval=0.01, duration=0.1, logarithmic=False)
+            values = [c.args[0] for c in setter.mock_calls]
+            # the display can't keep up with the interval, so steps are skipped to finish on time
+            assert values[-1] == 100 and len(values) < 20
+
         def test_end_of_fade_correction(self, display: sbc.Display, mocker: MockerFixture):
             '''
             If the brightness does not match the target at the end of the fade then
@@ -351,8 +716,9 @@ class TestDisplay:
             assert round(call_count / steps) == 2   # 2 stands for the expected number of running threads
 
             # Ensure all threads complete to prevent interference with subsequent tests.
-            while threading.active_count() > 1:
-                time.sleep(interval)
+            # Only this test's threads are waited for, since the library's thread pool stays alive
+            for thread in (thread_0, thread_1, thread_2, thread_3):
+                thread.join()
 
     class TestFromDict:
         def test_returns_valid_instance(self, subtests):
@@ -378,6 +744,70 @@ class TestDisplay:
         # method returns list[int]. display should return int
         assert isinstance(result, int) and result == spy.spy_return[0]
 
+    class TestNativeResolution:
+        @pytest.fixture
+        def raw(self, display: sbc.Display, mocker: MockerFixture) -> Dict[str, int]:
+            '''Gives the display 10000 steps of brightness and returns its raw state'''
+            state = {'value': 5000}
+            mocker.patch.object(display.method, 'get_max_brightness', Mock(return_value=[10000]))
+            mocker.patch.object(
+                display.method, 'get_brightness_raw', Mock(side_effect=lambda display=None: [state['value']])
+            )
+            mocker.patch.object(
+                display.method, 'set_brightness_raw',
+                Mock(side_effect=lambda value, display=None: state.update(value=value))
+            )
+            return state
+
+        def test_max_brightness_is_cached(self, display: sbc.Display, raw):
+            assert display.get_max_brightness() == display.get_max_brightness() == 10000
+            cast(Mock, display.method.get_max_brightness).assert_called_once_with(display=display.index)
+
+        def test_float(self, display: sbc.Display, raw):
+            display.set_brightness_float(12.34)
+            assert raw['value'] == 1234
+            assert display.get_brightness_float() == pytest.approx(12.34)
+            assert display.get_brightness_raw() == 1234
+
+        def test_float_lower_bound(self, display: sbc.Display, mocker: MockerFixture, raw):
+            mocker.patch.object(sbc.platform, 'system', new=lambda: 'Linux')
+            display.set_brightness_float(0)
+            assert raw['value'] == 100
+            display.set_brightness_float(0, force=True)
+            assert raw['value'] == 0
+
+        def test_raw_is_clamped(self, display: sbc.Display, raw):
+            display.set_brightness_raw(20000)
+            assert raw['value'] == 10000
+            display.set_brightness_raw(-5)
+            assert raw['value'] == 0
+
+        def test_native_fade(self, display: sbc.Display, raw):
+            setter = cast(Mock, display.method.set_brightness_raw)
+            display.fade_brightness(11, start=10, interval=0, increment=0.1, logarithmic=False, native=True)
+            assert [c.args[0] for c in setter.mock_calls] == list(range(1000, 1101, 10))
+
+        def test_native_needs_fine_grained_display(self, display: sbc.Display, mocker: MockerFixture):
+            setter = mocker.spy(display.method, 'set_brightness')
+            display.fade_brightness(60, start=50, interval=0, logarithmic=False, native=True)
+            assert [c.args[0] for c in setter.mock_calls] == list(range(50, 61))
+
+        @pytest.mark.parametrize('increment,expected', [(0.1, range(50, 61)), (2.6, range(50, 61, 3))])
+        def test_fractional_increment_on_coarse_display(
+            self, display: sbc.Display, mocker: MockerFixture, increment: float, expected: range
+        ):
+            setter = mocker.spy(display.method, 'set_brightness')
+            display.fade_brightness(60, start=50, interval=0, increment=increment, logarithmic=False, native=True)
+            assert [c.args[0] for c in setter.mock_calls][:len(expected)] == list(expected)
+            assert setter.mock_calls[-1].args[0] == 60
+
+        def test_top_level(self):
+            sbc.set_brightness_raw(40, display=0)
+            assert MockBrightnessMethod.brightness['Brand Display1'] == 40
+            assert sbc.get_brightness_raw(display=0) == [40]
+            assert sbc.set_brightness_raw(30, display=0, no_return=False) == [30]
+            assert len(sbc.get_brightness_raw()) == len(sbc.list_monitors_info())
+
     class TestGetIdentifier:
         def test_returns_tuple(self, display: sbc.Display):
             result = display.get_identifier()
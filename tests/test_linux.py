@@ -1,22 +1,74 @@
+import fcntl
 import glob
+import json
 import os
+import random
 import re
-from typing import Type
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from timeit import timeit
+from types import SimpleNamespace
+from typing import List, Tuple, Type
 from unittest.mock import Mock, call
 
 import pytest
 from pytest import MonkeyPatch
-from .mocks.linux_mock import MockI2C, mock_check_output
+from .mocks.helpers_mock import FakeClock
+from .mocks.linux_mock import MockI2C, ddc_reply, mock_check_output
 from pytest_mock import MockerFixture
 
 import screen_brightness_control as sbc
 from screen_brightness_control import linux
+from screen_brightness_control.exceptions import BusLockTimeoutError
 from screen_brightness_control.helpers import BrightnessMethod
 
-from .helpers import BrightnessMethodTest
+from .helpers import BrightnessMethodTest, fake_edid
+
+
+@pytest.fixture(autouse=True)
+def timing_profiles_path(tmp_path, monkeypatch: MonkeyPatch):
+    '''Stop tests from reading or writing learned DDC timings in the user's home dir'''
+    path = str(tmp_path / 'ddc_timings.json')
+    monkeypatch.setattr(linux.I2C, 'timing_profiles_path', path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def reset_drm_connectors():
+    linux.drm_connectors.clear()
+    yield
+    linux.drm_connectors.clear()
+
+
+@pytest.fixture(autouse=True)
+def topology_cache_path(tmp_path, monkeypatch: MonkeyPatch):
+    '''Stop tests from reading or writing cached displays in the user's home dir'''
+    path = str(tmp_path / 'topology.json')
+    monkeypatch.setattr(linux.TopologyCache, 'path', path)
+    linux.topology_cache.clear()
+    yield path
+    linux.topology_cache.clear()
+
+
+@pytest.fixture
+def disk_cache(monkeypatch: MonkeyPatch) -> dict:
+    '''Enable the on-disk topology cache, with a fingerprint that can be changed by the test'''
+    fingerprint = {'value': 'abc'}
+    monkeypatch.setattr(sbc.config, 'DISK_CACHE', True)
+    monkeypatch.setattr(linux.TopologyCache, 'fingerprint', staticmethod(lambda: fingerprint['value']))
+    return fingerprint
 
 
 class TestSysFiles(BrightnessMethodTest):
+    @pytest.fixture(scope='function', autouse=True)
+    def cleanup(self, method: linux.SysFiles):
+        method._display_info_cache = None
+        method._handles = {}
+
     @pytest.fixture
     def patch_get_display_info(self, mocker: MockerFixture):
         '''Mock everything needed to get `SysFiles.get_display_info` to run'''
@@ -34,11 +86,32 @@ class TestSysFiles(BrightnessMethodTest):
         mocker.patch.object(sbc.linux, 'open', mocker.mock_open(read_data='100'), spec=True)
 
     @pytest.fixture
-    def patch_get_brightness(self, mocker: MockerFixture, patch_get_display_info):
+    def patch_brightness_handle(self, mocker: MockerFixture):
+        '''Replace `_BrightnessHandle` with a mock that records reads and writes'''
+        class FakeHandle:
+            instances: list = []
+            value = 100
+
+            def __init__(self, path: str):
+                self.path = path
+                self.read = Mock(side_effect=lambda: FakeHandle.value)
+                self.write = Mock()
+                self.close = Mock()
+                self.instances.append(self)
+
+        FakeHandle.instances = []
+        spy = Mock(side_effect=FakeHandle)
+        spy.instances = FakeHandle.instances
+        spy.fake = FakeHandle
+        mocker.patch.object(linux, '_BrightnessHandle', spy)
+        return spy
+
+    @pytest.fixture
+    def patch_get_brightness(self, mocker: MockerFixture, patch_get_display_info, patch_brightness_handle):
         pass
 
     @pytest.fixture
-    def patch_set_brightness(self, mocker: MockerFixture, patch_get_display_info):
+    def patch_set_brightness(self, mocker: MockerFixture, patch_get_display_info, patch_brightness_handle):
         pass
 
     @pytest.fixture
@@ -58,66 +131,191 @@ class TestSysFiles(BrightnessMethodTest):
             display = method.get_display_info()[0]
             assert display['scale'] == max_brightness / 100
 
+        def test_cached_until_topology_changes(self, mocker: MockerFixture, method: Type[linux.SysFiles]):
+            spy = mocker.spy(method, '_discover')
+            first = method.get_display_info()
+            assert method.get_display_info() == first
+            spy.assert_called_once()
+
+            handle = Mock()
+            method._handles = {'/sys/class/backlight/edp1': handle}
+            mocker.patch.object(method, '_topology', Mock(return_value=('edp1', 'edp2')))
+            method.get_display_info()
+            assert spy.call_count == 2, 'new backlight entry should trigger rediscovery'
+            handle.close.assert_called_once()
+            assert method._handles == {}
+
+        def test_cache_is_not_exposed(self, method: Type[linux.SysFiles]):
+            first = method.get_display_info()
+            expected = [dict(d) for d in first]
+            first[0]['name'] = 'changed'
+            first.clear()
+            assert method.get_display_info() == expected
+            method.get_display_info(display=0)[0]['index'] = 99
+            assert method.get_display_info() == expected
+
     class TestGetBrightness(BrightnessMethodTest.TestGetBrightness):
         class TestDisplayKwarg(BrightnessMethodTest.TestGetBrightness.TestDisplayKwarg):
-            def test_with(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info, subtests):
-                mock = mocker.patch.object(sbc.linux, 'open', mocker.mock_open(read_data='100'), spec=True)
+            def test_with(self, method: Type[BrightnessMethod], freeze_display_info, patch_brightness_handle, subtests):
                 for index, display in enumerate(freeze_display_info):
                     with subtests.test(index=index):
                         method.get_brightness(display=index)
-                        mock.assert_called_once_with(os.path.join(display['path'], 'brightness'), 'r')
-                        mock.reset_mock()
+                        patch_brightness_handle.assert_called_once_with(os.path.join(display['path'], 'brightness'))
+                        patch_brightness_handle.instances[-1].read.assert_called_once_with()
+                        patch_brightness_handle.reset_mock()
 
-            def test_without(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info):
-                mock = mocker.patch.object(sbc.linux, 'open', mocker.mock_open(read_data='100'), spec=True)
+            def test_without(self, method: Type[BrightnessMethod], freeze_display_info, patch_brightness_handle):
                 method.get_brightness()
                 paths = [os.path.join(device['path'], 'brightness') for device in freeze_display_info]
-                called_paths = [i[0][0] for i in mock.call_args_list]
+                called_paths = [i[0][0] for i in patch_brightness_handle.call_args_list]
                 assert paths == called_paths
 
         @pytest.mark.parametrize('brightness', (100, 0, 50, 99))
         @pytest.mark.parametrize('scale', (1, 2, 0.5, 8))
-        def test_brightness_is_scaled(self, mocker: MockerFixture, method: Type[BrightnessMethod], brightness: int, scale: float):
+        def test_brightness_is_scaled(
+            self, mocker: MockerFixture, method: Type[BrightnessMethod], patch_brightness_handle,
+            brightness: int, scale: float
+        ):
             display = method.get_display_info()[0]
             display['scale'] = scale
             mocker.patch.object(method, 'get_display_info', Mock(return_value=[display]), spec=True)
-            mocker.patch.object(sbc.linux, 'open', mocker.mock_open(read_data=str(brightness)), spec=True)
+            patch_brightness_handle.fake.value = brightness
 
             assert method.get_brightness()[0] == brightness // scale
 
+        def test_handles_are_reused(self, method: Type[BrightnessMethod], patch_brightness_handle):
+            for _ in range(10):
+                method.get_brightness()
+                method.set_brightness(50)
+            assert patch_brightness_handle.call_count == len(method.get_display_info())
+            assert sum(h.read.call_count for h in patch_brightness_handle.instances) == 10 * len(method.get_display_info())
+
+        def test_handle_dropped_on_error(self, method: Type[linux.SysFiles], patch_brightness_handle):
+            method.get_brightness()
+            patch_brightness_handle.instances[0].read.side_effect = OSError()
+            with pytest.raises(OSError):
+                method.get_brightness()
+            assert method._handles == {}
+            patch_brightness_handle.instances[0].close.assert_called_once()
+
     class TestSetBrightness(BrightnessMethodTest.TestSetBrightness):
         class TestDisplayKwarg(BrightnessMethodTest.TestSetBrightness.TestDisplayKwarg):
-            def test_with(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info, subtests):
-                mock = mocker.patch.object(sbc.linux, 'open', mocker.mock_open(), spec=True)
+            def test_with(self, method: Type[BrightnessMethod], freeze_display_info, patch_brightness_handle, subtests):
                 for index, display in enumerate(freeze_display_info):
                     with subtests.test(index=index):
                         method.set_brightness(100, display=index)
-                        mock.assert_called_once_with(os.path.join(display['path'], 'brightness'), 'w')
-                        mock().write.assert_called_once_with('100')
-                        mock.reset_mock()
+                        patch_brightness_handle.assert_called_once_with(os.path.join(display['path'], 'brightness'))
+                        patch_brightness_handle.instances[-1].write.assert_called_once_with(100)
+                        patch_brightness_handle.reset_mock()
 
-            def test_without(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info, subtests):
-                mock = mocker.patch.object(sbc.linux, 'open', mocker.mock_open(), spec=True)
+            def test_without(self, method: Type[BrightnessMethod], freeze_display_info, patch_brightness_handle, subtests):
                 method.set_brightness(100)
-                write = mock().write
 
                 for index, display in enumerate(freeze_display_info):
                     with subtests.test(index=index):
-                        mock.assert_any_call(os.path.join(display['path'], 'brightness'), 'w')
-                        assert write.call_args_list[index][0][0] == '100'
+                        patch_brightness_handle.assert_any_call(os.path.join(display['path'], 'brightness'))
+                        patch_brightness_handle.instances[index].write.assert_called_once_with(100)
+
+    class TestRawBrightness:
+        @pytest.fixture(autouse=True)
+        def fine_grained(self, mocker: MockerFixture, patch_get_display_info, patch_brightness_handle):
+            mocker.patch.object(sbc.linux, 'open', mocker.mock_open(read_data='96000'), spec=True)
+
+        def test_max_brightness(self, method: Type[BrightnessMethod]):
+            assert method.get_max_brightness() == [96000] * len(method.get_display_info())
+            assert method.get_max_brightness(display=0) == [96000]
+
+        def test_get(self, method: Type[BrightnessMethod], patch_brightness_handle):
+            patch_brightness_handle.fake.value = 12345
+            assert method.get_brightness_raw(display=0) == [12345]
+            assert method.get_brightness(display=0) == [12]
+
+        def test_set(self, method: Type[BrightnessMethod], patch_brightness_handle):
+            method.set_brightness_raw(12345, display=0)
+            patch_brightness_handle.instances[-1].write.assert_called_once_with(12345)
+
+    class TestBrightnessHandle:
+        @pytest.fixture
+        def brightness_file(self, tmp_path):
+            brightness_file = tmp_path / 'brightness'
+            brightness_file.write_text('10\n')
+            return brightness_file
+
+        def test_read_and_write(self, brightness_file):
+            handle = linux._BrightnessHandle(str(brightness_file))
+            assert handle.read() == 10
+            handle.write(50)
+            assert brightness_file.read_text() == '50\n'
+            assert handle.read() == 50
+            handle.close()
+
+        def test_falls_back_to_read_only(self, mocker: MockerFixture, brightness_file):
+            real_open = os.open
+
+            def fake_open(path, flags, *args):
+                if flags & os.O_RDWR:
+                    raise PermissionError()
+                return real_open(path, flags, *args)
+
+            mocker.patch.object(os, 'open', Mock(side_effect=fake_open))
+            handle = linux._BrightnessHandle(str(brightness_file))
+            assert handle.read() == 10
+            with pytest.raises(PermissionError):
+                handle.write(50)
+            handle.close()
+
+    def test_handles_are_reused(self, tmp_path, method: Type[linux.SysFiles], mocker: MockerFixture):
+        '''A fade-like workload against a real file should only open it once'''
+        brightness_file = tmp_path / 'brightness'
+        brightness_file.write_text('10')
+        display = {'path': str(tmp_path), 'scale': 1.0}
+        mocker.patch.object(method, 'get_display_info', Mock(return_value=[display]))
+        opened = mocker.spy(os, 'open')
+
+        for value in range(20, 60):
+            method.set_brightness(value, display=0)
+            assert method.get_brightness(display=0) == [value]
+        method._clear_handles()
+        assert brightness_file.read_text() == '59'
+        assert opened.call_count == 1
+
+    @pytest.mark.benchmark
+    def test_per_step_cost(self, tmp_path, method: Type[linux.SysFiles], mocker: MockerFixture):
+        '''
+        Benchmark a fade-like workload against a real file. Once the display info and
+        handles are warm, each step should cost microseconds, not milliseconds
+        '''
+        brightness_file = tmp_path / 'brightness'
+        brightness_file.write_text('10')
+        display = {'path': str(tmp_path), 'scale': 1.0}
+        mocker.patch.object(method, 'get_display_info', Mock(return_value=[display]))
+
+        steps = 1000
+        duration = timeit(lambda: method.set_brightness(50, display=0), number=steps)
+        duration += timeit(lambda: method.get_brightness(display=0), number=steps)
+        method._clear_handles()
+        assert brightness_file.read_text() == '50'
+        assert duration / (steps * 2) < 0.001, f'{(duration / (steps * 2)) * 1e6:.1f}us per step'
 
 
 class TestI2C(BrightnessMethodTest):
     @pytest.fixture(scope='function', autouse=True)
     def cleanup(self, method: linux.I2C):
         method._max_brightness_cache = {}
+        method._connections = {}
+        method._workers = {}
+        method._bus_topology = None
+        sbc.linux.__cache__.clear()
 
     @pytest.fixture
     def patch_get_display_info(self, mocker: MockerFixture):
         def path_exists(path: str):
             return re.match(r'/dev/i2c-\d+', path) is not None
 
-        mocker.patch.object(glob, 'glob', Mock(return_value=['/dev/i2c-0', '/dev/i2c-1']), spec=True)
+        def fake_glob(pattern: str):
+            return ['/dev/i2c-0', '/dev/i2c-1'] if pattern == '/dev/i2c-*' else []
+
+        mocker.patch.object(glob, 'glob', Mock(side_effect=fake_glob), spec=True)
         mocker.patch.object(os.path, 'exists', Mock(side_effect=path_exists), spec=True)
         mocker.patch.object(linux.I2C, 'I2CDevice', MockI2C.MockI2CDevice, spec=True)
 
@@ -140,6 +338,41 @@ class TestI2C(BrightnessMethodTest):
         def test_display_filtering(self, mocker: MockerFixture, original_os_module, method):
             return super().test_display_filtering(mocker, original_os_module, method, {'include': ['i2c_bus']})
 
+        def test_assigns_timing_profiles(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            spy = mocker.spy(method._scheduler.profiles, 'assign')
+            for display in method.get_display_info():
+                spy.assert_any_call(display['i2c_bus'], display['edid'])
+
+        def test_disk_cache(self, mocker: MockerFixture, disk_cache, patch_get_brightness, method: Type[linux.I2C]):
+            displays = method.get_display_info()
+            method.get_brightness()
+            linux.topology_cache.save()
+
+            # simulate a new process
+            sbc.linux.__cache__.clear()
+            method._max_brightness_cache = {}
+            linux.topology_cache.clear()
+            spy = mocker.spy(method, '_discover')
+            assert method.get_display_info() == displays
+            spy.assert_not_called()
+            assert len(method._max_brightness_cache) == len(displays)
+
+            sbc.linux.__cache__.clear()
+            disk_cache['value'] = 'def'
+            assert method.get_display_info() == displays
+            spy.assert_called_once()
+
+        def test_prefers_drm_edids(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            edid = bytes.fromhex(fake_edid('BNQ', 'BenQ GHI789', 'serial789'))
+            mocker.patch.object(linux, 'drm_edids', Mock(return_value={'/dev/i2c-1': edid, '/dev/i2c-9': edid}))
+            spy = mocker.spy(method, '_probe_edid')
+            displays = method.get_display_info()
+            # only the bus the kernel has no EDID for should be probed
+            assert [c.args[0] for c in spy.call_args_list] == ['/dev/i2c-0']
+            # buses without a /dev node are not usable
+            assert [d['i2c_bus'] for d in displays] == ['/dev/i2c-0', '/dev/i2c-1']
+            assert displays[1]['edid'] == edid.hex()
+
     class TestGetBrightness(BrightnessMethodTest.TestGetBrightness):
         class TestDisplayKwarg(BrightnessMethodTest.TestGetBrightness.TestDisplayKwarg):
             def test_with(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info, subtests):
@@ -164,8 +397,8 @@ class TestI2C(BrightnessMethodTest):
                 for index, display in enumerate(freeze_display_info):
                     with subtests.test(index=index):
                         method.set_brightness(100, display=index)
-                        # one call for populating max brightness cache, another for setting brightness
-                        spy.assert_has_calls([call(display['i2c_bus'])] * 2)
+                        # the connection opened to populate the max brightness cache is re-used for setting
+                        spy.assert_called_once_with(display['i2c_bus'])
                         spy.reset_mock()
 
             def test_without(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info):
@@ -173,8 +406,1167 @@ class TestI2C(BrightnessMethodTest):
                 method.set_brightness(100)
                 paths = [device['i2c_bus'] for device in freeze_display_info]
                 called_devices = [i[0][0] for i in spy.call_args_list]
-                # one call for populating max brightness cache, another for setting brightness, for each display
-                assert sorted(called_devices) == sorted(paths * 2)
+                assert sorted(called_devices) == sorted(paths)
+
+    def test_batched_per_bus(
+        self, mocker: MockerFixture, monkeypatch: MonkeyPatch, original_os_module,
+        patch_get_brightness, method: Type[linux.I2C]
+    ):
+        monkeypatch.setattr(sbc, '_OS_MODULE', original_os_module)
+        monkeypatch.setattr(sbc.config, 'PARALLEL', True)
+        serial = sbc.get_brightness(method='i2c')
+        spy = mocker.spy(method, 'get_brightness_batch')
+        assert sbc.get_brightness(method='i2c') == serial
+        assert sorted(c.args[0] for c in spy.call_args_list) == [[0], [1]]
+
+    class TestDDCCapableBuses:
+        CONNECTORS = {
+            # connector: (bus, status, enabled)
+            'card0-eDP-1': ('3', 'connected', 'enabled'),
+            'card0-HDMI-A-1': ('4', 'disconnected', 'disabled'),
+            'card0-DP-1': ('5', 'connected', 'enabled'),
+            'card0-DP-2': ('6', 'connected', 'disabled'),
+            'card0-DP-3': (None, 'connected', 'enabled'),
+        }
+        ADAPTERS = {
+            '0': 'SMBus I801 adapter at efa0',
+            '1': 'Synopsys DesignWare I2C adapter',
+            '2': 'ELAN touchpad',
+            '3': 'i915 gmbus dpb',
+            '4': 'i915 gmbus dpc',
+            '5': 'AUX B/DDI B/PHY B',
+            '6': 'AUX C/DDI C/PHY C',
+            '7': 'NVIDIA i2c adapter 1 at 1:00.0',
+        }
+
+        @pytest.fixture(autouse=True)
+        def patch(self, mocker: MockerFixture, patch_get_display_info):
+            connectors = {f'/sys/class/drm/{k}': v for k, v in self.CONNECTORS.items()}
+
+            def fake_glob(pattern: str):
+                if pattern == '/dev/i2c-*':
+                    return [f'/dev/i2c-{i}' for i in self.ADAPTERS]
+                if pattern == '/sys/class/drm/card*-*':
+                    return list(connectors)
+                if pattern == '/sys/bus/i2c/devices/i2c-*/name':
+                    return [f'/sys/bus/i2c/devices/i2c-{i}/name' for i in self.ADAPTERS]
+                connector, _ = pattern.rsplit('/', 1)
+                bus = connectors[connector][0]
+                return [] if bus is None else [f'{connector}/i2c-{bus}']
+
+            def fake_read_sysfs(path: str):
+                directory, attribute = path.rsplit('/', 1)
+                if directory in connectors:
+                    return connectors[directory][1 if attribute == 'status' else 2]
+                return self.ADAPTERS[directory.rsplit('-', 1)[1]]
+
+            mocker.patch.object(glob, 'glob', Mock(side_effect=fake_glob), spec=True)
+            mocker.patch.object(os.path, 'isdir', Mock(return_value=False), spec=True)
+            mocker.patch.object(linux, '_read_sysfs', Mock(side_effect=fake_read_sysfs))
+
+        def test_allow_list(self, method: Type[linux.I2C]):
+            # 3 and 5 are connected, 7 is a graphics adapter with no DRM connector
+            assert method.ddc_capable_buses() == {'/dev/i2c-3', '/dev/i2c-5', '/dev/i2c-7'}
+
+        def test_only_allowed_buses_are_probed(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            spy = mocker.patch.object(method, '_probe_edid', Mock(return_value=None))
+            method.get_display_info()
+            assert [c.args[0] for c in spy.call_args_list] == ['/dev/i2c-3', '/dev/i2c-5', '/dev/i2c-7']
+
+        def test_probe_all_buses(self, mocker: MockerFixture, monkeypatch: MonkeyPatch, method: Type[linux.I2C]):
+            monkeypatch.setattr(method, 'PROBE_ALL_BUSES', True)
+            spy = mocker.patch.object(method, '_probe_edid', Mock(return_value=None))
+            method.get_display_info()
+            assert len(spy.call_args_list) == len(self.ADAPTERS)
+
+        def test_falls_back_to_full_scan(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            mocker.patch.object(method, 'ddc_capable_buses', Mock(return_value=set()))
+            spy = mocker.patch.object(method, '_probe_edid', Mock(return_value=None))
+            method.get_display_info()
+            assert len(spy.call_args_list) == len(self.ADAPTERS)
+
+    class TestParallelProbing:
+        BUS_COUNT = 32
+
+        @pytest.fixture(autouse=True)
+        def patch(self, mocker: MockerFixture, patch_get_display_info):
+            '''Simulate 32 buses with a display on every 4th one, each taking ~5ms to read'''
+            buses = [f'/dev/i2c-{i}' for i in range(self.BUS_COUNT)]
+            random.shuffle(buses)
+            mocker.patch.object(glob, 'glob', Mock(side_effect=lambda p: buses if p == '/dev/i2c-*' else []), spec=True)
+            self.delays = {i: 0.005 for i in range(self.BUS_COUNT)}
+            self.closed: List[int] = []
+            self.reading = self.max_reading = 0
+            reading_lock = threading.Lock()
+
+            test = self
+
+            class SlowI2CDevice(MockI2C.MockI2CDevice):
+                def read(self, length: int) -> bytes:
+                    with reading_lock:
+                        test.reading += 1
+                        test.max_reading = max(test.max_reading, test.reading)
+                    delay = test.delays[self._index]
+                    try:
+                        if isinstance(delay, threading.Event):
+                            delay.wait()
+                        else:
+                            time.sleep(delay)
+                    finally:
+                        with reading_lock:
+                            test.reading -= 1
+                    if self._index % 4:
+                        return b'\x00' * length
+                    edid = fake_edid('DEL', f'Dell {self._index}', f'serial{self._index}')
+                    return bytes.fromhex(('00' * 128) + edid + ('00' * 128))
+
+                def close(self):
+                    test.closed.append(self._index)
+
+            mocker.patch.object(linux.I2C, 'I2CDevice', SlowI2CDevice)
+
+        def test_order_is_deterministic(self, method: Type[linux.I2C]):
+            self.delays = {i: random.random() / 100 for i in range(self.BUS_COUNT)}
+            displays = method.get_display_info()
+            assert [d['i2c_bus'] for d in displays] == [f'/dev/i2c-{i}' for i in range(0, self.BUS_COUNT, 4)]
+            assert [d['index'] for d in displays] == list(range(len(displays)))
+
+        def test_slow_bus_is_skipped(self, monkeypatch: MonkeyPatch, method: Type[linux.I2C]):
+            monkeypatch.setattr(method, 'PROBE_TIMEOUT', 0.1)
+            stalled = threading.Event()
+            self.delays[4] = stalled
+            try:
+                start = time.perf_counter()
+                displays = method.get_display_info()
+                assert time.perf_counter() - start < 1
+                # the stalled probe shouldn't stop the interpreter from exiting
+                probes = [t for t in threading.enumerate() if t.name.startswith('sbc-i2c-probe')]
+                assert probes and all(t.daemon for t in probes)
+                assert ('/dev/i2c-4', method.HOST_ADDR_R) not in method._connections
+                assert ('/dev/i2c-0', method.HOST_ADDR_R) in method._connections
+                # the stalled probe is still reading, so its connection must not have been closed
+                assert 4 not in self.closed
+            finally:
+                stalled.set()
+            assert '/dev/i2c-4' not in [d['i2c_bus'] for d in displays]
+
+            # once the read returns, the probe closes its own connection rather than pooling it
+            deadline = time.monotonic() + 5
+            while 4 not in self.closed and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert self.closed.count(4) == 1
+            assert ('/dev/i2c-4', method.HOST_ADDR_R) not in method._connections
+            # connections that were pooled are left alone
+            assert not {i for i in range(0, self.BUS_COUNT, 4) if i != 4} & set(self.closed)
+            assert len(displays) == (self.BUS_COUNT // 4) - 1
+
+        def test_probes_overlap(self, monkeypatch: MonkeyPatch, method: Type[linux.I2C]):
+            monkeypatch.setattr(method, 'PROBE_WORKERS', 1)
+            method.get_display_info()
+            assert self.max_reading == 1
+
+            sbc.linux.__cache__.clear()
+            monkeypatch.setattr(method, 'PROBE_WORKERS', 8)
+            method.get_display_info()
+            assert 1 < self.max_reading <= 8
+
+        @pytest.mark.benchmark
+        def test_benchmark(self, monkeypatch: MonkeyPatch, method: Type[linux.I2C]):
+            def discover():
+                sbc.linux.__cache__.clear()
+                start = time.perf_counter()
+                displays = method.get_display_info()
+                return time.perf_counter() - start, displays
+
+            monkeypatch.setattr(method, 'PROBE_WORKERS', 1)
+            sequential, sequential_displays = discover()
+            monkeypatch.setattr(method, 'PROBE_WORKERS', 8)
+            parallel, parallel_displays = discover()
+
+            assert sequential_displays == parallel_displays
+            assert parallel * 2 < sequential, (
+                f'{self.BUS_COUNT} buses: {sequential * 1000:.0f}ms sequential vs {parallel * 1000:.0f}ms parallel'
+            )
+
+    class TestConnectionPool:
+        @pytest.fixture(autouse=True)
+        def patch(self, patch_get_brightness):
+            return
+
+        def test_connections_are_reused(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            spy = mocker.spy(method, 'DDCInterface')
+            for _ in range(5):
+                method.get_brightness()
+                method.set_brightness(50)
+            assert spy.call_count == len(method.get_display_info())
+
+        def test_keyed_by_slave_address(self, method: Type[linux.I2C]):
+            ddc = method.connect('/dev/i2c-0', method.DDCCI_ADDR)
+            edid = method.connect('/dev/i2c-0', method.HOST_ADDR_R)
+            assert ddc is not edid
+            assert isinstance(ddc, MockI2C.MockDDCInterface)
+            assert method.connect('/dev/i2c-0', method.DDCCI_ADDR) is ddc
+
+        def test_disconnect(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            a = method.connect('/dev/i2c-0', method.DDCCI_ADDR)
+            b = method.connect('/dev/i2c-1', method.DDCCI_ADDR)
+            close_a = mocker.spy(a, 'close')
+            close_b = mocker.spy(b, 'close')
+            method.disconnect('/dev/i2c-0')
+            close_a.assert_called_once()
+            close_b.assert_not_called()
+            assert list(method._connections) == [('/dev/i2c-1', method.DDCCI_ADDR)]
+            method.disconnect()
+            close_b.assert_called_once()
+            assert method._connections == {}
+
+        def test_closed_on_topology_change(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            method.get_display_info()
+            method.get_brightness()
+            assert method._connections
+            spy = mocker.spy(method, 'disconnect')
+
+            sbc.linux.__cache__.clear()
+            method.get_display_info()
+            spy.assert_not_called()
+
+            sbc.linux.__cache__.clear()
+            mocker.patch.object(glob, 'glob', Mock(side_effect=lambda p: ['/dev/i2c-0'] if p == '/dev/i2c-*' else []))
+            method.get_display_info()
+            spy.assert_any_call()
+            assert all(key[0] == '/dev/i2c-0' for key in method._connections)
+
+        def test_buses_without_edid_are_closed(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            mocker.patch.object(MockI2C.MockI2CDevice, 'read', Mock(return_value=b'\x00' * 512))
+            assert method.get_display_info() == []
+            assert method._connections == {}
+
+        def test_disconnected_on_io_error(self, mocker: MockerFixture, method: Type[linux.I2C]):
+            method.get_brightness()
+            mocker.patch.object(MockI2C.MockDDCInterface, 'getvcp', Mock(side_effect=OSError()))
+            with pytest.raises(OSError):
+                method.get_brightness(display=0)
+            assert (method.get_display_info()[0]['i2c_bus'], method.DDCCI_ADDR) not in method._connections
+
+    class TestBusWorker:
+        @pytest.fixture
+        def worker(self, method: Type[linux.I2C]):
+            return method.BusWorker('/dev/i2c-9')
+
+        @pytest.fixture
+        def blocked(self, worker: linux.I2C.BusWorker):
+            '''Occupies the worker until the returned event is set, so that requests pile up'''
+            started, release = threading.Event(), threading.Event()
+            worker.submit(lambda: (started.set(), release.wait(5)))
+            started.wait(5)
+            yield release
+            release.set()
+
+        def test_priority_order(self, worker: linux.I2C.BusWorker, blocked: threading.Event):
+            order: List[str] = []
+            requests = []
+            for name, level in (
+                ('background', sbc.helpers.PRIORITY_BACKGROUND),
+                ('fade', sbc.helpers.PRIORITY_FADE),
+                ('interactive', sbc.helpers.PRIORITY_INTERACTIVE),
+            ):
+                with sbc.helpers.priority(level):
+                    requests.append(worker.submit(lambda name=name: order.append(name)))
+            blocked.set()
+            for request in requests:
+                assert request.done.wait(5)
+            assert order == ['interactive', 'fade', 'background']
+
+        def test_stale_sets_are_merged(self, worker: linux.I2C.BusWorker, blocked: threading.Event):
+            sent: List[int] = []
+            with sbc.helpers.priority(sbc.helpers.PRIORITY_FADE):
+                requests = [worker.submit(lambda i=i: sent.append(i) or i, key='set') for i in range(5)]
+                other = worker.submit(lambda: sent.append(-1) or -1, key='other')
+            blocked.set()
+            for request in requests:
+                assert request.done.wait(5)
+                assert request.result == 4
+            assert other.done.wait(5)
+            assert sent == [4, -1]
+
+        def test_merged_request_keeps_priority(self, worker: linux.I2C.BusWorker, blocked: threading.Event):
+            order: List[str] = []
+            with sbc.helpers.priority(sbc.helpers.PRIORITY_BACKGROUND):
+                poll = worker.submit(lambda: order.append('poll'))
+            user_set = worker.submit(lambda: order.append('set 1'), key='set')
+            with sbc.helpers.priority(sbc.helpers.PRIORITY_FADE):
+                worker.submit(lambda: order.append('set 2'), key='set')
+            blocked.set()
+            assert poll.done.wait(5) and user_set.done.wait(5)
+            assert order == ['set 2', 'poll']
+
+        def test_errors(self, worker: linux.I2C.BusWorker):
+            with pytest.raises(OSError):
+                worker.call(Mock(side_effect=OSError))
+            assert worker.call(lambda: 123) == 123
+
+        def test_exits_when_idle(self, worker: linux.I2C.BusWorker, monkeypatch: MonkeyPatch, method):
+            monkeypatch.setattr(method, 'WORKER_IDLE_TIMEOUT', 0.01)
+            worker.call(lambda: None)
+            thread = worker._thread
+            assert thread is not None
+            thread.join(5)
+            assert worker._thread is None
+            assert worker.call(lambda: threading.current_thread()) is not thread
+
+        def test_one_worker_per_bus(self, method: Type[linux.I2C]):
+            assert method.worker('/dev/i2c-0') is method.worker('/dev/i2c-0')
+            assert method.worker('/dev/i2c-0') is not method.worker('/dev/i2c-1')
+
+        def test_ddc_traffic_is_serialised(self, mocker: MockerFixture, patch_get_brightness, method):
+            lock = threading.Lock()
+            original = MockI2C.MockDDCInterface.setvcp
+
+            def setvcp(self, *args):
+                assert lock.acquire(blocking=False), 'concurrent DDC/CI transactions on one bus'
+                time.sleep(0.001)
+                lock.release()
+                return original(self, *args)
+
+            mocker.patch.object(MockI2C.MockDDCInterface, 'setvcp', setvcp)
+            method.get_brightness()
+            errors = []
+
+            def set_brightness(value):
+                try:
+                    method.set_brightness(value, display=0)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=set_brightness, args=(i,)) for i in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert errors == []
+
+        def test_tail_latency_under_contention(self, worker: linux.I2C.BusWorker, blocked: threading.Event):
+            '''
+            An interactive read should not have to wait for a backlog of fade frames,
+            as it would if requests were sent first come first served
+            '''
+            FRAMES = 50
+            order: List[str] = []
+            with sbc.helpers.priority(sbc.helpers.PRIORITY_FADE):
+                frames = [worker.submit(lambda: order.append('frame'), key=f'set {i}') for i in range(FRAMES)]
+            read = worker.submit(lambda: order.append('read'))
+            blocked.set()
+            assert read.done.wait(5) and all(frame.done.wait(5) for frame in frames)
+            # check the order the requests were sent in, rather than timing the read
+            assert order.index('read') == 0 and len(order) == FRAMES + 1
+
+class TestBusScheduler:
+    @pytest.fixture
+    def scheduler(self, clock: FakeClock):
+        return linux.I2C.BusScheduler(clock=clock.clock, sleep=clock.sleep)
+
+    @pytest.fixture
+    def ddc(self, mocker: MockerFixture, scheduler, clock: FakeClock):
+        '''A real `DDCInterface` with the bus I/O and clock simulated'''
+        mocker.patch.object(linux.I2C, '_scheduler', scheduler)
+        mocker.patch.object(linux.I2C.I2CDevice, '__init__', Mock(return_value=None))
+        mocker.patch.object(linux.I2C.I2CDevice, 'write', Mock(side_effect=lambda data: len(data)))
+        mocker.patch.object(linux.I2C.I2CDevice, 'read', Mock(return_value=ddc_reply(50, 100)))
+        return linux.I2C.DDCInterface('/dev/i2c-1')
+
+    def test_idle_bus_does_not_wait(self, scheduler, clock: FakeClock):
+        assert scheduler.wait('/dev/i2c-1', 'write') == 0
+        scheduler.record('/dev/i2c-1', 'write')
+        clock.sleep(10)
+        assert scheduler.wait('/dev/i2c-1', 'write') == 0
+        assert scheduler.wait('/dev/i2c-1', 'read') == 0
+
+    def test_minimum_gaps(self, scheduler, clock: FakeClock):
+        scheduler.record('/dev/i2c-1', 'write')
+        assert scheduler.delay('/dev/i2c-1', 'read') == pytest.approx(linux.I2C.READ_WAIT_TIME)
+        assert scheduler.delay('/dev/i2c-1', 'write') == pytest.approx(linux.I2C.WAIT_TIME)
+        clock.sleep(0.01)
+        assert scheduler.delay('/dev/i2c-1', 'write') == pytest.approx(linux.I2C.WAIT_TIME - 0.01)
+        scheduler.record('/dev/i2c-1', 'read')
+        assert scheduler.delay('/dev/i2c-1', 'write') == pytest.approx(linux.I2C.WAIT_TIME)
+
+    def test_buses_are_independent(self, scheduler):
+        scheduler.record('/dev/i2c-1', 'write')
+        assert scheduler.delay('/dev/i2c-2', 'write') == 0
+
+    def test_getvcp(self, ddc, clock: FakeClock):
+        assert ddc.getvcp(0x10) == (50, 100)
+        assert clock.slept == pytest.approx(linux.I2C.READ_WAIT_TIME)
+
+    def test_latency_benchmark(self, ddc, clock: FakeClock):
+        '''
+        Compare the simulated bus latency against the old behaviour of sleeping
+        `WAIT_TIME` before every read and write
+        '''
+        def run(workload) -> Tuple[float, float]:
+            clock.now += 10  # let the bus go idle
+            clock.slept = 0
+            operations = workload()
+            return clock.slept, operations * linux.I2C.WAIT_TIME
+
+        def get():
+            ddc.getvcp(0x10)
+            return 2
+
+        def set():
+            ddc.setvcp(0x10, 50)
+            return 1
+
+        def fade():
+            # 50 frames at 10ms intervals
+            for value in range(50):
+                ddc.setvcp(0x10, value)
+                clock.now += 0.01
+            return 50
+
+        for workload in (get, set, fade):
+            new, old = run(workload)
+            assert new < old, f'{workload.__name__}: {new * 1000:.0f}ms vs {old * 1000:.0f}ms'
+
+        assert run(get)[0] == pytest.approx(linux.I2C.READ_WAIT_TIME)
+        assert run(set)[0] == 0
+
+
+def test_adaptive_timing_is_opt_in():
+    assert sbc.config.ADAPTIVE_DDC_TIMING is False
+    assert linux.I2C.TimingProfiles().factor('/dev/i2c-1') == 1
+
+
+class TestTimingProfiles:
+    BUS = '/dev/i2c-1'
+    EDID = '00ffffffffffff00abc'
+
+    @pytest.fixture(autouse=True)
+    def enable(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(sbc.config, 'ADAPTIVE_DDC_TIMING', True)
+
+    @pytest.fixture
+    def profiles(self):
+        profiles = linux.I2C.TimingProfiles()
+        profiles.assign(self.BUS, self.EDID)
+        return profiles
+
+    @pytest.fixture
+    def ddc(self, mocker: MockerFixture, clock: FakeClock):
+        '''A real `DDCInterface` with the bus I/O and clock simulated. Returns the scheduler, interface and read mock'''
+        scheduler = linux.I2C.BusScheduler(clock=clock.clock, sleep=clock.sleep)
+        scheduler.profiles.assign(self.BUS, self.EDID)
+        mocker.patch.object(linux.I2C, '_scheduler', scheduler)
+        mocker.patch.object(linux.I2C.I2CDevice, '__init__', Mock(return_value=None))
+        mocker.patch.object(linux.I2C.I2CDevice, 'write', Mock(side_effect=lambda data: len(data)))
+        read = mocker.patch.object(linux.I2C.I2CDevice, 'read', Mock(return_value=ddc_reply(50, 100)))
+        return scheduler, linux.I2C.DDCInterface(self.BUS), read
+
+    def test_lowers_delay_after_valid_reads(self, profiles):
+        cls = linux.I2C.TimingProfiles
+        for _ in range(cls.SUCCESS_STREAK - 1):
+            profiles.success(self.BUS)
+        assert profiles.factor(self.BUS) == 1
+        profiles.success(self.BUS)
+        assert profiles.factor(self.BUS) == pytest.approx(cls.DECREASE)
+
+        for _ in range(1000):
+            profiles.success(self.BUS)
+        assert profiles.factor(self.BUS) == cls.MIN_FACTOR
+
+    def test_backs_off_after_failed_reads(self, profiles):
+        cls = linux.I2C.TimingProfiles
+        for _ in range(10 * cls.SUCCESS_STREAK):
+            profiles.success(self.BUS)
+        learned = profiles.factor(self.BUS)
+        profiles.failure(self.BUS)
+        assert profiles.factor(self.BUS) == pytest.approx(learned * cls.INCREASE)
+
+        for _ in range(10):
+            profiles.failure(self.BUS)
+        assert profiles.factor(self.BUS) == cls.MAX_FACTOR
+
+    def test_keyed_by_edid(self, profiles):
+        profiles.failure(self.BUS)
+        # display moved to another bus
+        profiles.assign('/dev/i2c-5', self.EDID)
+        assert profiles.factor('/dev/i2c-5') == profiles.factor(self.BUS) > 1
+        # unknown buses use the default timings and learn nothing
+        profiles.failure('/dev/i2c-9')
+        assert profiles.factor('/dev/i2c-9') == 1
+
+    def test_disabled(self, profiles, monkeypatch: MonkeyPatch, timing_profiles_path):
+        monkeypatch.setattr(sbc.config, 'ADAPTIVE_DDC_TIMING', False)
+        profiles.failure(self.BUS)
+        assert profiles.factor(self.BUS) == 1
+        profiles.save()
+        assert not os.path.exists(timing_profiles_path)
+
+    def test_writes_keep_to_spec(self, profiles):
+        scheduler = linux.I2C.BusScheduler(clock=lambda: 0)
+        scheduler.profiles = profiles
+        for _ in range(1000):
+            profiles.success(self.BUS)
+        scheduler.record(self.BUS, 'write')
+        assert scheduler.delay(self.BUS, 'read') == pytest.approx(linux.I2C.READ_WAIT_TIME * profiles.MIN_FACTOR)
+        assert scheduler.delay(self.BUS, 'write') == pytest.approx(linux.I2C.WAIT_TIME)
+
+    def test_persisted_between_processes(self, profiles, timing_profiles_path):
+        profiles.failure(self.BUS)
+        profiles.save()
+
+        new_profiles = linux.I2C.TimingProfiles()
+        new_profiles.assign(self.BUS, self.EDID)
+        assert new_profiles.factor(self.BUS) == profiles.factor(self.BUS)
+
+    def test_only_saves_when_changed(self, profiles, timing_profiles_path):
+        profiles.save()
+        assert not os.path.exists(timing_profiles_path)
+
+    def test_corrupt_file_ignored(self, profiles, timing_profiles_path):
+        with open(timing_profiles_path, 'w') as f:
+            f.write('{not json')
+        assert profiles.factor(self.BUS) == 1
+
+    def test_learns_from_ddc_reads(self, ddc):
+        scheduler, interface, read = ddc
+        for _ in range(10):
+            interface.getvcp(0x10)
+        assert scheduler.profiles.factor(self.BUS) < 1
+        interface.setvcp(0x10, 50)
+        assert scheduler.delay(self.BUS, 'read') < linux.I2C.READ_WAIT_TIME
+
+        # corrupt the checksum
+        read.return_value = ddc_reply(50, 100)[:-1] + b'\x00'
+        with pytest.raises(sbc.exceptions.I2CValidationError):
+            interface.getvcp(0x10)
+        assert scheduler.profiles.factor(self.BUS) > linux.I2C.TimingProfiles.MIN_FACTOR
+
+    def test_failures_are_retried_at_spec_timings(self, ddc):
+        scheduler, interface, read = ddc
+        for _ in range(10):
+            interface.getvcp(0x10)
+        learned = scheduler.profiles.factor(self.BUS)
+        assert learned < 1
+
+        read.reset_mock()
+        read.side_effect = [ddc_reply(50, 100)[:-1] + b'\x00', ddc_reply(50, 100)]
+        assert interface.getvcp(0x10) == (50, 100)
+        assert read.call_count == 2
+        # the profile is still penalised
+        assert scheduler.profiles.factor(self.BUS) == pytest.approx(learned * linux.I2C.TimingProfiles.INCREASE)
+
+    def test_spec_timing_failures_are_not_retried(self, ddc):
+        scheduler, interface, read = ddc
+        read.return_value = ddc_reply(50, 100)[:-1] + b'\x00'
+        with pytest.raises(sbc.exceptions.I2CValidationError):
+            interface.getvcp(0x10)
+        assert read.call_count == 1
+
+
+class TestTopologyCache:
+    @pytest.fixture
+    def method(self):
+        class Method:
+            _max_brightness_cache: dict = {}
+        return Method
+
+    def test_disabled_by_default(self, topology_cache_path, method):
+        cache = linux.TopologyCache()
+        assert cache.get(method) is None
+        cache.store(method, [{'name': 'abc'}])
+        cache.save()
+        assert not os.path.exists(topology_cache_path)
+
+    def test_persists_between_processes(self, topology_cache_path, disk_cache, method):
+        cache = linux.TopologyCache()
+        assert cache.get(method) is None
+        cache.store(method, [{'name': 'abc', 'method': method, 'edid': '00ff'}])
+        cache.store_max_brightness(method, 'abc', 250)
+        cache.save()
+
+        method._max_brightness_cache = {}
+        cache = linux.TopologyCache()
+        assert cache.get(method) == [{'name': 'abc', 'method': method, 'edid': '00ff'}]
+        assert method._max_brightness_cache == {'abc': 250}
+
+    def test_invalidated_by_fingerprint(self, topology_cache_path, disk_cache, method):
+        cache = linux.TopologyCache()
+        cache.get(method)
+        cache.store(method, [{'name': 'abc'}])
+        cache.save()
+
+        disk_cache['value'] = 'def'
+        cache = linux.TopologyCache()
+        assert cache.get(method) is None
+        cache.save()
+        with open(topology_cache_path) as f:
+            assert json.load(f) == {'fingerprint': 'def', 'methods': {}}
+
+    def test_only_saves_when_dirty(self, topology_cache_path, disk_cache, method):
+        cache = linux.TopologyCache()
+        cache.get(method)
+        cache.save()
+        assert not os.path.exists(topology_cache_path)
+
+    def test_corrupt_file(self, topology_cache_path, disk_cache, method):
+        with open(topology_cache_path, 'w') as f:
+            f.write('{"fingerprint": "abc"')
+        assert linux.TopologyCache().get(method) is None
+
+    def test_fingerprint(self, mocker: MockerFixture):
+        state = {'status': 'connected', 'enabled': 'enabled'}
+        mocker.patch.object(glob, 'glob', Mock(side_effect=lambda p: (
+            ['/sys/class/drm/card0-DP-1'] if p == '/sys/class/drm/card*-*' else ['/dev/i2c-1', '/dev/i2c-2']
+        )))
+        mocker.patch.object(linux, '_drm_device_i2c_bus', Mock(return_value='1'))
+        mocker.patch.object(linux, '_read_sysfs', Mock(side_effect=lambda p: state[p.rsplit('/', 1)[1]]))
+        mocker.patch.object(linux, 'edid_from_drm_device', Mock(return_value=None))
+
+        fingerprint = linux.TopologyCache.fingerprint()
+        assert linux.TopologyCache.fingerprint() == fingerprint
+        # EDIDs are only read by the real probe
+        linux.edid_from_drm_device.assert_not_called()
+
+        state['status'] = 'disconnected'
+        assert linux.TopologyCache.fingerprint() != fingerprint
+        state['status'] = 'connected'
+        assert linux.TopologyCache.fingerprint() == fingerprint
+
+        glob.glob.side_effect = lambda p: (
+            ['/sys/class/drm/card0-DP-1'] if p == '/sys/class/drm/card*-*' else ['/dev/i2c-1']
+        )
+        assert linux.TopologyCache.fingerprint() != fingerprint
+
+
+class TestBusLocks:
+    SIMULATED_BUS = textwrap.dedent('''
+        import json, os, sys, time
+        from screen_brightness_control import config, linux
+
+        config.BUS_LOCKING = True
+        # keep the gap between transactions short so that 80 of them fit within the lock timeout
+        linux.I2C.WAIT_TIME = 0.005
+        bus_file, start_at = sys.argv[1], float(sys.argv[2])
+        time.sleep(max(0, start_at - time.time()))
+        for _ in range(20):
+            # a DDC/CI transaction: write a request and read the reply from the same bus
+            with linux.bus_locks.hold('/dev/i2c-7'):
+                with open(bus_file, 'a') as f:
+                    f.write(f'{os.getpid()} request\\n')
+                time.sleep(0.002)
+                with open(bus_file, 'a') as f:
+                    f.write(f'{os.getpid()} reply\\n')
+        print(json.dumps(linux.bus_locks.stats()))
+    ''')
+
+    @pytest.fixture
+    def locks(self, tmp_path, monkeypatch: MonkeyPatch) -> linux.BusLocks:
+        monkeypatch.setitem(os.environ, 'XDG_RUNTIME_DIR', str(tmp_path))
+        monkeypatch.setattr(sbc.config, 'BUS_LOCKING', True)
+        locks = linux.BusLocks()
+        monkeypatch.setattr(linux, 'bus_locks', locks)
+        return locks
+
+    def is_locked(self, bus: str) -> bool:
+        fd = os.open(linux.BusLocks.path(bus), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+        return False
+
+    def test_disabled_by_default(self, tmp_path, monkeypatch: MonkeyPatch):
+        monkeypatch.setitem(os.environ, 'XDG_RUNTIME_DIR', str(tmp_path))
+        locks = linux.BusLocks()
+        with locks.hold('/dev/i2c-1'):
+            pass
+        assert os.listdir(tmp_path) == []
+        assert locks.stats() == {}
+
+    def test_lock_file(self, locks: linux.BusLocks, tmp_path):
+        path = linux.BusLocks.path('/dev/i2c-1')
+        assert path == str(tmp_path / 'screen_brightness_control' / 'i2c-1.lock')
+        with locks.hold('/dev/i2c-1'):
+            assert self.is_locked('/dev/i2c-1')
+            assert not self.is_locked('/dev/i2c-2')
+        assert not self.is_locked('/dev/i2c-1')
+        assert locks.stats()['/dev/i2c-1']['acquisitions'] == 1
+
+    def test_bounded_wait(self, locks: linux.BusLocks, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(locks, 'TIMEOUT', 0.05)
+        os.makedirs(os.path.dirname(locks.path('/dev/i2c-1')))
+        fd = os.open(locks.path('/dev/i2c-1'), os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            start = time.monotonic()
+            with pytest.raises(BusLockTimeoutError):
+                with locks.hold('/dev/i2c-1'):
+                    pytest.fail('the transaction should not go ahead without the lock')
+            assert time.monotonic() - start >= 0.05
+        finally:
+            os.close(fd)
+
+        stats = locks.stats(reset=True)['/dev/i2c-1']
+        assert stats['timeouts'] == 1 and stats['contended'] == 1 and stats['acquisitions'] == 0
+        assert stats['max_wait'] >= 0.05
+        assert locks.stats() == {}
+
+    def test_thread_lock_timeout(self, locks: linux.BusLocks, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(locks, 'TIMEOUT', 0.01)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def holder():
+            with locks.hold('/dev/i2c-1'):
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        try:
+            assert entered.wait(5)
+            with pytest.raises(BusLockTimeoutError, match='another thread'):
+                with locks.hold('/dev/i2c-1'):
+                    pytest.fail('the transaction should not go ahead without the lock')
+        finally:
+            release.set()
+            thread.join()
+        assert locks.stats()['/dev/i2c-1']['timeouts'] == 1
+
+    def test_gap_between_processes(self, locks: linux.BusLocks, mocker: MockerFixture):
+        '''The next holder of the lock should wait out `I2C.WAIT_TIME` from the end of the last transaction'''
+        sleep = mocker.patch.object(locks, 'sleep')
+        with locks.hold('/dev/i2c-1'):
+            pass
+        sleep.assert_not_called()
+
+        # another process finished a transaction 10ms ago
+        os.utime(locks.path('/dev/i2c-1'), (time.time() - 0.01,) * 2)
+        with locks.hold('/dev/i2c-1'):
+            pass
+        sleep.assert_called_once()
+        assert sleep.call_args.args[0] == pytest.approx(linux.I2C.WAIT_TIME - 0.01, abs=0.005)
+
+        # the finish time is recorded even if the transaction failed
+        with pytest.raises(OSError):
+            with locks.hold('/dev/i2c-1'):
+                raise OSError
+        assert time.time() - os.stat(locks.path('/dev/i2c-1')).st_mtime < 1
+
+        sleep.reset_mock()
+        os.utime(locks.path('/dev/i2c-1'), (time.time() - 1,) * 2)
+        with locks.hold('/dev/i2c-1'):
+            pass
+        sleep.assert_not_called()
+
+    def test_threads_are_serialised(self, locks: linux.BusLocks):
+        active = []
+
+        def transaction():
+            with locks.hold('/dev/i2c-1'):
+                active.append(1)
+                assert len(active) == 1
+                time.sleep(0.002)
+                active.pop()
+
+        threads = [threading.Thread(target=transaction) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert locks.stats()['/dev/i2c-1']['acquisitions'] == 5
+
+    def test_processes_are_serialised(self, locks: linux.BusLocks, tmp_path):
+        bus_file = str(tmp_path / 'bus')
+        start_at = str(time.time() + 0.5)
+        env = {**os.environ, 'PYTHONPATH': os.path.dirname(os.path.dirname(sbc.__file__))}
+        processes = [
+            subprocess.Popen(
+                [sys.executable, '-c', self.SIMULATED_BUS, bus_file, start_at],
+                stdout=subprocess.PIPE, env=env
+            )
+            for _ in range(4)
+        ]
+        stats = [json.loads(p.communicate(timeout=30)[0])['/dev/i2c-7'] for p in processes]
+
+        with open(bus_file) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 4 * 20 * 2
+        # every request should be immediately followed by the reply from the same process
+        for request, reply in zip(lines[::2], lines[1::2]):
+            assert request.split()[1] == 'request' and reply == request.replace('request', 'reply')
+        assert sum(s['acquisitions'] for s in stats) == 4 * 20
+        assert sum(s['contended'] for s in stats) > 0, 'processes did not overlap'
+
+    def test_i2c_transactions_hold_lock(self, locks: linux.BusLocks, mocker: MockerFixture):
+        interface = Mock()
+        interface.getvcp.side_effect = lambda *a: (self.is_locked('/dev/i2c-3'), 100)
+        interface.setvcp.side_effect = lambda *a: self.is_locked('/dev/i2c-3')
+        mocker.patch.object(linux.I2C, 'connect', Mock(return_value=interface))
+        assert linux.I2C._getvcp('/dev/i2c-3', 0x10) == (True, 100)
+        assert linux.I2C._setvcp('/dev/i2c-3', 0x10, 50) is True
+        assert locks.stats()['/dev/i2c-3']['acquisitions'] == 2
+
+    def test_ddcutil_calls_hold_lock(self, locks: linux.BusLocks, mocker: MockerFixture):
+        display = {'name': 'a', 'serial': 'b', 'bin_serial': 'c', 'index': 0, 'bus_number': 3, 'i2c_bus': '/dev/i2c-3'}
+        mocker.patch.object(linux.DDCUtil, 'get_display_info', Mock(return_value=[display]))
+        mocker.patch.object(linux.DDCUtil, '_max_brightness_cache', {'a-b-c': 100})
+        held = []
+
+        def check_output(command, *args, **kwargs):
+            held.append(self.is_locked('/dev/i2c-3'))
+            return b'VCP 10 C 50 100'
+
+        mocker.patch.object(linux, 'check_output', Mock(side_effect=check_output))
+        linux.DDCUtil.set_brightness(50)
+        linux.DDCUtil.get_brightness()
+        assert held == [True, True]
+
+
+class TestDRMConnectorIndex:
+    KINDS = ('eDP', 'DP', 'HDMI-A', 'DVI-D')
+
+    @pytest.fixture
+    def synthetic(self, mocker: MockerFixture):
+        '''Fake a large number of connectors, spread over several GPUs'''
+        count = {'n': 400}
+
+        def paths():
+            return [
+                f'/sys/class/drm/card{i % 4}-{self.KINDS[i % len(self.KINDS)]}-{i}' for i in range(count['n'])
+            ]
+
+        def fake_glob(pattern: str):
+            return paths() if pattern == '/sys/class/drm/card*-*' else []
+
+        def realpath(path: str):
+            name = os.path.basename(path)
+            return f'/sys/devices/pci0000:00/0000:0{name[4]}:00.0/drm/{name.split("-")[0]}/{name}'
+
+        mocker.patch.object(glob, 'glob', Mock(side_effect=fake_glob))
+        mocker.patch.object(os.path, 'realpath', Mock(side_effect=realpath))
+        mocker.patch.object(linux, '_drm_device_i2c_bus', Mock(side_effect=lambda p: p.rsplit('-', 1)[1]))
+        return count
+
+    def test_lookups(self, synthetic):
+        index = linux.DRMConnectorIndex()
+        assert index.by_bus('6').name == 'card2-HDMI-A-6'
+        assert [c.name for c in index.by_interface('HDMI-6')] == ['card2-HDMI-A-6']
+        assert [c.name for c in index.by_interface('eDP8')] == ['card0-eDP-8']
+        assert index.by_interface('nonsense') == []
+        connector = index.by_real_path('/sys/devices/pci0000:00/0000:01:00.0/drm/card1/card1-DP-1')
+        assert connector.pci_path == '/sys/devices/pci0000:00/0000:01:00.0'
+        assert connector.edid_path == '/sys/class/drm/card1-DP-1/edid'
+
+    def test_only_rebuilt_when_connectors_change(self, synthetic, clock: FakeClock):
+        index = linux.DRMConnectorIndex(clock=clock.clock)
+        assert index.refresh()
+        assert os.path.realpath.call_count == 400
+        for _ in range(10):
+            clock.sleep(index.REFRESH_INTERVAL)
+            assert not index.refresh()
+            index.by_bus('3')
+        assert os.path.realpath.call_count == 400
+
+        synthetic['n'] = 401
+        clock.sleep(index.REFRESH_INTERVAL)
+        assert index.by_bus('400') is not None
+        assert os.path.realpath.call_count == 801
+
+    def test_connectors_are_only_listed_periodically(self, synthetic, clock: FakeClock):
+        index = linux.DRMConnectorIndex(clock=clock.clock)
+        for _ in range(10):
+            index.by_bus('3')
+            index.by_interface('DP-1')
+        assert glob.glob.call_count == 1
+
+        synthetic['n'] = 401
+        assert index.by_bus('400') is None, 'too soon to notice the new connector'
+        clock.sleep(index.REFRESH_INTERVAL)
+        assert index.by_bus('400') is not None
+        assert glob.glob.call_count == 2
+
+        # forced refreshes and clearing the index (eg: on hotplug) take effect straight away
+        synthetic['n'] = 402
+        assert index.refresh(force=True)
+        index.clear()
+        index.by_bus('3')
+        assert glob.glob.call_count == 4
+
+    def test_status_is_always_fresh(self, mocker: MockerFixture, synthetic):
+        state = {'status': 'connected', 'enabled': 'enabled'}
+        mocker.patch.object(linux, '_read_sysfs', Mock(side_effect=lambda p: state[p.rsplit('/', 1)[1]]))
+        connector = linux.DRMConnectorIndex().by_bus('1')
+        assert connector.status == 'connected'
+        assert connector.enabled
+        state.update(status='disconnected', enabled='disabled')
+        assert connector.status == 'disconnected'
+        assert not connector.enabled
+
+    def test_get_uid(self, mocker: MockerFixture, synthetic):
+        mocker.patch.object(linux, '_read_sysfs', Mock(return_value=None))
+        assert linux.XRandr._get_uid('HDMI-2') == '2'
+        assert linux.XRandr._get_uid('eDP1') is None
+        assert linux.XRandr._get_uid('eDP-4') == '4'
+        # every output is looked up in the same index, without listing the connectors again
+        assert glob.glob.call_count == 1
+
+    def test_lookups_are_cached(self, synthetic):
+        index = linux.DRMConnectorIndex()
+        index.refresh()
+        for _ in range(1000):
+            assert index.by_interface('DP-397') is not None
+        # nothing is listed, resolved or searched again
+        assert glob.glob.call_count == 1
+        assert os.path.realpath.call_count == 400
+
+    @pytest.mark.benchmark
+    def test_lookup_cost(self, synthetic):
+        index = linux.DRMConnectorIndex()
+        index.refresh()
+        per_lookup = timeit(lambda: index.by_interface('DP-397'), number=1000) / 1000
+        assert per_lookup < 0.001, f'{per_lookup * 1000:.3f}ms per lookup'
+
+
+class TestDRMEdids:
+    @pytest.fixture
+    def connectors(self, tmp_path, mocker: MockerFixture):
+        edid = bytes.fromhex(fake_edid('DEL', 'Dell ABC123', 'abc123'))
+        layout = {
+            # connector: (edid, bus, enabled)
+            'card0-eDP-1': (edid + b'\x00' * 128, '3', 'enabled'),
+            'card0-HDMI-A-1': (b'', '4', 'disabled'),
+            'card0-DP-1': (edid, None, 'enabled'),
+            'card0-DP-2': (edid, '6', 'disabled'),
+            'card0-DP-3': (b'\x00' * 128, '7', 'enabled'),
+        }
+        for name, (data, bus, enabled) in layout.items():
+            (tmp_path / name).mkdir()
+            (tmp_path / name / 'edid').write_bytes(data)
+            (tmp_path / name / 'enabled').write_text(enabled)
+            if bus is not None:
+                (tmp_path / name / f'i2c-{bus}').mkdir()
+
+        real_glob = glob.glob
+
+        def fake_glob(pattern: str):
+            if pattern == '/sys/class/drm/card*-*':
+                return [str(tmp_path / name) for name in layout]
+            return real_glob(pattern)
+
+        mocker.patch.object(glob, 'glob', Mock(side_effect=fake_glob))
+        return tmp_path, edid
+
+    def test_edid_from_drm_device(self, connectors):
+        tmp_path, edid = connectors
+        # only the base block is returned
+        assert linux.edid_from_drm_device(str(tmp_path / 'card0-eDP-1')) == edid
+        assert linux.edid_from_drm_device(str(tmp_path / 'card0-HDMI-A-1')) is None
+        # garbage is ignored
+        assert linux.edid_from_drm_device(str(tmp_path / 'card0-DP-3')) is None
+        assert linux.edid_from_drm_device(str(tmp_path / 'does-not-exist')) is None
+
+    def test_drm_edids(self, connectors):
+        _, edid = connectors
+        assert linux.drm_edids() == {'/dev/i2c-3': edid}
+
+    def test_internal_panel_connector(self, mocker: MockerFixture):
+        gpu = '/sys/devices/pci0000:00/0000:00:08.1/0000:05:00.0'
+        real_paths = {
+            '/sys/class/drm/card0-eDP-1': f'{gpu}/drm/card0/card0-eDP-1',
+            '/sys/class/drm/card0-HDMI-A-1': f'{gpu}/drm/card0/card0-HDMI-A-1',
+            '/sys/class/drm/card1-eDP-2': '/sys/devices/pci0000:00/0000:00:02.0/drm/card1/card1-eDP-2',
+        }
+        mocker.patch.object(glob, 'glob', Mock(side_effect=lambda p: list(real_paths) if 'card*' in p else []))
+        mocker.patch.object(os.path, 'realpath', Mock(side_effect=real_paths.__getitem__))
+        index = linux.DRMConnectorIndex()
+        assert index.panel_for_device(gpu).name == 'card0-eDP-1'
+        # backlights registered against the connector itself
+        assert index.panel_for_device(real_paths['/sys/class/drm/card1-eDP-2']).name == 'card1-eDP-2'
+        assert index.panel_for_device('/sys/devices/platform/acpi') is None
+
+
+class TestHotplugListener:
+    @pytest.fixture
+    def connectors(self, mocker: MockerFixture) -> dict:
+        state = {'card0-DP-1': 'connected', 'card0-DP-2': 'disconnected'}
+        buses = {'card0-DP-1': '3', 'card0-DP-2': '4'}
+        mocker.patch.object(linux.drm_connectors, 'connectors', Mock(side_effect=lambda: tuple(
+            SimpleNamespace(name=name, status=status, i2c_bus=buses[name]) for name, status in state.items()
+        )))
+        return state
+
+    @pytest.fixture
+    def sockets(self):
+        a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        yield a, b
+        a.close()
+        b.close()
+
+    @pytest.fixture
+    def listener(self, connectors, sockets):
+        listener = linux.HotplugListener(sock=sockets[0])
+        listener.on_display_added = Mock()
+        listener.on_display_removed = Mock()
+        yield listener
+        listener.stop(timeout=1)
+
+    CACHE_KEYS = (('i2c_display_info', None), ('ddcutil_monitors_info', None), ('0', 'ddcutil_brightness'), ('unrelated', None))
+
+    @pytest.fixture
+    def populate_cache(self):
+        linux.__cache__.clear()
+        for key, region in self.CACHE_KEYS:
+            linux.__cache__.store(key, [], expires=60, region=region)
+        yield
+        linux.__cache__.clear()
+
+    def cached(self) -> List[str]:
+        '''Returns the keys of `CACHE_KEYS` that are still cached'''
+        return [key for key, region in self.CACHE_KEYS if linux.__cache__.get(key, region=region) is not None]
+
+    @staticmethod
+    def uevent(action: str, devpath: str, subsystem: str, **extra: str) -> bytes:
+        fields = {'ACTION': action, 'DEVPATH': devpath, 'SUBSYSTEM': subsystem, **extra}
+        return f'{action}@{devpath}\0'.encode() + b''.join(f'{k}={v}\0'.encode() for k, v in fields.items())
+
+    def test_parse(self):
+        event = linux.HotplugListener.parse(self.uevent('change', '/devices/drm/card0', 'drm', HOTPLUG='1'))
+        assert event == {'ACTION': 'change', 'DEVPATH': '/devices/drm/card0', 'SUBSYSTEM': 'drm', 'HOTPLUG': '1'}
+        assert linux.HotplugListener.parse(b'libudev\x00\xfe\xed') is None
+        assert linux.HotplugListener.parse(b'garbage') is None
+
+    def test_drm_hotplug(self, listener: linux.HotplugListener, connectors, populate_cache):
+        connectors.update({'card0-DP-1': 'disconnected', 'card0-DP-2': 'connected'})
+        listener.handle(self.uevent('change', '/devices/drm/card0', 'drm', HOTPLUG='1'))
+        assert self.cached() == ['unrelated']
+        listener.on_display_added.assert_called_once_with('card0-DP-2')
+        listener.on_display_removed.assert_called_once_with('card0-DP-1')
+
+    def test_drm_change_without_hotplug(
+        self, monkeypatch: pytest.MonkeyPatch, listener: linux.HotplugListener, populate_cache
+    ):
+        '''Events that don't connect or disconnect anything (eg: a link status change) shouldn't expire anything'''
+        monkeypatch.setattr(sbc.config, 'SHADOW_TTL', 60)
+        shadow = sbc.helpers.shadow
+        shadow.record((linux.I2C, '3'), 0, 50, 'write')
+        listener.handle(self.uevent('change', '/devices/drm/card0', 'drm', HOTPLUG='1'))
+        listener.handle(self.uevent('change', '/devices/drm/card0/card0-DP-1', 'drm'))
+        assert len(self.cached()) == 4
+        assert shadow.get((linux.I2C, '3'), 0) == 50
+        listener.on_display_added.assert_not_called()
+        shadow.invalidate()
+
+    def test_only_affected_buses_are_forgotten(
+        self, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch, listener: linux.HotplugListener, connectors
+    ):
+        monkeypatch.setattr(sbc.config, 'SHADOW_TTL', 60)
+        disconnect = mocker.patch.object(linux.I2C, 'disconnect')
+        shadow = sbc.helpers.shadow
+        for key in ((linux.I2C, '3'), (linux.DDCUtil, '3'), (linux.I2C, '5')):
+            shadow.record(key, 0, 50, 'write')
+        connectors['card0-DP-1'] = 'disconnected'
+        listener.handle(self.uevent('change', '/devices/drm/card0', 'drm', HOTPLUG='1'))
+        assert shadow.get((linux.I2C, '3'), 0) is None
+        assert shadow.get((linux.DDCUtil, '3'), 0) is None
+        assert shadow.get((linux.I2C, '5'), 0) == 50
+        disconnect.assert_called_once_with('/dev/i2c-3')
+        shadow.invalidate()
+
+    def test_backlight(self, mocker: MockerFixture, listener: linux.HotplugListener, populate_cache):
+        linux.SysFiles._display_info_cache = ((), [])
+        clear_handles = mocker.patch.object(linux.SysFiles, '_clear_handles')
+        listener.handle(self.uevent('add', '/devices/pci0000:00/backlight/amdgpu_bl0', 'backlight'))
+        assert linux.SysFiles._display_info_cache is None
+        clear_handles.assert_called_once()
+        listener.on_display_added.assert_called_once_with('amdgpu_bl0')
+        # slower methods are unaffected
+        assert len(self.cached()) == 4
+
+    def test_external_brightness_change(self, monkeypatch: pytest.MonkeyPatch, listener: linux.HotplugListener):
+        monkeypatch.setattr(sbc.config, 'SHADOW_TTL', 60)
+        shadow = sbc.helpers.shadow
+        shadow.record((linux.SysFiles, 'edid'), 0, 50, 'write')
+        shadow.record((linux.I2C, 'edid'), 0, 50, 'write')
+        listener.handle(self.uevent('change', '/devices/pci0000:00/backlight/amdgpu_bl0', 'backlight', SOURCE='hotkey'))
+        assert shadow.get((linux.SysFiles, 'edid'), 0) is None
+        assert shadow.get((linux.I2C, 'edid'), 0) == 50
+        listener.on_display_added.assert_not_called()
+        shadow.invalidate()
+
+    def test_own_brightness_change(self, monkeypatch: pytest.MonkeyPatch, listener: linux.HotplugListener):
+        '''Writes made through sysfs, eg: by this library, shouldn't throw away any cached state'''
+        monkeypatch.setattr(sbc.config, 'SHADOW_TTL', 60)
+        shadow = sbc.helpers.shadow
+        shadow.record((linux.SysFiles, 'edid'), 0, 50, 'write')
+        cached = ((), [])
+        linux.SysFiles._display_info_cache = cached
+        listener.handle(self.uevent('change', '/devices/pci0000:00/backlight/amdgpu_bl0', 'backlight', SOURCE='sysfs'))
+        assert linux.SysFiles._display_info_cache is cached
+        assert shadow.get((linux.SysFiles, 'edid'), 0) == 50
+        shadow.invalidate()
+        linux.SysFiles._display_info_cache = None
+
+    def test_i2c_removed(self, mocker: MockerFixture, listener: linux.HotplugListener, populate_cache):
+        disconnect = mocker.patch.object(linux.I2C, 'disconnect')
+        listener.handle(self.uevent('remove', '/devices/i2c-7/i2c-dev/i2c-7', 'i2c-dev', DEVNAME='i2c-7'))
+        disconnect.assert_called_once_with('/dev/i2c-7')
+        assert self.cached() == ['unrelated']
+        listener.on_display_removed.assert_not_called()
+
+    def test_i2c_changes_are_ignored(self, mocker: MockerFixture, listener: linux.HotplugListener, populate_cache):
+        disconnect = mocker.patch.object(linux.I2C, 'disconnect')
+        listener.handle(self.uevent('change', '/devices/i2c-7/i2c-dev/i2c-7', 'i2c-dev', DEVNAME='i2c-7'))
+        # a device on a bus, rather than the bus itself
+        listener.handle(self.uevent('remove', '/devices/i2c-7/7-0050', 'i2c'))
+        assert len(self.cached()) == 4
+        disconnect.assert_not_called()
+
+    def test_unrelated_subsystem(self, listener: linux.HotplugListener, populate_cache):
+        listener.handle(self.uevent('add', '/devices/usb1/1-1', 'usb'))
+        assert len(self.cached()) == 4
+        listener.on_display_added.assert_not_called()
+
+    def test_callback_errors_are_contained(self, listener: linux.HotplugListener, connectors):
+        listener.on_display_removed = Mock(side_effect=RuntimeError)
+        connectors.update({'card0-DP-1': 'disconnected', 'card0-DP-2': 'connected'})
+        listener.handle(self.uevent('change', '/devices/drm/card0', 'drm', HOTPLUG='1'))
+        listener.on_display_added.assert_called_once_with('card0-DP-2')
+
+    def test_background_thread(self, listener: linux.HotplugListener, connectors, sockets):
+        added = threading.Event()
+        listener.on_display_added = lambda name: added.set()
+        assert linux._display_info_ttl(2) == 2
+        listener.start()
+        assert linux.HotplugListener.active()
+        assert linux._display_info_ttl(2) == linux.HotplugListener.DISPLAY_INFO_TTL
+
+        connectors['card0-DP-2'] = 'connected'
+        sockets[1].send(self.uevent('change', '/devices/drm/card0', 'drm', HOTPLUG='1'))
+        assert added.wait(timeout=5)
+
+        listener.stop(timeout=5)
+        assert not linux.HotplugListener.active()
+
+    def test_stop_timeout(self, listener: linux.HotplugListener, connectors, sockets):
+        '''The socket should only be closed once the listener thread is done with it'''
+        handling, release = threading.Event(), threading.Event()
+        listener.on_display_added = lambda name: (handling.set(), release.wait(5))
+        listener.start()
+        connectors['card0-DP-2'] = 'connected'
+        sockets[1].send(self.uevent('change', '/devices/drm/card0', 'drm', HOTPLUG='1'))
+        assert handling.wait(5)
+
+        listener.stop(timeout=0.01)
+        assert not linux.HotplugListener.active()
+        assert sockets[0].fileno() != -1, 'the socket was closed while the thread was still using it'
+        thread = listener._thread
+        release.set()
+        thread.join(5)
+        assert sockets[0].fileno() == -1
 
 
 class TestXRandr(BrightnessMethodTest):
@@ -202,6 +1594,51 @@ class TestXRandr(BrightnessMethodTest):
         def test_display_filtering(self, mocker: MockerFixture, original_os_module, method):
             super().test_display_filtering(mocker, original_os_module, method, extras={'include': ['interface']})
 
+        def test_xrandr_called_once_per_request(
+            self, mocker: MockerFixture, monkeypatch: MonkeyPatch, original_os_module, method: Type[linux.XRandr]
+        ):
+            monkeypatch.setattr(sbc, '_OS_MODULE', original_os_module)
+            spy = mocker.spy(sbc.linux, 'check_output')
+
+            def verbose_calls():
+                return sum(c.args[0] == [method.executable, '--verbose'] for c in spy.call_args_list)
+
+            assert len(sbc.get_brightness(method='xrandr')) == 2
+            assert verbose_calls() == 1
+
+            spy.reset_mock()
+            assert sbc.set_brightness(50, method='xrandr', no_return=False) == [50, 50]
+            assert verbose_calls() == 1
+
+            spy.reset_mock()
+            sbc.set_brightness(50, method='xrandr')
+            assert verbose_calls() == 1
+
+        def test_set_batched(
+            self, mocker: MockerFixture, monkeypatch: MonkeyPatch, original_os_module, method: Type[linux.XRandr]
+        ):
+            monkeypatch.setattr(sbc, '_OS_MODULE', original_os_module)
+            spy = mocker.spy(sbc.linux, 'check_output')
+
+            assert sbc.set_brightness(30, method='xrandr', no_return=False) == [30, 30]
+            set_calls = [c.args[0] for c in spy.call_args_list if '--brightness' in c.args[0]]
+            assert set_calls == [[
+                method.executable,
+                '--output', 'HDMI-1', '--brightness', '0.3',
+                '--output', 'HDMI-2', '--brightness', '0.3'
+            ]]
+
+            error = subprocess.CalledProcessError(1, 'xrandr')
+
+            def fail_to_set(command, *args, **kwargs):
+                if '--brightness' in command:
+                    raise error
+                return mock_check_output(command, *args, **kwargs)
+
+            spy.side_effect = fail_to_set
+            assert method.set_brightness_batch([10, 20], [0, 1]) == [error, error]
+            assert isinstance(method.set_brightness_batch([10], [5])[0], IndexError)
+
         def test_brightness_kwarg(self, method: Type[linux.XRandr]):
             assert all('brightness' not in display for display in method.get_display_info())
             with_brightness = method.get_display_info(brightness=True)
@@ -252,6 +1689,7 @@ class TestDDCUtil(BrightnessMethodTest):
         mock = Mock(side_effect=mock_check_output, spec=True)
         mocker.patch.object(sbc.helpers, 'check_output', mock)
         mocker.patch.object(sbc.linux, 'check_output', mock)
+        mocker.patch.object(sbc.linux, 'drm_edids', Mock(return_value={}))
 
     @pytest.fixture
     def patch_get_brightness(self, patch_get_display_info):
@@ -271,11 +1709,50 @@ class TestDDCUtil(BrightnessMethodTest):
                 mocker, original_os_module, method, extras={'include': ['i2c_bus']}
             )
 
+        def test_disk_cache(self, mocker: MockerFixture, disk_cache, method: Type[linux.DDCUtil]):
+            sbc.linux.__cache__.clear()
+            displays = method.get_display_info()
+            linux.topology_cache.save()
+
+            sbc.linux.__cache__.clear()
+            linux.topology_cache.clear()
+            spy = mocker.spy(sbc.linux, 'check_output')
+            assert method.get_display_info() == displays
+            spy.assert_not_called()
+
+        def test_skips_verbose_detection_with_drm_edids(self, mocker: MockerFixture, method: Type[linux.DDCUtil]):
+            edids = {
+                f'/dev/i2c-{i}': bytes.fromhex(fake_edid('DEL', f'Dell {i}', f'serial{i}'))
+                for i in (1, 2)
+            }
+            mocker.patch.object(sbc.linux, 'drm_edids', Mock(return_value=edids))
+            mocker.patch.object(sbc.linux, 'check_output', Mock(
+                return_value=b'Display 1\n   I2C bus: /dev/i2c-1\nDisplay 2\n   I2C bus: /dev/i2c-2\n'
+            ))
+            displays = list(method._gdi())
+            sbc.linux.check_output.assert_called_once()
+            assert '-v' not in sbc.linux.check_output.call_args.args[0]
+            assert [d['edid'] for d in displays] == [edids['/dev/i2c-1'].hex(), edids['/dev/i2c-2'].hex()]
+            assert all(d['bin_serial'] == '00000000' for d in displays)
+
+        def test_falls_back_to_verbose_detection(self, mocker: MockerFixture, method: Type[linux.DDCUtil]):
+            edid = bytes.fromhex(fake_edid('DEL', 'Dell ABC123', 'abc123'))
+            mocker.patch.object(sbc.linux, 'drm_edids', Mock(return_value={'/dev/i2c-1': edid}))
+            mocker.patch.object(
+                sbc.linux, 'check_output', Mock(side_effect=lambda cmd, **_: b'Display 1\n   I2C bus: /dev/i2c-2\n')
+            )
+            displays = list(method._gdi())
+            assert [c.args[0][:3] for c in sbc.linux.check_output.call_args_list] == [
+                ['ddcutil', 'detect', '--sleep-multiplier=0.5'],
+                ['ddcutil', 'detect', '-v']
+            ]
+            assert [d['i2c_bus'] for d in displays] == ['/dev/i2c-2']
+
     class TestGetBrightness(BrightnessMethodTest.TestGetBrightness):
         # TODO: tests for brightness scaling
         @pytest.fixture(autouse=True, scope='function')
         def patch(self, patch_get_brightness):
-            sbc.linux.__cache__._store = {}
+            sbc.linux.__cache__.clear()
 
         class TestDisplayKwarg(BrightnessMethodTest.TestGetBrightness.TestDisplayKwarg):
             def test_with(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info, subtests):
@@ -298,7 +1775,7 @@ class TestDDCUtil(BrightnessMethodTest):
     class TestSetBrightness(BrightnessMethodTest.TestSetBrightness):
         @pytest.fixture(autouse=True, scope='function')
         def patch(self, patch_set_brightness):
-            sbc.linux.__cache__._store = {}
+            sbc.linux.__cache__.clear()
 
         class TestDisplayKwarg(BrightnessMethodTest.TestSetBrightness.TestDisplayKwarg):
             def test_with(self, mocker: MockerFixture, method: Type[BrightnessMethod], freeze_display_info, subtests):